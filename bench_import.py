@@ -0,0 +1,98 @@
+"""
+モジュールの読み込み時間のベンチマーク
+
+各モジュールを新しい Python プロセスで読み込み、読み込みにかかった時間と、
+そのときに読み込まれた重い依存 (gurobipy, matplotlib など) を表示する。
+
+使用例:
+    python bench_import.py
+    python bench_import.py --repeat 10 torus pipeline
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# 計測するモジュール
+MODULES = (
+    "torus",
+    "formulas.p_g",
+    "formulas.p_l",
+    "formulas.intersection_reduction",
+    "draw",
+    "draw_torus",
+    "svg_writer",
+    "coordinates",
+    "remove_cycles",
+    "solution_cache",
+    "pipeline",
+)
+
+# 読み込まれたかを確認する重い依存
+HEAVY = ("gurobipy", "dotenv", "matplotlib", "networkx", "numpy")
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module, repeat=5):
+    """
+    モジュールの読み込み時間を計測
+
+    Args:
+        module: モジュール名 str
+        repeat: 計測する回数 (デフォルト: 5)
+
+    Returns:
+        result: {"module", "median", "min", "heavy"}（時間は秒）
+    """
+    script = _SCRIPT.format(module=module, heavy=HEAVY)
+    times = []
+    heavy = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        data = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(data["seconds"])
+        heavy = data["heavy"]
+
+    return {
+        "module": module,
+        "median": statistics.median(times),
+        "min": min(times),
+        "heavy": heavy,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="モジュールの読み込み時間を計測する")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="JSON で出力する")
+    args = parser.parse_args(argv)
+
+    results = [measure(module, args.repeat) for module in args.modules]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'module':<36}{'median [ms]':>12}{'min [ms]':>10}  heavy")
+    for r in results:
+        print(
+            f"{r['module']:<36}{r['median'] * 1000:>12.1f}{r['min'] * 1000:>10.1f}"
+            f"  {', '.join(r['heavy']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
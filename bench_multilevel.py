@@ -0,0 +1,106 @@
+"""
+多段階の階層割当のベンチマーク
+
+中規模のグラフでは torus() の厳密解との目的関数の差（品質の差）を、
+大規模のグラフでは計算時間と各段のノード数を表示する。
+
+使用例:
+    python bench_multilevel.py
+    python bench_multilevel.py --exact 30 40 --large 10000 100000 --seeds 3
+"""
+
+import argparse
+import json
+import time
+
+from generate_torus_graph import generate_mixed_graph
+from multilevel import COARSEST, multilevel
+from solve_stats import SolveStats
+from torus import torus, torus_objective
+
+
+def _graph(n, seed):
+    # 平均次数がノード数によらず一定になる疎なグラフ
+    return generate_mixed_graph(n, edge_prob=min(1.0, 2 / n), cycle_prob=0.3, seed=seed)
+
+
+def measure(n, seed, exact=False, coarsest=COARSEST):
+    """
+    1つのグラフで多段階の階層割当（と torus() の厳密解）を計測
+
+    Args:
+        n: ノード数
+        seed: グラフの乱数シード
+        exact: torus() の厳密解と比較する (デフォルト: False)
+        coarsest: 最も粗いグラフのノード数の上限
+
+    Returns:
+        result: {"n", "m", "seed", "levels", "seconds", "objective", "L_max", "torus",
+                 "exact_seconds", "exact_objective", "gap"}（gap は厳密解との相対差）
+    """
+    V, A = _graph(n, seed)
+    stats = SolveStats()
+
+    start = time.perf_counter()
+    y_val, t_val, _ = multilevel(V, A, coarsest=coarsest, stats=stats, verbose=False)
+    seconds = time.perf_counter() - start
+
+    result = {
+        "n": n,
+        "m": len(A),
+        "seed": seed,
+        "levels": stats.records[-1]["levels"],
+        "seconds": seconds,
+        "objective": torus_objective(V, A, y_val, t_val),
+        "L_max": max(y_val.values()),
+        "torus": sum(t_val.values()),
+    }
+
+    if exact:
+        start = time.perf_counter()
+        y_val, t_val, _ = torus(V, A, verbose=False)
+        result["exact_seconds"] = time.perf_counter() - start
+        result["exact_objective"] = torus_objective(V, A, y_val, t_val)
+        result["gap"] = result["objective"] / result["exact_objective"] - 1
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多段階の階層割当を計測する")
+    parser.add_argument("--exact", type=int, nargs="*", default=[30, 40, 50])
+    parser.add_argument("--large", type=int, nargs="*", default=[10000, 100000])
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--coarsest", type=int, default=COARSEST)
+    parser.add_argument("--json", action="store_true", help="JSON で出力する")
+    args = parser.parse_args(argv)
+
+    results = [
+        measure(n, seed, exact=True, coarsest=args.coarsest)
+        for n in args.exact
+        for seed in range(args.seeds)
+    ]
+    results += [
+        measure(n, seed, coarsest=args.coarsest)
+        for n in args.large
+        for seed in range(args.seeds)
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"{'n':>8}{'m':>8}{'seed':>5}{'time [s]':>10}{'objective':>12}{'gap':>8}"
+        "  levels"
+    )
+    for r in results:
+        gap = f"{r['gap'] * 100:>7.1f}%" if "gap" in r else f"{'-':>8}"
+        print(
+            f"{r['n']:>8}{r['m']:>8}{r['seed']:>5}{r['seconds']:>10.2f}"
+            f"{r['objective']:>12}{gap}  {r['levels']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+2重連結成分（ブロック）への分解による階層割当
+
+閉路が1つの関節点でつながった鎖のようなグラフでは、グラフ全体を1つの MIP で解く代わりに、
+無向グラフとしての2重連結成分（ブロック）ごとに小さな問題を解き、
+ブロック・カット木をたどって関節点の階層が一致するように各ブロックの階層をずらしてつなぐ。
+
+有向閉路は必ず1つのブロックに含まれるので、トーラス辺（閉路を切る辺）の選び方は
+ブロックごとに独立に決められる。ずらしてもブロック内の階層差は変わらないので、
+各エッジのトーラス辺かどうかとスパンはブロックの解のまま保たれる。
+トーラスでは、ずらす代わりに階層数を法として回転させて合わせることも試す
+（ブロックのエッジの項が増えない場合だけ回転を採用する）。
+
+次の場合は、グラフ全体を解き直す:
+    torus: 目的関数の値が、グラフ全体の最適値の下界を max_gap より大きく超える
+        （関節点で合わせたことで L_max やトーラス辺が増えた）。
+        下界は、ブロックごとの最適値の下界 + ほかのブロックのエッジの項の下界の最大で、
+        最適性が示されなかったブロックがあれば下界がないので解き直す。
+        ブロックが1つだけなら、その解がグラフ全体の解なので解き直さない
+    pg / pg2 / pq / pl / longest: ソースが階層 0 にない、
+        または（定式化では）シンクが最小階層差を考慮した最長路の長さの階層にない
+    いずれかのブロックが解けなかった
+
+使用例:
+    from block_cut import solve_by_blocks
+
+    y_val, t_val, L = solve_by_blocks(V, A, solver="torus", verbose=False)
+"""
+
+import math
+from collections import defaultdict, deque
+
+from bounds import TOL, _is_integral, torus_bounds
+from decompose import FORMULATIONS, solve_component, solve_jobs
+from solve_stats import SolveStats, start_record
+
+
+def biconnected_components(V, A):
+    """
+    無向グラフとしての2重連結成分（ブロック）を求める（再帰を使わない Hopcroft-Tarjan）
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]（向きは無視する。自己ループは1本で1つのブロック）
+
+    Returns:
+        blocks: ブロックごとのエッジのリスト（ブロック内は A の順）
+    """
+    A = list(dict.fromkeys(A))
+    adj = {v: [] for v in V}
+    blocks = []
+    for i, (u, v) in enumerate(A):
+        if u == v:
+            blocks.append([A[i]])
+            continue
+        adj[u].append((v, i))
+        adj[v].append((u, i))
+
+    disc = {}
+    low = {}
+    edge_stack = []
+    for root in V:
+        if root in disc:
+            continue
+
+        disc[root] = low[root] = len(disc)
+        stack = [(root, -1, iter(adj[root]))]
+        while stack:
+            v, parent_edge, neighbors = stack[-1]
+            for x, i in neighbors:
+                if i == parent_edge:
+                    continue
+                if x not in disc:
+                    edge_stack.append(i)
+                    disc[x] = low[x] = len(disc)
+                    stack.append((x, i, iter(adj[x])))
+                    break
+                if disc[x] < disc[v]:
+                    # 祖先への後退辺
+                    edge_stack.append(i)
+                    low[v] = min(low[v], disc[x])
+            else:
+                stack.pop()
+                if not stack:
+                    continue
+                p = stack[-1][0]
+                low[p] = min(low[p], low[v])
+                if low[v] >= disc[p]:
+                    # p が関節点（または根）なので、木の辺 (p, v) までを1つのブロックにする
+                    block = []
+                    while True:
+                        i = edge_stack.pop()
+                        block.append(i)
+                        if i == parent_edge:
+                            break
+                    blocks.append([A[i] for i in sorted(block)])
+
+    return blocks
+
+
+def block_cut_tree(V, A):
+    """
+    ブロックと関節点を求める
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+
+    Returns:
+        blocks: ブロックごとの (ノードのリスト, エッジのリスト)（ノードは V の順）
+        cut: 関節点の集合 set（2つ以上のブロックに含まれるノード）
+    """
+    position = {v: i for i, v in enumerate(V)}
+    blocks = []
+    count = defaultdict(int)
+    for edges in biconnected_components(V, A):
+        nodes = sorted({v for e in edges for v in e}, key=position.__getitem__)
+        for v in nodes:
+            count[v] += 1
+        blocks.append((nodes, edges))
+
+    cut = {v for v, c in count.items() if c > 1}
+    return blocks, cut
+
+
+def align_blocks(V, blocks, layouts, period=None, cost=None):
+    """
+    ブロック・カット木をたどって、関節点の階層が一致するように各ブロックの階層をずらす
+
+    弱連結成分ごとに、最小の階層が 0 になるようにそろえる。
+    どのブロックにも含まれないノード（孤立点）は階層 0 に置く。
+
+    period を指定すると（トーラス）、子ブロックを階層数 period を法として回転させて
+    関節点に合わせることを試み、cost(b, y) が増えなければ回転を採用する
+    （ずらすだけでは階層数が増えるが、回転なら period に収まる）。
+
+    Args:
+        V: ノード集合 list
+        blocks: ブロックごとの (ノードのリスト, エッジのリスト)
+        layouts: ブロックごとの (y_val, t_val, L)
+        period: トーラスの階層数 int (デフォルト: 回転させない)
+        cost: ブロック b を階層割当 y にしたときのコストを返す関数
+
+    Returns:
+        y_val: 各ノードの階層 dict
+    """
+    node_blocks = defaultdict(list)
+    for b, (nodes, _) in enumerate(blocks):
+        for v in nodes:
+            node_blocks[v].append(b)
+
+    def place(c, v, target):
+        y_c = layouts[c][0]
+        shift = target - y_c[v]
+        if period is not None:
+            rotated = {x: (k + shift) % period for x, k in y_c.items()}
+            if rotated[v] == target and cost(c, rotated) <= cost(c, y_c):
+                return rotated
+        return {x: k + shift for x, k in y_c.items()}
+
+    y_val = {}
+    placed = [False] * len(blocks)
+    for start in range(len(blocks)):
+        if placed[start]:
+            continue
+
+        # start を根とする木の幅優先探索
+        placed[start] = True
+        component = []
+        queue = deque([(start, layouts[start][0])])
+        while queue:
+            b, y_b = queue.popleft()
+            for v in blocks[b][0]:
+                if v in y_val:
+                    continue
+                y_val[v] = y_b[v]
+                component.append(v)
+                for c in node_blocks[v]:
+                    if not placed[c]:
+                        placed[c] = True
+                        queue.append((c, place(c, v, y_val[v])))
+
+        low = min(y_val[v] for v in component)
+        for v in component:
+            y_val[v] -= low
+
+    return {v: y_val.get(v, 0) for v in V}
+
+
+def _height(y_val):
+    return max(y_val.values()) - min(y_val.values()) if y_val else 0
+
+
+def _violates(solver, V, A, lam, y_val):
+    """つないだ階層割当が定式化の制約（ソースは階層 0、シンクは最長路の長さ）を満たさないか"""
+    from pipeline import longest_path_layers
+
+    heads = {v for _, v in A}
+    tails = {u for u, _ in A}
+    if any(y_val[v] != 0 for v in V if v not in heads):
+        return True
+    if solver in FORMULATIONS:
+        depth = max(longest_path_layers(V, A, lam).values(), default=0)
+        return any(y_val[v] != depth for v in V if v not in tails and v in heads)
+    return False
+
+
+def _solve_block(job):
+    """
+    1つのブロックを解く（プロセスプールのワーカーで実行する）
+
+    Args:
+        job: solve_component() のジョブ
+
+    Returns:
+        layout: solve_component() の結果 (y_val, t_val, L)
+        records: 求解の記録 list[dict]（プロセスをまたいで呼び出し元の stats に加える）
+    """
+    solver, V, A, w, lam, params = job
+    block_stats = SolveStats()
+    layout = solve_component((solver, V, A, w, lam, dict(params, stats=block_stats)))
+    return layout, block_stats.records
+
+
+def _proven_bound(records, bound, integral):
+    """
+    ブロックの torus() の最適値の下界（最適性が示されていなければ None）
+
+    Args:
+        records: ブロックの求解の記録 list[dict]
+        bound: ブロックの組合せ的な下界（torus_bounds() の objective）
+        integral: 目的関数の係数がすべて整数か
+    """
+    from gurobipy import GRB
+
+    record = next((r for r in reversed(records) if r["label"] == "torus"), None)
+    result = {} if record is None else record.get("result", {})
+    if result.get("Status") not in (GRB.OPTIMAL, GRB.USER_OBJ_LIMIT):
+        return None
+    if not result.get("SolCount"):
+        return None
+    # OPTIMAL でも MIPGap の分だけ暫定解より小さいことがあるので、ソルバーの下界を使う
+    objbound = result.get("ObjBound")
+    if objbound is None:
+        return bound
+    if integral:
+        objbound = math.ceil(objbound - TOL)
+    return max(bound, objbound)
+
+
+def solve_by_blocks(
+    V,
+    A,
+    w=None,
+    lam=None,
+    solver="torus",
+    processes=None,
+    max_gap=0,
+    stats=None,
+    verbose=True,
+    **params,
+):
+    """
+    ブロックごとに解いて、関節点で階層をそろえてつなぐ
+
+    torus では、つないだ結果の目的関数の値がグラフ全体の最適値の下界 lower_bound を
+    max_gap より大きく超えれば、グラフ全体を解き直す
+    （stats には objective と lower_bound を記録する）。
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+        w: エッジ重み dict (デフォルト: すべて1)
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+        solver: "torus"、定式化の名前 (pg / pg2 / pq / pl)、"longest" のいずれか
+        processes: ブロックを並列に解くプロセス数 (デフォルト: 1プロセスで逐次)
+        max_gap: torus で、つないだ解の目的関数の値と下界の相対的な差の上限
+            (デフォルト: 0 = 最適と示せるときだけつないだ解を使う)
+        stats: 計測結果を記録する SolveStats (デフォルト: 記録しない)
+        verbose: False のとき Gurobi のログと失敗時の出力を抑える (デフォルト: True)
+        **params: 解法に渡すその他の引数（torus の alpha など）
+
+    Returns:
+        y_val: 各ノードの階層 dict
+        t_val: 各エッジがトーラス辺か dict
+        L: レイヤー集合 dict[int: list]
+    """
+    from torus import torus_objective
+
+    A = list(dict.fromkeys(A))
+    w = {e: (1 if w is None else w[e]) for e in A}
+    lam = {e: (1 if lam is None else lam[e]) for e in A}
+    params = dict(params, verbose=verbose)
+    if solver == "torus":
+        # ブロックの目的関数でもトーラス辺のスパンはグラフ全体と同じ M で測る
+        params.setdefault("M", len(V))
+    weights = {k: params[k] for k in ("alpha", "beta", "gamma", "M") if k in params}
+
+    record = start_record(stats, "blocks")
+    blocks, cut = block_cut_tree(V, A)
+    record.lap("decompose")
+
+    # エッジが1本のブロック（橋）は解くまでもない
+    layouts = [None] * len(blocks)
+    records = [[] for _ in blocks]
+    jobs = []
+    for b, (nodes, edges) in enumerate(blocks):
+        (u, v), *rest = edges
+        if not rest and u != v:
+            layouts[b] = ({u: 0, v: lam[(u, v)]}, {(u, v): False}, None)
+        else:
+            block_w = {e: w[e] for e in edges}
+            block_lam = {e: lam[e] for e in edges}
+            jobs.append((b, (solver, nodes, edges, block_w, block_lam, params)))
+
+    # SolveStats はプロセスをまたげないので、ブロックの記録は結果と一緒に受け取る
+    results = solve_jobs([job for _, job in jobs], processes, _solve_block)
+    for (b, _), (layout, block_records) in zip(jobs, results):
+        layouts[b] = layout
+        records[b] = block_records
+        if stats is not None:
+            for data in block_records:
+                stats.add(data)
+    record.lap("solve")
+
+    def cost(b, y):
+        """ブロック b のエッジの項（エッジの階層差の制約を満たさなければ inf）"""
+        nodes, edges = blocks[b]
+        t = {(u, v): y[u] > y[v] for u, v in edges}
+        if any(abs(y[v] - y[u]) < lam[(u, v)] for u, v in edges):
+            return float("inf")
+        return torus_objective(nodes, edges, y, t, w, **dict(weights, alpha=0))
+
+    fallback = any(not layout[0] for layout in layouts)
+    if not fallback and solver == "torus":
+        height = max((_height(y) for y, _, _ in layouts), default=0)
+        y_val = align_blocks(V, blocks, layouts, period=height + 1, cost=cost)
+        t_val = {(u, v): y_val[u] > y_val[v] for u, v in A}
+        value = torus_objective(V, A, y_val, t_val, w, **weights)
+
+        # グラフ全体の最適解をブロック b に制限すると、ブロック b の最適値以上になり、
+        # ほかのブロックのエッジの項はそれぞれの下界以上になる
+        integral = _is_integral(
+            [weights.get(k, 1) for k in ("alpha", "beta", "gamma")] + list(w.values())
+        )
+        block_lb = []
+        edge_lb = []
+        for b, (nodes, edges) in enumerate(blocks):
+            bound = torus_bounds(nodes, edges, w, lam, **weights)["objective"]
+            if len(edges) > 1 or edges[0][0] == edges[0][1]:
+                bound = _proven_bound(records[b], bound, integral)
+            block_lb.append(bound)
+            edge_lb.append(
+                torus_bounds(nodes, edges, w, lam, **dict(weights, alpha=0))[
+                    "objective"
+                ]
+            )
+        lower_bound = None
+        if None not in block_lb:
+            lower_bound = max(
+                (lb + sum(edge_lb) - edge_lb[b] for b, lb in enumerate(block_lb)),
+                default=0,
+            )
+        fallback = len(blocks) > 1 and (
+            lower_bound is None or value - lower_bound > max_gap * abs(value) + TOL
+        )
+        record.note(objective=value, lower_bound=lower_bound)
+    elif not fallback:
+        y_val = align_blocks(V, blocks, layouts)
+        t_val = {e: False for e in A}
+        fallback = _violates(solver, V, A, lam, y_val)
+    record.lap("align")
+    record.note(blocks=len(blocks), cut=len(cut), solved=len(jobs), fallback=fallback)
+
+    if fallback:
+        y_val, t_val, L = solve_component(
+            (solver, V, A, w, lam, dict(params, stats=stats))
+        )
+        record.lap("fallback")
+        record.finish()
+        return y_val, t_val, L
+
+    L = defaultdict(list)
+    for v in V:
+        L[y_val[v]].append(v)
+
+    record.finish()
+    return y_val, t_val, L
@@ -0,0 +1,266 @@
+"""
+階層割当の目的関数の組合せ的な下界
+
+torus() や P_Q / P_L の Big-M 制約・2乗の目的関数では、ソルバーの LP 緩和による
+下界が弱く、最適解が見つかってもギャップが閉じないことが多い。
+ここではグラフの構造だけから安く計算できる下界を求め、モデルに
+妥当な不等式（閉路ごとのトーラス辺の下限、L_max の下限、変数の範囲）として加え、
+目的関数の下界を BestObjStop に渡して、暫定解が下界に達したら探索を打ち切る。
+
+torus() の下界:
+    - トーラス辺: 有向閉路には必ずトーラス辺が1本以上ある。
+      短い閉路を辺素になるように貪欲に集め、閉路の数（t_weight があれば各閉路の
+      最小の重み）の和を Σ k*t の下界とする。
+    - L_max: どのエッジも両端の階層差が lam 以上なので、L_max ≥ max lam。
+    - 目的関数: 閉路 C 上のスパンの和は M*(C 上のトーラス辺数) になるので、
+      Cauchy–Schwarz の不等式から Σ_C w*(スパン)^2 ≥ M^2 / Σ_C (1/w)。
+      さらに閉路のトーラス辺が1本なら、残りのエッジは上向きに並ぶので
+      L_max ≥ Σ_C lam - max_C lam（2本以上ならトーラス辺の項が増える）。
+
+P_Q / P_L の下界:
+    入次数0のノードを 0、出次数0のノードを l に固定するので、
+    各ノードの階層は [最長路の長さ, l - 出次数0のノードまでの最長路の長さ] に収まる。
+    これはP_Gの差分制約系のポテンシャルで、エッジのスパンの範囲が決まる。
+
+使用例:
+    from bounds import torus_bounds
+
+    bound = torus_bounds(V, A)
+    print(bound["objective"], bound["torus"], bound["L_max"])
+"""
+
+import math
+from collections import defaultdict, deque
+
+# 下界を BestObjStop に渡すときの許容誤差
+TOL = 1e-6
+
+
+def _shortest_cycle(succ, s):
+    """ノード s を通る最短の有向閉路のエッジのリスト（なければ None）"""
+    parent = {s: None}
+    queue = deque([s])
+    while queue:
+        u = queue.popleft()
+        for v in succ[u]:
+            if v == s:
+                path = [(u, s)]
+                while parent[u] is not None:
+                    path.append((parent[u], u))
+                    u = parent[u]
+                path.reverse()
+                return path
+            if v not in parent:
+                parent[v] = u
+                queue.append(v)
+    return None
+
+
+def cycle_packing(V, A):
+    """
+    辺素な有向閉路の集まりを貪欲に求める
+
+    各ノードについて、そのノードを通る最短の閉路を見つけてはエッジを取り除くことを
+    閉路がなくなるまで繰り返す。自己ループは無視する。
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+
+    Returns:
+        cycles: 閉路のリスト list[list[tuple]]（各閉路はエッジを順にたどったもの）
+    """
+    succ = defaultdict(set)
+    for u, v in A:
+        if u != v:
+            succ[u].add(v)
+
+    cycles = []
+    for s in V:
+        while succ[s]:
+            cycle = _shortest_cycle(succ, s)
+            if cycle is None:
+                break
+            for u, v in cycle:
+                succ[u].discard(v)
+            cycles.append(cycle)
+    return cycles
+
+
+def _is_integral(values):
+    return all(float(x).is_integer() for x in values)
+
+
+def torus_bounds(
+    V,
+    A,
+    w=None,
+    lam=None,
+    alpha=100,
+    beta=1,
+    gamma=1000,
+    M=None,
+    t_weight=None,
+):
+    """
+    torus() の目的関数・トーラス辺数・L_max の下界
+
+    Args:
+        V, A, w, lam, alpha, beta, gamma, M, t_weight: torus() と同じ
+
+    Returns:
+        bound: {"objective", "torus", "L_max", "cycles"}
+            objective: 目的関数の下界
+            torus: Σ k*t の下界
+            L_max: L_max の下界
+            cycles: 辺素な閉路のリスト（各閉路に1本以上トーラス辺がある）
+    """
+    A = [e for e in set(A) if e[0] != e[1]]
+    if M is None:
+        M = len(V)
+
+    def get(d, e):
+        return 1 if d is None else d[e]
+
+    # 通常辺なら スパン ≥ lam、トーラス辺なら スパン ≥ 1（L_max ≤ M-1 より）
+    normal = {e: beta * get(w, e) * get(lam, e) ** 2 for e in A}
+    torus_cost = {e: beta * get(w, e) + gamma * get(t_weight, e) for e in A}
+    least = {e: min(normal[e], torus_cost[e]) for e in A}
+
+    L_lb = max((get(lam, e) for e in A), default=0)
+    cycles = cycle_packing(V, A)
+
+    total = sum(least.values())
+    used = []
+    num_torus = 0
+    extra = 0  # 1つの閉路で L_max の下界を上げられる分（L_max は共通なので最大値だけ）
+    for cycle in cycles:
+        lams = [get(lam, e) for e in cycle]
+        if not max(lams):
+            continue  # lam がすべて 0 なら同じ階層に並べられる
+        used.append(cycle)
+        k = sorted(get(t_weight, e) for e in cycle)
+        num_torus += k[0]
+
+        # トーラス辺を1本 / 2本以上含むときの閉路上のコストの下界
+        raise_cost = sorted(torus_cost[e] - least[e] for e in cycle)
+        base = sum(least[e] for e in cycle)
+        inv = 0
+        if all(get(w, e) > 0 for e in cycle):
+            inv = sum(1 / get(w, e) for e in cycle)
+        one = base + raise_cost[0]
+        two = base + raise_cost[0] + (raise_cost[1] if len(cycle) > 1 else math.inf)
+        if inv:
+            one = max(one, beta * M * M / inv + gamma * k[0])
+            two = max(two, beta * 4 * M * M / inv + gamma * sum(k[:2]))
+        total += one - base
+
+        # トーラス辺が1本なら残りのエッジは上向きの路になる
+        climb = sum(lams) - max(lams)
+        extra = max(extra, min(alpha * max(0, climb - L_lb), two - one))
+
+    objective = alpha * L_lb + total + extra
+    weights = [alpha, beta, gamma]
+    weights += [get(w, e) for e in A] + [get(t_weight, e) for e in A]
+    if _is_integral(weights):
+        # 係数がすべて整数なら目的関数の値も整数
+        objective = math.ceil(objective - TOL)
+
+    return {
+        "objective": objective,
+        "torus": num_torus,
+        "L_max": L_lb,
+        "cycles": used,
+    }
+
+
+def _topological_order(V, A):
+    succ = defaultdict(list)
+    indeg = {v: 0 for v in V}
+    for u, v in A:
+        succ[u].append(v)
+        indeg[v] += 1
+    order = []
+    queue = deque(v for v in V if indeg[v] == 0)
+    while queue:
+        u = queue.popleft()
+        order.append(u)
+        for v in succ[u]:
+            indeg[v] -= 1
+            if indeg[v] == 0:
+                queue.append(v)
+    return order
+
+
+def span_bounds(V, A, lam, Vl, l):
+    """
+    入次数0のノードを 0、Vl のノードを l に固定したときの階層とスパンの範囲
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]（DAG）
+        lam: エッジの最小階層差 dict
+        Vl: 階層 l に固定するノード
+        l: Vl のノードの階層
+
+    Returns:
+        low: 各ノードの階層の下限 dict
+        high: 各ノードの階層の上限 dict（Vl に到達しないノードは math.inf）
+        span: 各エッジのスパンの範囲 dict[(u, v): (下限, 上限)]
+    """
+    order = _topological_order(V, A)
+    pred = defaultdict(list)
+    succ = defaultdict(list)
+    for u, v in A:
+        pred[v].append(u)
+        succ[u].append(v)
+
+    low = {}
+    for v in order:
+        low[v] = max((low[u] + lam[(u, v)] for u in pred[v]), default=0)
+
+    pinned = set(Vl)
+    reach = {}  # Vl のノードまでの最長路の長さ
+    for u in reversed(order):
+        reach[u] = max(
+            [reach[v] + lam[(u, v)] for v in succ[u] if reach[v] is not None]
+            + ([0] if u in pinned else []),
+            default=None,
+        )
+    high = {v: math.inf if reach[v] is None else l - reach[v] for v in order}
+
+    span = {
+        (u, v): (max(lam[(u, v)], low[v] - high[u]), high[v] - low[u])
+        for u, v in A
+    }
+    return low, high, span
+
+
+def span_objective_bound(A, w, span, power=2):
+    """
+    Σ w*(スパン)^power の下界
+
+    Args:
+        A: エッジ集合 list[tuple]
+        w: エッジ重み dict
+        span: span_bounds() の各エッジのスパンの範囲
+        power: スパンの指数 (デフォルト: 2)
+
+    Returns:
+        bound: 下界 float
+    """
+    return sum(w[e] * span[e][0] ** power for e in A)
+
+
+def reached_bound(m):
+    """
+    最適性が示されたか（暫定解が BestObjStop の下界に達して止まった場合も含む）
+
+    Args:
+        m: 求解後の gurobipy のモデル
+    """
+    from gurobipy import GRB
+
+    if m.status == GRB.OPTIMAL:
+        return True
+    return m.status == GRB.USER_OBJ_LIMIT and m.SolCount > 0
@@ -0,0 +1,268 @@
+"""
+部分問題の標準形によるメモ化
+
+同じ形の閉路や強連結成分が、ノード番号だけを変えて何度も現れる。
+部分グラフをラベルの付け方によらない標準形に変換し、同じ形の部分問題は一度だけ解いて、
+その解をラベルの対応で付け替えて再利用する。
+
+標準形の求め方:
+    1. 色の細分化: 各ノードの色を (自分の色, 出る辺の先の色と重み, 入る辺の元の色と重み) で
+       細分化し、変化しなくなるまで繰り返す
+    2. 個別化: 色が同じノードが残っていれば、その中の1つに新しい色を付けて細分化し直す。
+       すべての選び方を試し、エッジ列が辞書順で最小になる並べ方を標準形とする
+    探索する並べ方の数は max_leaves で打ち切る（打ち切っても標準形のキーは
+    グラフを完全に表すので、異なる形の部分問題を取り違えることはない）
+
+使用例:
+    from canonical import torus_memo, solve_components
+
+    memo = torus_memo(cache=SolutionCache("./solution_cache.sqlite"))
+    results = solve_components(memo, V, A)  # 強連結成分ごとの torus() の結果
+    print(memo.hits, memo.misses)
+"""
+
+import hashlib
+from collections import defaultdict
+
+from remove_cycles import strongly_connected_components
+
+# 個別化で試す並べ方の上限
+MAX_LEAVES = 2000
+
+
+def _refine(nodes, colour, out_adj, in_adj):
+    """色が変化しなくなるまで細分化（新しい色はノード番号によらず決まる）"""
+    num_colours = len(set(colour.values()))
+    while True:
+        signature = {
+            v: (
+                colour[v],
+                tuple(sorted((colour[x], label) for x, label in out_adj[v])),
+                tuple(sorted((colour[x], label) for x, label in in_adj[v])),
+            )
+            for v in nodes
+        }
+        ranks = {s: i for i, s in enumerate(sorted(set(signature.values())))}
+        colour = {v: ranks[signature[v]] for v in nodes}
+        if len(ranks) == num_colours:
+            return colour
+        num_colours = len(ranks)
+
+
+def _encode(order, edges):
+    """並べ方 order によるエッジ列"""
+    pos = {v: i for i, v in enumerate(order)}
+    return tuple(sorted((pos[u], pos[v], label) for (u, v), label in edges.items()))
+
+
+def canonical_form(V, A, w=None, lam=None, max_leaves=MAX_LEAVES):
+    """
+    グラフの標準形
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+        w: エッジ重み dict (デフォルト: すべて1)
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+        max_leaves: 個別化で試す並べ方の上限
+
+    Returns:
+        key: 標準形のキー str（同じ形のグラフで一致する）
+        order: 標準形の i 番目のノードに対応する元のノード list
+    """
+    edges = {
+        (u, v): (1 if w is None else w[(u, v)], 1 if lam is None else lam[(u, v)])
+        for u, v in A
+    }
+    out_adj = defaultdict(list)
+    in_adj = defaultdict(list)
+    for (u, v), label in edges.items():
+        out_adj[u].append((v, label))
+        in_adj[v].append((u, label))
+
+    nodes = list(V)
+    colour = _refine(nodes, {v: 0 for v in nodes}, out_adj, in_adj)
+
+    best = None
+    best_order = None
+    leaves = 0
+    stack = [colour]
+    while stack and leaves < max_leaves:
+        colour = stack.pop()
+
+        cells = defaultdict(list)
+        for v in nodes:
+            cells[colour[v]].append(v)
+        target = min((c for c, cell in cells.items() if len(cell) > 1), default=None)
+
+        if target is None:
+            leaves += 1
+            order = sorted(nodes, key=colour.__getitem__)
+            code = _encode(order, edges)
+            if best is None or code < best:
+                best = code
+                best_order = order
+            continue
+
+        # 同じ色のノードを1つずつ個別化（後で取り出す順が色の順になるよう逆順に積む）
+        for v in reversed(cells[target]):
+            individual = {
+                x: 2 * c + (1 if c == target and x != v else 0)
+                for x, c in colour.items()
+            }
+            stack.append(_refine(nodes, individual, out_adj, in_adj))
+
+    if best_order is None:
+        # 打ち切られた場合も、色の順に並べれば正しい（最小とは限らない）標準形になる
+        best_order = sorted(nodes, key=lambda v: (colour[v], nodes.index(v)))
+        best = _encode(best_order, edges)
+
+    text = repr((len(nodes), best))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), best_order
+
+
+def canonical_graph(order, A, w=None, lam=None):
+    """
+    標準形の並べ方で番号を付け直したグラフ
+
+    Returns:
+        V: ノード集合 list[int]（0, 1, ..., k-1）
+        A: エッジ集合 list[tuple(int, int)]
+        w: エッジ重み dict
+        lam: エッジの最小階層差 dict
+    """
+    pos = {v: i for i, v in enumerate(order)}
+    edges = sorted({(pos[u], pos[v]): (u, v) for u, v in A}.items())
+    A_c = [e for e, _ in edges]
+    w_c = {e: (1 if w is None else w[orig]) for e, orig in edges}
+    lam_c = {e: (1 if lam is None else lam[orig]) for e, orig in edges}
+    return list(range(len(order))), A_c, w_c, lam_c
+
+
+def relabel_layering(val, order):
+    """各ノードの階層 dict を元のノードに付け替える"""
+    return {order[i]: layer for i, layer in val.items()}
+
+
+def relabel_torus(result, order):
+    """torus() の結果 (y_val, t_val, L) を元のノードに付け替える"""
+    y_val, t_val, L = result
+    return (
+        {order[i]: layer for i, layer in y_val.items()},
+        {(order[u], order[v]): t for (u, v), t in t_val.items()},
+        {layer: [order[i] for i in nodes] for layer, nodes in L.items()},
+    )
+
+
+class CanonicalMemo:
+    """
+    標準形をキーとした部分問題の解のメモ
+
+    Args:
+        kind: 問題の種類（キャッシュのキーに含める） str
+        solve: 標準形のグラフを解く関数 solve(V, A, w, lam) -> 解
+        relabel: 解を元のノードに付け替える関数 relabel(解, order) -> 解
+        cache: 実行をまたいで解を保存する SolutionCache (デフォルト: 実行中のみ)
+
+    Attributes:
+        hits: 既に解いた形の部分問題だった回数
+        misses: 新しく解いた回数
+    """
+
+    def __init__(self, kind, solve, relabel, cache=None, max_leaves=MAX_LEAVES):
+        self.kind = kind
+        self.solve = solve
+        self.relabel = relabel
+        self.cache = cache
+        self.max_leaves = max_leaves
+        self.solutions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, V, A, w=None, lam=None):
+        """部分問題を解く（同じ形を解いたことがあれば付け替えて返す）"""
+        key, order = canonical_form(V, A, w, lam, self.max_leaves)
+        cache_key = f"canonical:{self.kind}:{key}"
+
+        solution = self.solutions.get(key)
+        if solution is None and self.cache is not None:
+            solution = self.cache.get(cache_key)
+
+        if solution is None:
+            self.misses += 1
+            solution = self.solve(*canonical_graph(order, A, w, lam))
+            ok = all(solution) if isinstance(solution, tuple) else bool(solution)
+            if not ok:
+                return self.relabel(solution, order)
+            if self.cache is not None:
+                self.cache.put(cache_key, solution)
+        else:
+            self.hits += 1
+
+        self.solutions[key] = solution
+        return self.relabel(solution, order)
+
+
+def torus_memo(cache=None, alpha=100, beta=1, gamma=1000):
+    """torus() の部分問題のメモ"""
+
+    def solve(V, A, w, lam):
+        from torus import torus
+
+        return torus(V, A, w=w, lam=lam, alpha=alpha, beta=beta, gamma=gamma)
+
+    kind = f"torus:{alpha}:{beta}:{gamma}"
+    return CanonicalMemo(kind, solve, relabel_torus, cache)
+
+
+def layering_memo(formulation, label="", cache=None):
+    """
+    階層割当の定式化 (pg, pg2, pq, pl) の部分問題のメモ
+
+    V0 / Vl は標準形のグラフの入次数0 / 出次数0のノードとする。
+    """
+
+    def solve(V, A, w, lam):
+        V0 = [i for i in V if all(i != v for (_, v) in A)]
+        Vl = [i for i in V if all(i != u for (u, _) in A)]
+        return formulation(label, V, A, w, lam, V0, Vl)
+
+    kind = formulation.__module__ + "." + formulation.__name__
+    return CanonicalMemo(kind, solve, relabel_layering, cache)
+
+
+def solve_components(memo, V, A, w=None, lam=None, components=None):
+    """
+    成分ごとに部分問題を解く
+
+    Args:
+        memo: CanonicalMemo
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+        w: エッジ重み dict (デフォルト: すべて1)
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+        components: ノード集合のリスト (デフォルト: 強連結成分)
+
+    Returns:
+        results: 成分ごとの解 list
+    """
+    if components is None:
+        components = strongly_connected_components(V, A)
+
+    index = {}
+    for i, component in enumerate(components):
+        for v in component:
+            index[v] = i
+
+    edges = defaultdict(list)
+    for u, v in set(A):
+        if index.get(u) is not None and index.get(u) == index.get(v):
+            edges[index[u]].append((u, v))
+
+    results = []
+    for i, component in enumerate(components):
+        A_i = edges[i]
+        w_i = None if w is None else {e: w[e] for e in A_i}
+        lam_i = None if lam is None else {e: lam[e] for e in A_i}
+        results.append(memo(component, A_i, w_i, lam_i))
+    return results
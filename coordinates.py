@@ -0,0 +1,200 @@
+"""
+Brandes–Köpf法による座標割当を行う関数
+
+層内の順序が決まった階層グラフに対して、各ノードの層内方向の座標を O(V+E) で求める。
+長いエッジ（ダミーノードの列）をまっすぐに揃え、描画の高さを最大層幅より小さく抑える。
+
+使用例:
+    from coordinates import assign_coordinates
+    from draw_torus import draw_torus
+
+    pos = assign_coordinates(L, A, dummy=dummy_node, torus=True)
+    draw_torus(V, A, L, pos=pos)
+
+手順:
+    1. 内部セグメント（ダミー同士のエッジ）と交差するエッジを type 1 conflict として除外
+    2. 上下 × 左右の4方向それぞれで、中央値の隣接ノードとブロックを組む（垂直整列）
+    3. ブロックグラフ上の最長路で各ブロックを詰めて配置する（水平圧縮）
+    4. 幅が最小の割当に揃え、4つの座標の中央2つの平均を取る
+"""
+
+from collections import defaultdict, deque
+
+
+def _find_type1_conflicts(layers, up, dummy):
+    """内部セグメントと交差する非内部セグメントを求める"""
+    conflicts = set()
+    pos = {v: i for layer in layers for i, v in enumerate(layer)}
+
+    for prev_layer, layer in zip(layers, layers[1:]):
+        if not layer:
+            continue
+        k0 = 0
+        scan_pos = 0
+        last = layer[-1]
+        for i, v in enumerate(layer):
+            inner = None
+            if v in dummy:
+                inner = next((u for u in up[v] if u in dummy), None)
+            k1 = pos[inner] if inner is not None else len(prev_layer)
+
+            if inner is not None or v == last:
+                for scan_node in layer[scan_pos : i + 1]:
+                    for u in up[scan_node]:
+                        if (pos[u] < k0 or k1 < pos[u]) and not (
+                            u in dummy and scan_node in dummy
+                        ):
+                            conflicts.add(frozenset((u, scan_node)))
+                scan_pos = i + 1
+                k0 = k1
+
+    return conflicts
+
+
+def _vertical_alignment(layers, conflicts, neighbors):
+    """各ノードを中央値の隣接ノードとブロックに整列させる"""
+    root = {}
+    align = {}
+    pos = {}
+    for layer in layers:
+        for i, v in enumerate(layer):
+            root[v] = v
+            align[v] = v
+            pos[v] = i
+
+    for layer in layers:
+        prev_idx = -1
+        for v in layer:
+            ws = sorted(neighbors[v], key=pos.__getitem__)
+            if not ws:
+                continue
+            d = len(ws)
+            for m in sorted({(d - 1) // 2, d // 2}):
+                w = ws[m]
+                if (
+                    align[v] == v
+                    and prev_idx < pos[w]
+                    and frozenset((v, w)) not in conflicts
+                ):
+                    align[w] = v
+                    align[v] = root[v] = root[w]
+                    prev_idx = pos[w]
+
+    return root, align
+
+
+def _horizontal_compaction(layers, root, spacing):
+    """ブロックグラフ上の最長路でブロックを詰めて配置する"""
+    succ = defaultdict(dict)
+    indeg = defaultdict(int)
+    blocks = set(root.values())
+
+    for layer in layers:
+        for u, v in zip(layer, layer[1:]):
+            ru, rv = root[u], root[v]
+            if rv not in succ[ru]:
+                succ[ru][rv] = spacing
+                indeg[rv] += 1
+
+    # ブロックグラフのトポロジカル順序
+    queue = deque(b for b in blocks if indeg[b] == 0)
+    topo = []
+    while queue:
+        b = queue.popleft()
+        topo.append(b)
+        for s in succ[b]:
+            indeg[s] -= 1
+            if indeg[s] == 0:
+                queue.append(s)
+
+    # 1回目: 左に詰める
+    xs = {b: 0.0 for b in blocks}
+    for b in topo:
+        for s, sep in succ[b].items():
+            xs[s] = max(xs[s], xs[b] + sep)
+
+    # 2回目: 右側のブロックに向かって引き寄せる
+    for b in reversed(topo):
+        if succ[b]:
+            xs[b] = max(xs[b], min(xs[s] - sep for s, sep in succ[b].items()))
+
+    return {v: xs[r] for v, r in root.items()}
+
+
+def assign_coordinates(L, A, dummy=None, torus=False, spacing=1.0):
+    """
+    Brandes–Köpf法で各ノードの座標を求める
+
+    Args:
+        L: レイヤー集合 dict[int: list[int]]（リストの順が層内の順序）
+        A: エッジ集合 list[tuple(int, int)]
+        dummy: ダミーノードの集合 set[int] (デフォルト: なし)
+        torus: Trueのとき階層が減少する辺をトーラスの継ぎ目を通る辺として
+            整列の対象から外す (デフォルト: False)
+        spacing: 同じ層で隣り合うノードの最小間隔 (デフォルト: 1.0)
+
+    Returns:
+        pos: 各ノードの座標 dict[int: tuple(float, float)]
+            (階層, 層内方向の座標) で、draw / draw_torus の pos に渡せる
+    """
+    dummy = set(dummy or ())
+    keys = sorted(L)
+    layers = [list(L[k]) for k in keys]
+    rank = {v: r for r, layer in enumerate(layers) for v in layer}
+
+    # 隣接する層の間のエッジのみを整列に使う
+    up = defaultdict(list)
+    down = defaultdict(list)
+    for u, v in dict.fromkeys(A):
+        ru, rv = rank.get(u), rank.get(v)
+        if ru is None or rv is None:
+            continue
+        if rv == ru + 1:
+            up[v].append(u)
+            down[u].append(v)
+        elif ru == rv + 1 and not torus:
+            up[u].append(v)
+            down[v].append(u)
+
+    conflicts = _find_type1_conflicts(layers, up, dummy)
+
+    # 上下 × 左右の4通りの割当
+    xss = []
+    for vertical in ("up", "down"):
+        v_layers = layers if vertical == "up" else layers[::-1]
+        neighbors = up if vertical == "up" else down
+        for horizontal in ("left", "right"):
+            h_layers = (
+                v_layers if horizontal == "left" else [l[::-1] for l in v_layers]
+            )
+            root, _ = _vertical_alignment(h_layers, conflicts, neighbors)
+            xs = _horizontal_compaction(h_layers, root, spacing)
+            if horizontal == "right":
+                xs = {v: -x for v, x in xs.items()}
+            xss.append((horizontal, xs))
+
+    if not rank:
+        return {}
+
+    # 幅が最小の割当に揃える
+    def width(xs):
+        return max(xs.values()) - min(xs.values())
+
+    smallest = min((xs for _, xs in xss), key=width)
+    lo, hi = min(smallest.values()), max(smallest.values())
+    aligned = []
+    for horizontal, xs in xss:
+        if horizontal == "left":
+            delta = lo - min(xs.values())
+        else:
+            delta = hi - max(xs.values())
+        aligned.append({v: x + delta for v, x in xs.items()})
+
+    # 4つの座標の中央2つの平均
+    coord = {}
+    for v in rank:
+        values = sorted(xs[v] for xs in aligned)
+        coord[v] = (values[1] + values[2]) / 2
+
+    base = min(coord.values())
+    return {v: (float(keys[rank[v]]), coord[v] - base) for v in rank}
@@ -0,0 +1,230 @@
+"""
+ベンチマーク用グラフのコーパスをディスク上に構築・読み込みする関数
+
+generate_torus_graph の各生成関数で作ったグラフを、生成パラメータとシードから
+求めたキーをファイル名として保存する。同じパラメータのグラフは一度だけ生成され、
+以降の実行や別のワーカーからはファイルを読み込んで再利用する。
+
+ファイル形式 (root/<family>_<key>.*):
+    .edges: エッジの始点・終点を交互に並べた int32 (リトルエンディアン) の配列
+    .json: メタデータ {"family", "seed", "params", "n", "m", "version"}
+    .json は .edges の書き込みが終わってから置くので、.json があれば読み込める
+    キーには CORPUS_VERSION を含めるので、生成関数や形式を変えたときに
+    CORPUS_VERSION を上げれば、古いコーパスは読まずに生成し直す
+
+使用例:
+    from corpus import build_corpus, get_graph
+
+    build_corpus("./corpus", sizes=(10, 50), densities=(0.1, 0.3), seeds=(0, 1))
+    V, A = get_graph("./corpus", "dag", seed=0, n=50, edge_prob=0.1)
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from generate_torus_graph import (
+    generate_random_connected_graph,
+    generate_dag,
+    generate_cyclic_graph,
+    generate_mixed_graph,
+)
+
+# 生成関数・ファイル形式の版（変えたら上げる）
+CORPUS_VERSION = 1
+
+# グラフの種類と生成関数
+FAMILIES = {
+    "random_connected": generate_random_connected_graph,
+    "dag": generate_dag,
+    "cyclic": generate_cyclic_graph,
+    "mixed": generate_mixed_graph,
+}
+
+
+def corpus_key(family, seed, **params):
+    """生成パラメータ・シード・コーパスの版から決まるキー"""
+    text = json.dumps(
+        {
+            "family": family,
+            "seed": seed,
+            "params": params,
+            "version": CORPUS_VERSION,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _paths(root, family, seed, params):
+    base = os.path.join(root, f"{family}_{corpus_key(family, seed, **params)}")
+    return base + ".edges", base + ".json"
+
+
+def _write_atomic(path, data):
+    """一時ファイルに書いてから置き換える（並行して書き込んでも壊れない）"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def save_graph(root, family, seed, params, V, A):
+    """
+    グラフをコーパスに保存
+
+    Returns:
+        meta: 保存したメタデータ dict
+    """
+    os.makedirs(root, exist_ok=True)
+    edges_path, meta_path = _paths(root, family, seed, params)
+
+    edges = array("i")
+    for u, v in A:
+        edges.append(u)
+        edges.append(v)
+    if sys.byteorder == "big":
+        edges.byteswap()
+
+    meta = {
+        "family": family,
+        "seed": seed,
+        "params": params,
+        "n": len(V),
+        "m": len(A),
+        "version": CORPUS_VERSION,
+    }
+    _write_atomic(edges_path, edges.tobytes())
+    _write_atomic(meta_path, json.dumps(meta, sort_keys=True).encode("utf-8"))
+    return meta
+
+
+@contextmanager
+def load_edges(root, family, seed, **params):
+    """
+    保存されたエッジ配列をメモリマップで読み込む
+
+    with ブロックを抜けるとメモリマップを閉じるので、edges はブロックの中でだけ使う。
+
+        with load_edges(root, "dag", seed=0, n=50, edge_prob=0.1) as (meta, edges):
+            A = list(zip(edges[0::2], edges[1::2]))
+
+    Yields:
+        meta: メタデータ dict（グラフが未生成なら None）
+        edges: 始点・終点を交互に並べた int32 の配列 memoryview（コピーしない）
+    """
+    edges_path, meta_path = _paths(root, family, seed, params)
+    if not os.path.exists(meta_path):
+        yield None, None
+        return
+
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta["m"] == 0:
+        yield meta, memoryview(array("i"))
+        return
+
+    with open(edges_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mm)
+    edges = view.cast("i")
+    try:
+        if sys.byteorder == "big":
+            # ビッグエンディアン環境ではコピーしてバイト順を入れ替える
+            swapped = array("i", edges)
+            swapped.byteswap()
+            yield meta, memoryview(swapped)
+        else:
+            yield meta, edges
+    finally:
+        # memoryview を解放してからでないとメモリマップを閉じられない
+        edges.release()
+        view.release()
+        mm.close()
+
+
+def get_graph(root, family, seed, **params):
+    """
+    コーパスからグラフを取得（未生成なら生成して保存）
+
+    Args:
+        root: コーパスのディレクトリ
+        family: グラフの種類 "random_connected" / "dag" / "cyclic" / "mixed"
+        seed: 乱数シード
+        **params: 生成関数の引数（n, edge_prob など）
+
+    Returns:
+        V: ノード集合 list[int]
+        A: エッジ集合 list[tuple(int, int)]
+    """
+    with load_edges(root, family, seed, **params) as (meta, edges):
+        if meta is not None:
+            V = list(range(meta["n"]))
+            A = list(zip(edges[0::2], edges[1::2]))
+            return V, A
+
+    V, A = FAMILIES[family](seed=seed, **params)
+    save_graph(root, family, seed, params, V, A)
+    return V, A
+
+
+def _build_one(job):
+    root, family, seed, params = job
+    edges_path, meta_path = _paths(root, family, seed, params)
+    if not os.path.exists(meta_path):
+        V, A = FAMILIES[family](seed=seed, **params)
+        save_graph(root, family, seed, params, V, A)
+    return family, seed, params
+
+
+def build_corpus(
+    root,
+    families=tuple(FAMILIES),
+    sizes=(10, 50, 100),
+    densities=(0.05, 0.1, 0.3),
+    seeds=(0, 1, 2),
+    processes=None,
+):
+    """
+    グラフの種類 × ノード数 × エッジ密度 × シードの格子でコーパスを構築
+
+    既に保存されているグラフは生成し直さない。
+
+    Args:
+        root: コーパスのディレクトリ
+        families: グラフの種類のリスト (デフォルト: すべて)
+        sizes: ノード数のリスト
+        densities: エッジの生成確率 edge_prob のリスト
+        seeds: 乱数シードのリスト
+        processes: 並列に生成するプロセス数 (デフォルト: 1プロセスで逐次生成)
+
+    Returns:
+        entries: 構築した (family, seed, params) のリスト
+    """
+    os.makedirs(root, exist_ok=True)
+    jobs = [
+        (root, family, seed, {"n": n, "edge_prob": p})
+        for family in families
+        for n in sizes
+        for p in densities
+        for seed in seeds
+    ]
+
+    if processes is None or processes <= 1:
+        return [_build_one(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_build_one, jobs))
@@ -1,19 +1,45 @@
 """
 gurobipyの環境を作成する関数
+
+keep_gurobi_env() を呼んだプロセスでは、作成した環境を使い回す
+（常駐するワーカーで、求解のたびにライセンスの確認をしないようにする）。
 """
 
 import os
-from dotenv import load_dotenv
-import gurobipy as gp
+
+# keep_gurobi_env() 後に使い回す環境 dict[verbose: Env]（None なら使い回さない）
+_shared_envs = None
+
+
+def keep_gurobi_env():
+    """このプロセスで作成した環境を、以降の create_gurobi_env() で使い回す"""
+    global _shared_envs
+    if _shared_envs is None:
+        _shared_envs = {}
 
 
-def create_gurobi_env():
+def create_gurobi_env(verbose=True):
+    """
+    Args:
+        verbose: False のとき Gurobi のログを出力しない (デフォルト: True)
+    """
+    if _shared_envs is not None and verbose in _shared_envs:
+        return _shared_envs[verbose]
+
+    import gurobipy as gp
+    from dotenv import load_dotenv
+
     load_dotenv()
 
-    return gp.Env(
-        params={
-            "WLSACCESSID": os.getenv("GRB_WLSACCESSID"),
-            "WLSSECRET": os.getenv("GRB_WLSSECRET"),
-            "LICENSEID": int(os.getenv("GRB_LICENSEID")),
-        }
-    )
+    params = {
+        "WLSACCESSID": os.getenv("GRB_WLSACCESSID"),
+        "WLSSECRET": os.getenv("GRB_WLSSECRET"),
+        "LICENSEID": int(os.getenv("GRB_LICENSEID")),
+    }
+    if not verbose:
+        params["OutputFlag"] = 0
+
+    env = gp.Env(params=params)
+    if _shared_envs is not None:
+        _shared_envs[verbose] = env
+    return env
@@ -0,0 +1,216 @@
+"""
+弱連結成分ごとに解いてレイアウトをまとめる関数
+
+torus() や階層割当の定式化は、すべての成分を1つのモデルに入れるため、
+関係のない成分同士が L_max と分枝限定法の探索木を通して結びついてしまう。
+入力を弱連結成分に分け、成分ごとにプロセスを分けて並列に解き、1つのレイアウトにまとめる。
+
+まとめ方:
+    side: すべての成分が階層 0 から始まる。同じ階層のノードは成分の順に並べる
+        （トーラスの継ぎ目を共有するので torus() の結果にも使える）
+    stack: 成分ごとに階層をずらして、前の成分の最大階層の次から始める
+        （トーラス辺が他の成分をまたぐので、階層割当の定式化の結果向け）
+
+成分ごとの最適解を並べたものなので、L_max を共有する元のモデルの最適解と
+一致するとは限らない（各成分の目的関数の和については最適）。
+
+使用例:
+    from decompose import solve_by_components
+
+    y_val, t_val, L = solve_by_components(V, A, solver="torus", processes=4)
+"""
+
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from generate_torus_graph import component_labels
+
+FORMULATIONS = ("pg", "pg2", "pq", "pl")
+
+
+def split_components(V, A, w=None, lam=None):
+    """
+    弱連結成分ごとの部分グラフに分ける
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+        w: エッジ重み dict (デフォルト: すべて1)
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+
+    Returns:
+        components: 成分ごとの (V, A, w, lam) のリスト（ノード数の多い順）
+    """
+    label, count = component_labels(V, A)
+
+    nodes = [[] for _ in range(count)]
+    for v in V:
+        nodes[label[v]].append(v)
+
+    edges = [[] for _ in range(count)]
+    for e in dict.fromkeys(A):
+        edges[label[e[0]]].append(e)
+
+    components = []
+    for V_i, A_i in zip(nodes, edges):
+        w_i = {e: (1 if w is None else w[e]) for e in A_i}
+        lam_i = {e: (1 if lam is None else lam[e]) for e in A_i}
+        components.append((V_i, A_i, w_i, lam_i))
+
+    components.sort(key=lambda c: (len(c[0]), len(c[1])), reverse=True)
+    return components
+
+
+def _layers(y_val, V):
+    L = defaultdict(list)
+    for v in V:
+        L[y_val[v]].append(v)
+    return L
+
+
+def solve_component(job):
+    """
+    1つの成分を解く（プロセスプールのワーカーで実行する）
+
+    Args:
+        job: (solver, V, A, w, lam, params)
+            solver は "torus"、定式化の名前 (pg / pg2 / pq / pl)、"longest" のいずれか
+
+    Returns:
+        y_val: 各ノードの階層 dict
+        t_val: 各エッジがトーラス辺か dict
+        L: レイヤー集合 dict[int: list]
+    """
+    solver, V, A, w, lam, params = job
+
+    # エッジのない成分（孤立点）は解くまでもない
+    if not A:
+        y_val = {v: 0 for v in V}
+        return y_val, {}, _layers(y_val, V)
+
+    if solver == "torus":
+        from torus import torus
+
+        return torus(V, A, w, lam, **params)
+
+    if solver != "longest" and solver not in FORMULATIONS:
+        raise ValueError(f"未知の解法: {solver}")
+
+    from pipeline import _layering
+
+    stats = params.get("stats")
+    verbose = params.get("verbose", True)
+    if solver == "longest":
+        y_val = _layering(solver, V, A, w, lam, stats, verbose)
+    else:
+        # 定式化の longest_path() はノードが 1..n であることを前提にしているので、
+        # 成分のノードに番号を付け直して解く
+        index = {v: i + 1 for i, v in enumerate(V)}
+        A_i = [(index[u], index[v]) for u, v in A]
+        w_i = {(index[u], index[v]): w[(u, v)] for u, v in A}
+        lam_i = {(index[u], index[v]): lam[(u, v)] for u, v in A}
+        val = _layering(solver, list(index.values()), A_i, w_i, lam_i, stats, verbose)
+        y_val = {v: val[index[v]] for v in V} if val else {}
+
+    if not y_val:
+        return {}, {}, defaultdict(list)
+    return y_val, {e: False for e in A}, _layers(y_val, V)
+
+
+def solve_jobs(jobs, processes=None, func=solve_component):
+    """
+    solve_component() のジョブをまとめて解く
+
+    Args:
+        jobs: solve_component() のジョブのリスト
+        processes: 並列に解くプロセス数 (デフォルト: 1プロセスで逐次)
+        func: 各ジョブを解く関数（モジュールの最上位で定義したもの）
+            (デフォルト: solve_component)
+
+    Returns:
+        layouts: ジョブごとの func の結果のリスト（ジョブと同じ順）
+    """
+    if processes is None or processes <= 1 or len(jobs) <= 1:
+        return [func(job) for job in jobs]
+
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(jobs)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        return list(executor.map(func, jobs))
+
+
+def pack_layouts(layouts, mode="side"):
+    """
+    成分ごとのレイアウトを1つにまとめる
+
+    Args:
+        layouts: 成分ごとの (y_val, t_val, L) のリスト
+        mode: "side"（階層を共有して並べる）または "stack"（階層をずらして重ねる）
+
+    Returns:
+        y_val: 各ノードの階層 dict
+        t_val: 各エッジがトーラス辺か dict
+        L: レイヤー集合 dict[int: list]（同じ階層では成分の順に並ぶ）
+    """
+    if mode not in ("side", "stack"):
+        raise ValueError(f"未知のまとめ方: {mode}")
+
+    y_val = {}
+    t_val = {}
+    L = defaultdict(list)
+    offset = 0
+
+    for y_i, t_i, L_i in layouts:
+        if not y_i:
+            continue
+        low = min(y_i.values()) if mode == "stack" else 0
+        shift = offset - low
+
+        for v, k in y_i.items():
+            y_val[v] = k + shift
+        t_val.update(t_i)
+        for k in sorted(L_i):
+            L[k + shift].extend(L_i[k])
+
+        if mode == "stack":
+            offset += max(y_i.values()) - low + 1
+
+    return y_val, t_val, L
+
+
+def solve_by_components(
+    V,
+    A,
+    w=None,
+    lam=None,
+    solver="torus",
+    mode="side",
+    processes=None,
+    **params,
+):
+    """
+    弱連結成分ごとに解いて1つのレイアウトにまとめる
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+        w: エッジ重み dict (デフォルト: すべて1)
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+        solver: "torus"、定式化の名前 (pg / pg2 / pq / pl)、"longest" のいずれか
+        mode: まとめ方 "side" / "stack"
+        processes: 並列に解くプロセス数 (デフォルト: 1プロセスで逐次)
+        **params: 解法に渡すその他の引数（torus の alpha など）
+
+    Returns:
+        y_val: 各ノードの階層 dict
+        t_val: 各エッジがトーラス辺か dict
+        L: レイヤー集合 dict[int: list]
+    """
+    components = split_components(V, A, w, lam)
+    jobs = [(solver, *component, params) for component in components]
+
+    # ノード数の多い成分から投入するので、全体の時間は最大の成分の時間に近づく
+    layouts = solve_jobs(jobs, processes)
+    return pack_layouts(layouts, mode)
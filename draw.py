@@ -1,22 +1,32 @@
-import networkx as nx
-import matplotlib.pyplot as plt
 from collections import defaultdict
 
 
-def draw(V, A, x_val, label, node_order=None):
+def layers_from_x(x_val, node_order=None):
+    """階層割当 x_val から、層内の順序に並べたレイヤー集合 dict[layer: nodes[]] を作る"""
     layers = defaultdict(list)
 
     for v, x in x_val.items():
         layers[x].append(v)
 
-    pos = {}
     for x, nodes in layers.items():
         if node_order:
-            sorted_nodes = sorted(nodes, key=lambda v: node_order.get(v, float("inf")))
+            nodes.sort(key=lambda v: node_order.get(v, float("inf")))
         else:
-            sorted_nodes = sorted(nodes)
-        for i, v in enumerate(sorted_nodes):
-            pos[v] = (x, i)
+            nodes.sort()
+
+    return layers
+
+
+def draw(V, A, x_val, label, node_order=None, pos=None, path=None):
+    import networkx as nx
+    import matplotlib.pyplot as plt
+
+    # pos が与えられた場合（coordinates.assign_coordinates の結果など）はそれを使う
+    if pos is None:
+        pos = {}
+        for x, nodes in layers_from_x(x_val, node_order).items():
+            for i, v in enumerate(nodes):
+                pos[v] = (x, i)
 
     G = nx.DiGraph()
     G.add_nodes_from(V)
@@ -28,5 +38,10 @@ def draw(V, A, x_val, label, node_order=None):
     )
 
     plt.gca().invert_yaxis()
-    plt.show()
-    # fig.savefig(f"./fig/{label}")
+
+    # path が与えられた場合は表示せずにファイルへ保存
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
+        plt.close(fig)
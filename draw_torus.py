@@ -5,23 +5,36 @@ Args:
     V: ノード集合 int[]
     A: エッジ集合 [int, int][]
     L: レイヤー集合 dict(layer: node[])
+    pos: ノードの座標 dict(node: (x, y))（省略時は (レイヤー, 添字)）
+    path: 保存先（省略時はウィンドウに表示）
+
+draw_torus はウィンドウに表示し、render_torus はファイルに書き出す。
+render_torus はノード・エッジ・継ぎ目の線分をそれぞれ1つのコレクションにまとめ、
+pyplot を使わずに描画するので、ディスプレイのない環境でも大量に描画できる。
+NumPy・matplotlib・networkx は描画する関数を呼んだときに読み込む。
 """
 
-import networkx as nx
-import matplotlib.pyplot as plt
-from matplotlib.patches import FancyArrowPatch
+from torus_geometry import index_positions, seam_boundary_y
 
+# render_torus の図の一辺の最大サイズ（インチ）
+MAX_FIGSIZE = 40
 
-def draw_torus(V, A, L):
-    # ノードの位置を決定
-    pos = {}
+# render_torus のノード半径と鏃の大きさ（座標単位）
+NODE_RADIUS = 0.15
+ARROW_LENGTH = 0.08
+ARROW_WIDTH = 0.03
 
-    # Lを使って各ノードの座標を設定
-    for layer_num, nodes in L.items():
-        for idx, node in enumerate(nodes):
-            # x座標：レイヤーの値
-            # y座標：各レイヤーの配列の添字
-            pos[node] = (layer_num, idx)
+
+def draw_torus(V, A, L, pos=None, path=None):
+    import networkx as nx
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import FancyArrowPatch
+
+    # ノードの位置を決定
+    if pos is None:
+        # x座標：レイヤーの値
+        # y座標：各レイヤーの配列の添字
+        pos = index_positions(L)
 
     # 各ノードがどのレイヤーに属するかを記録
     node_to_layer = {}
@@ -31,11 +44,13 @@ def draw_torus(V, A, L):
 
     # 描画域のサイズを計算
     num_layers = len(L)
-    max_layer_size = max(len(nodes) for nodes in L.values()) if L else 0
+    min_y = min((y for _, y in pos.values()), default=0)
+    max_y = max((y for _, y in pos.values()), default=-1)
 
-    # 描画域のサイズは、(レイヤーの数+1) * (最大のレイヤーの要素数+1)
+    # 描画域のサイズは、(レイヤーの数+1) * (y座標の幅+2)
+    # 添字で配置した場合は (最大のレイヤーの要素数+1) になる
     width = num_layers + 1
-    height = max_layer_size + 1
+    height = max_y - min_y + 2
 
     # レイヤーの最小値と最大値を取得
     min_layer = min(L.keys()) if L else 0
@@ -62,7 +77,7 @@ def draw_torus(V, A, L):
     # 左端のノードは描画域の左端から0.5だけ離して描画
     # 右端のノードは描画域の右端から0.5だけ離して描画
     ax.set_xlim(-0.5, num_layers - 0.5)
-    ax.set_ylim(-0.5, max_layer_size - 0.5)
+    ax.set_ylim(min_y - 0.5, max_y + 0.5)
 
     # グラフを作成（通常エッジのみ）
     G = nx.DiGraph()
@@ -97,16 +112,8 @@ def draw_torus(V, A, L):
         u_pos = pos[u]
         v_pos = pos[v]
 
-        # トーラス経由の x 方向の総距離
-        dist_to_right = max_layer + 0.5 - u_pos[0]
-        dist_from_left = v_pos[0] - (min_layer - 0.5)
-        total_x_dist = dist_to_right + dist_from_left
-
-        # 傾きを一定に保つ（y の変化 / x の変化）
-        slope = (v_pos[1] - u_pos[1]) / total_x_dist
-
         # トーラス境界での高さ（右端と左端で同じ）
-        boundary_y = u_pos[1] + slope * dist_to_right
+        boundary_y = seam_boundary_y(u_pos, v_pos, min_layer, max_layer)
 
         # u から右端の境界点へ（鏃なし）
         arrow1 = FancyArrowPatch(
@@ -131,4 +138,159 @@ def draw_torus(V, A, L):
     ax.invert_yaxis()
 
     plt.tight_layout()
-    plt.show()
+
+    # path が与えられた場合は表示せずにファイルへ保存
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
+        plt.close(fig)
+
+
+def torus_segments(pos, A, L):
+    """
+    エッジを線分の配列に変換（継ぎ目の計算をまとめてNumPyで行う）
+
+    逆方向エッジは torus_geometry.split_seam_edge と同じく、傾きを一定に保って
+    右端の境界へ向かう線分と左端の境界から出る線分に分割する。
+
+    Args:
+        pos: ノードの座標 dict(node: (x, y))
+        A: エッジ集合 [int, int][]
+        L: レイヤー集合 dict(layer: node[])
+
+    Returns:
+        normal: 通常エッジの線分 ndarray(m, 2, 2)
+        seam_out: 逆方向エッジの始点から右端の境界への線分 ndarray(r, 2, 2)
+        seam_in: 左端の境界から逆方向エッジの終点への線分 ndarray(r, 2, 2)
+    """
+    import numpy as np
+
+    node_to_layer = {node: layer_num for layer_num, nodes in L.items() for node in nodes}
+    min_layer = min(L.keys()) if L else 0
+    max_layer = max(L.keys()) if L else 0
+
+    edges = [(u, v) for u, v in A if u in node_to_layer and v in node_to_layer]
+    src = np.array([pos[u] for u, _ in edges], dtype=float).reshape(-1, 2)
+    dst = np.array([pos[v] for _, v in edges], dtype=float).reshape(-1, 2)
+    is_normal = np.array(
+        [node_to_layer[u] < node_to_layer[v] for u, v in edges], dtype=bool
+    )
+
+    normal = np.stack([src[is_normal], dst[is_normal]], axis=1)
+
+    u_pos = src[~is_normal]
+    v_pos = dst[~is_normal]
+
+    # トーラス経由の x 方向の総距離と、傾きを一定に保ったときの境界での高さ
+    dist_to_right = max_layer + 0.5 - u_pos[:, 0]
+    dist_from_left = v_pos[:, 0] - (min_layer - 0.5)
+    slope = (v_pos[:, 1] - u_pos[:, 1]) / (dist_to_right + dist_from_left)
+    boundary_y = u_pos[:, 1] + slope * dist_to_right
+
+    right = np.column_stack([np.full(len(u_pos), max_layer + 0.5), boundary_y])
+    left = np.column_stack([np.full(len(v_pos), min_layer - 0.5), boundary_y])
+
+    return normal, np.stack([u_pos, right], axis=1), np.stack([left, v_pos], axis=1)
+
+
+def _shrink(segments, start, end):
+    """線分の始点・終点をノード半径だけ縮める"""
+    import numpy as np
+
+    if len(segments) == 0:
+        return segments
+    p, q = segments[:, 0], segments[:, 1]
+    d = q - p
+    length = np.linalg.norm(d, axis=1, keepdims=True)
+    unit = np.divide(d, length, out=np.zeros_like(d), where=length > 0)
+    return np.stack([p + unit * start, q - unit * end], axis=1)
+
+
+def _arrowheads(segments):
+    """線分の終点に置く鏃の三角形 ndarray(m, 3, 2)"""
+    import numpy as np
+
+    p, q = segments[:, 0], segments[:, 1]
+    d = q - p
+    length = np.linalg.norm(d, axis=1, keepdims=True)
+    unit = np.divide(d, length, out=np.zeros_like(d), where=length > 0)
+    normal = unit[:, ::-1] * np.array([-1.0, 1.0])
+    base = q - unit * ARROW_LENGTH
+    return np.stack(
+        [q, base + normal * ARROW_WIDTH, base - normal * ARROW_WIDTH], axis=1
+    )
+
+
+def render_torus(V, A, L, path, pos=None, with_labels=False, fig=None, dpi=100):
+    """
+    トーラスを描画してファイルに書き出す
+
+    出力形式は path の拡張子（png / svg / pdf など）で決まる。
+
+    Args:
+        V: ノード集合 int[]
+        A: エッジ集合 [int, int][]
+        L: レイヤー集合 dict(layer: node[])
+        path: 出力先のパスまたはファイルオブジェクト
+        pos: ノードの座標 dict(node: (x, y))（省略時は (レイヤー, 添字)）
+        with_labels: ノードのラベルを描画するか (デフォルト: False)
+        fig: 使い回す Figure（省略時は新しく作る）
+        dpi: ラスター形式の解像度 (デフォルト: 100)
+
+    Returns:
+        fig: 描画に使った Figure
+    """
+    import numpy as np
+    from matplotlib.collections import LineCollection, PolyCollection
+    from matplotlib.figure import Figure
+
+    if pos is None:
+        pos = index_positions(L)
+
+    nodes = [v for v in V if v in pos]
+    xy = np.array([pos[v] for v in nodes], dtype=float).reshape(-1, 2)
+
+    num_layers = len(L)
+    min_y = xy[:, 1].min() if len(xy) else 0
+    max_y = xy[:, 1].max() if len(xy) else -1
+    figsize = (
+        min((num_layers + 1) * 2, MAX_FIGSIZE),
+        min((max_y - min_y + 2) * 2, MAX_FIGSIZE),
+    )
+
+    if fig is None:
+        fig = Figure(figsize=figsize)
+    else:
+        fig.clear()
+        fig.set_size_inches(figsize)
+    ax = fig.add_subplot()
+
+    ax.set_xlim(-0.5, num_layers - 0.5)
+    ax.set_ylim(min_y - 0.5, max_y + 0.5)
+
+    normal, seam_out, seam_in = torus_segments(pos, A, L)
+    normal = _shrink(normal, NODE_RADIUS, NODE_RADIUS)
+    seam_out = _shrink(seam_out, NODE_RADIUS, 0.0)
+    seam_in = _shrink(seam_in, 0.0, NODE_RADIUS)
+
+    # 通常エッジと継ぎ目の線分を1つの LineCollection にまとめる
+    lines = np.concatenate([normal, seam_out, seam_in])
+    ax.add_collection(LineCollection(lines, colors="black", linewidths=1))
+
+    heads = _arrowheads(np.concatenate([normal, seam_in]))
+    ax.add_collection(PolyCollection(heads, facecolors="black", edgecolors="none"))
+
+    # ノードは1つの PathCollection にまとめる
+    ax.scatter(xy[:, 0], xy[:, 1], s=500, c="lightblue", zorder=2)
+
+    if with_labels:
+        for v, (x, y) in zip(nodes, xy):
+            ax.text(x, y, str(v), fontsize=10, ha="center", va="center", zorder=3)
+
+    # y軸を反転（上から下に描画）
+    ax.invert_yaxis()
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    return fig
@@ -0,0 +1,96 @@
+"""
+長いエッジにダミーノードを挿入する関数
+
+階層割当の結果で2層以上にまたがるエッジを、隣接する層の間のエッジの列に分割する。
+トーラスの場合、階層が減少するエッジ（トーラス辺）は最大層から最小層へ継ぎ目を通って
+一周するように分割する。
+
+使用例:
+    from dummy_nodes import insert_dummy_nodes
+
+    V2, A2, layer2, dummy, chains = insert_dummy_nodes(V, A, x_val)
+    order = intersection_reduction(*layered_edges(V2, A2, layer2), w)
+"""
+
+from collections import defaultdict
+
+
+def insert_dummy_nodes(V, A, layer, torus=False, num_layers=None):
+    """
+    長いエッジをダミーノードの列に分割
+
+    Args:
+        V: ノード集合 list[int]
+        A: エッジ集合 list[tuple(int, int)]
+        layer: 各ノードの階層 dict[int: int]
+        torus: Trueのとき階層が減少しない辺を継ぎ目を通る辺として分割 (デフォルト: False)
+        num_layers: トーラスの層の数 (デフォルト: 最大の階層 + 1)
+
+    Returns:
+        V: ダミーノードを加えたノード集合 list[int]
+        A: 分割後のエッジ集合 list[tuple(int, int)]
+        layer: ダミーノードを加えた各ノードの階層 dict[int: int]
+        dummy: ダミーノードの集合 set[int]
+        chains: 元のエッジから、分割後に通るノードの列への対応 dict[(int,int): list[int]]
+    """
+    V_out = list(V)
+    layer_out = dict(layer)
+    A_out = []
+    dummy = set()
+    chains = {}
+
+    if num_layers is None:
+        num_layers = max(layer.values(), default=-1) + 1
+    next_id = max(V, default=-1) + 1
+
+    for u, v in A:
+        a = layer[u]
+        b = layer[v]
+
+        # 通るべき中間の層
+        if torus and b <= a:
+            between = list(range(a + 1, num_layers)) + list(range(0, b))
+        elif b >= a:
+            between = list(range(a + 1, b))
+        else:
+            between = list(range(a - 1, b, -1))
+
+        path = [u]
+        for k in between:
+            d = next_id
+            next_id += 1
+            V_out.append(d)
+            layer_out[d] = k
+            dummy.add(d)
+            path.append(d)
+        path.append(v)
+
+        for p, q in zip(path, path[1:]):
+            A_out.append((p, q))
+        chains[(u, v)] = path
+
+    return V_out, A_out, layer_out, dummy, chains
+
+
+def layered_edges(V, A, layer):
+    """
+    intersection_reduction の入力 (V_layers, E_layers) を作る
+
+    隣接する層の間のエッジだけを、下の層から上の層への向きで E_layers に入れる。
+
+    Returns:
+        V_layers: 各層のノード dict[int: list[int]]
+        E_layers: 層kから層k+1へのエッジ dict[int: list[tuple(int, int)]]
+    """
+    V_layers = defaultdict(list)
+    for v in V:
+        V_layers[layer[v]].append(v)
+
+    E_layers = defaultdict(list)
+    for u, v in A:
+        if layer[v] == layer[u] + 1:
+            E_layers[layer[u]].append((u, v))
+        elif layer[u] == layer[v] + 1:
+            E_layers[layer[v]].append((v, u))
+
+    return V_layers, E_layers
@@ -0,0 +1,127 @@
+"""
+多数のレイアウトを画像ファイルにまとめて書き出す関数
+
+各レイアウトをプロセスプールで並列に描画する。
+ワーカーは非対話バックエンド (Agg) を使い、Figure を1つだけ作って使い回す。
+一定数のレイアウトを描画したワーカーは作り直されるので、メモリ使用量が増え続けない。
+
+使用例:
+    from export import export_layouts
+
+    paths = export_layouts([(V1, A1, L1), (V2, A2, L2)], "./fig", fmt="svg")
+"""
+
+import multiprocessing
+import numbers
+import os
+
+# ワーカーごとに使い回す Figure
+_figure = None
+
+
+def _init_worker():
+    """ワーカーの初期化（非対話バックエンドの選択と Figure の作成）"""
+    global _figure
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    from matplotlib.figure import Figure
+
+    _figure = Figure()
+
+
+def _as_layers(layout):
+    """レイアウトを (レイヤー集合, 座標) に変換"""
+    from draw import layers_from_x
+
+    if isinstance(layout, tuple):
+        L, pos = layout
+    else:
+        L, pos = layout, None
+
+    # 階層割当 dict[node: layer] の場合はレイヤー集合に変換
+    # （レイヤー集合の値は list のほか array('i') などのこともある）
+    if L and isinstance(next(iter(L.values())), numbers.Integral):
+        L = layers_from_x(L)
+
+    return L, pos
+
+
+def _render(job):
+    """1つのレイアウトを描画して保存"""
+    from draw_torus import render_torus
+
+    (V, A, layout), path, dpi, with_labels = job
+    L, pos = _as_layers(layout)
+
+    render_torus(
+        V, A, L, path, pos=pos, with_labels=with_labels, fig=_figure, dpi=dpi
+    )
+
+    # 次のジョブまで描画要素を持ち続けないように破棄
+    _figure.clear()
+
+    return path
+
+
+def export_layouts(
+    layouts,
+    out_dir,
+    fmt="png",
+    names=None,
+    processes=None,
+    dpi=100,
+    with_labels=False,
+    tasks_per_child=50,
+):
+    """
+    レイアウトをまとめて画像ファイルに書き出す
+
+    Args:
+        layouts: (V, A, layout) のリスト
+            layout はレイヤー集合 dict[layer: nodes[]]、
+            階層割当 dict[node: layer]、または (レイヤー集合, 座標) のいずれか
+        out_dir: 出力先ディレクトリ
+        fmt: 出力形式 "png" / "svg" / "pdf" (デフォルト: "png")
+        names: 各レイアウトのファイル名（拡張子なし）のリスト
+            (デフォルト: layout_00000, layout_00001, ...)
+        processes: ワーカー数 (デフォルト: CPU数)
+        dpi: ラスター形式の解像度 (デフォルト: 100)
+        with_labels: ノードのラベルを描画するか (デフォルト: False)
+        tasks_per_child: 1つのワーカーが描画するレイアウト数の上限 (デフォルト: 50)
+
+    Returns:
+        paths: 書き出したファイルのパス list[str]（layouts と同じ順）
+
+    names と layouts の数が異なる場合は ValueError。
+    """
+    layouts = list(layouts)
+    if names is None:
+        names = [f"layout_{i:05d}" for i in range(len(layouts))]
+    names = list(names)
+    if len(names) != len(layouts):
+        raise ValueError(
+            f"names の数 ({len(names)}) が layouts の数 ({len(layouts)}) と一致しません"
+        )
+
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [
+        (layout, os.path.join(out_dir, f"{name}.{fmt}"), dpi, with_labels)
+        for layout, name in zip(layouts, names)
+    ]
+
+    if not jobs:
+        return []
+
+    workers = min(processes or os.cpu_count() or 1, len(jobs))
+
+    # 親プロセスの pyplot の状態を引き継がないように spawn で起動する
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        maxtasksperchild=tasks_per_child,
+    ) as pool:
+        return pool.map(_render, jobs, chunksize=1)
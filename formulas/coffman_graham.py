@@ -0,0 +1,106 @@
+import heapq
+import math
+from collections import defaultdict
+
+from solve_stats import start_record
+
+
+def cg(label, V, A, w, lam, V0, Vl, stats=None, verbose=True, width=None):
+    """
+    幅を制限した Coffman–Graham 法による階層割当（Gurobi を使わない）
+
+    1. ラベル付け: すべての先行ノードにラベルが付いたノードのうち、
+       先行ノードのラベルを降順に並べた列が辞書順で最小のものに 1, 2, ... を付ける
+    2. 階層割当: 下の階層から順に、すべての後続ノード s が
+       (s の階層 + lam) 以下の階層に置かれているノードを、ラベルの大きい順に
+       1つの階層に width 個まで置く
+
+    各段はヒープを使い、O((|V| + |A|) log |V|) で動く。
+    w / V0 / Vl は使わない（ほかの定式化と同じ引数で呼べるように受け取る）。
+    推移的な辺を除かないので、幅の保証は元の Coffman–Graham 法より弱い。
+
+    Args:
+        label: 記録に使う名前
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]（DAG）
+        w: エッジ重み dict（使わない）
+        lam: エッジの最小階層差 dict
+        V0, Vl: 入次数0 / 出次数0のノード（使わない）
+        stats: 計測結果を記録する SolveStats (デフォルト: 記録しない)
+        verbose: False のとき失敗時の出力を抑える (デフォルト: True)
+        width: 1つの階層に置くノード数の上限 (デフォルト: ノード数の平方根を切り上げた値)
+
+    Returns:
+        val: 各ノードの階層 dict（閉路があれば空）
+    """
+    record = start_record(stats, label)
+    if width is None:
+        width = max(1, math.ceil(math.sqrt(len(V))))
+
+    pred = defaultdict(list)
+    succ = defaultdict(list)
+    for u, v in A:
+        pred[v].append(u)
+        succ[u].append(v)
+
+    # ========== ラベル付け ==========
+
+    number = {}
+    waiting = {v: len(pred[v]) for v in V}
+    heap = [((), i, v) for i, v in enumerate(V) if waiting[v] == 0]
+    heapq.heapify(heap)
+    position = {v: i for i, v in enumerate(V)}
+    while heap:
+        _, _, v = heapq.heappop(heap)
+        number[v] = len(number) + 1
+        for x in succ[v]:
+            waiting[x] -= 1
+            if waiting[x] == 0:
+                # 先行ノードのラベルはこの時点で確定している
+                key = tuple(sorted((number[u] for u in pred[x]), reverse=True))
+                heapq.heappush(heap, (key, position[x], x))
+    record.lap("label")
+
+    if len(number) < len(V):
+        if verbose:
+            print(f"{label}: 閉路があるため階層割当できません")
+        record.finish()
+        return {}
+
+    # ========== 階層割当（下から） ==========
+
+    level = {}
+    remaining = {v: len(succ[v]) for v in V}
+    ready = [(-number[v], v) for v in V if remaining[v] == 0]
+    heapq.heapify(ready)
+    k = 0
+    while ready:
+        placed = []
+        deferred = []
+        while ready and len(placed) < width:
+            item = heapq.heappop(ready)
+            v = item[1]
+            low = max((level[s] + lam[(v, s)] for s in succ[v]), default=0)
+            if low > k:
+                deferred.append(item)
+            else:
+                level[v] = k
+                placed.append(v)
+
+        for item in deferred:
+            heapq.heappush(ready, item)
+        # この階層に置いたノードの先行ノードは、次の階層以降で置けるようになる
+        for v in placed:
+            for u in pred[v]:
+                remaining[u] -= 1
+                if remaining[u] == 0:
+                    heapq.heappush(ready, (-number[u], u))
+        k += 1
+    record.lap("layer")
+
+    top = max(level.values(), default=0)
+    val = {v: top - level[v] for v in V}
+
+    record.note(width=width, layers=top + 1)
+    record.finish()
+    return val
@@ -1,13 +1,39 @@
 import itertools
-import gurobipy as gp
-from gurobipy import GRB
+from array import array
+from collections import defaultdict
+from functools import cmp_to_key
 
 from create_gurobi_env import create_gurobi_env
-
-
-def intersection_reduction(V_layers, E_layers, w):
-    env = create_gurobi_env()
-
+from solve_stats import start_record
+
+
+def intersection_reduction(
+    V_layers, E_layers, w, return_vars=False, stats=None, verbose=True
+):
+    """
+    層内のノード順序を最適化して辺交差を削減
+
+    Args:
+        V_layers: 各層のノード dict[int: list[int]]
+        E_layers: 層kから層k+1へのエッジ dict[int: list[tuple(int, int)]]
+        w: エッジ重み dict[(int,int): float]
+        return_vars: Trueのとき x, c の値の辞書も返す (デフォルト: False)
+        stats: 計測結果を記録する SolveStats (デフォルト: 記録しない)
+        verbose: False のとき Gurobi のログを出力しない (デフォルト: True)
+
+    Returns:
+        order: 各層のノードを上から並べた配列 dict[int: array('i')]
+        x_val: (return_vars=True のときのみ) x の値 dict[(int,int): float]
+        c_val: (return_vars=True のときのみ) c の値 dict[((int,int),(int,int)): float]
+    """
+    import gurobipy as gp
+    from gurobipy import GRB
+
+    record = start_record(stats, "intersection_reduction")
+    env = create_gurobi_env(verbose)
+    record.lap("env")
+
+    order = {}
     x_val = {}
     c_val = {}
 
@@ -48,22 +74,39 @@ def intersection_reduction(V_layers, E_layers, w):
                         name=f"c5_{u1}_{v1}_{u2}_{v2}",
                     )
 
+        # K2,2（完全2部グラフ）ごとに、2組の交差のうちちょうど一方が生じる
+        # 共通近傍の交差で列挙するので、実在する K2,2 の数に比例した計算量になる
         for k, edges in E_layers.items():
-            edge_set = set(edges)
-            nodes_left = V_layers.get(k, [])
-            nodes_right = V_layers.get(k + 1, [])
-            for u1, u2 in itertools.combinations(nodes_left, 2):
-                for v1, v2 in itertools.combinations(nodes_right, 2):
-                    e_a = (u1, v1)
-                    e_b = (u1, v2)
-                    e_c = (u2, v1)
-                    e_d = (u2, v2)
-                    if (
-                        e_a in edge_set
-                        and e_b in edge_set
-                        and e_c in edge_set
-                        and e_d in edge_set
-                    ):
+            left_pos = {u: i for i, u in enumerate(V_layers.get(k, []))}
+            right_pos = {v: i for i, v in enumerate(V_layers.get(k + 1, []))}
+
+            succ = defaultdict(set)
+            pred = defaultdict(set)
+            for u, v in edges:
+                if u in left_pos and v in right_pos:
+                    succ[u].add(v)
+                    pred[v].add(u)
+
+            for u1, nbrs in succ.items():
+                if len(nbrs) < 2:
+                    continue
+
+                # u1 より後ろにある左ノードごとの共通近傍
+                common = defaultdict(list)
+                for v in nbrs:
+                    for u2 in pred[v]:
+                        if left_pos[u2] > left_pos[u1]:
+                            common[u2].append(v)
+
+                for u2, shared in common.items():
+                    if len(shared) < 2:
+                        continue
+                    shared.sort(key=right_pos.__getitem__)
+                    for v1, v2 in itertools.combinations(shared, 2):
+                        e_a = (u1, v1)
+                        e_b = (u1, v2)
+                        e_c = (u2, v1)
+                        e_d = (u2, v2)
                         key1 = (e_a, e_d) if (e_a, e_d) in c else (e_d, e_a)
                         key2 = (e_b, e_c) if (e_b, e_c) in c else (e_c, e_b)
                         if key1 in c and key2 in c:
@@ -85,9 +128,46 @@ def intersection_reduction(V_layers, E_layers, w):
         except Exception:
             pass
 
-        m.optimize()
+        record.lap("build")
+        record.model(m)
+
+        m.optimize(record.callback)
+        record.lap("solve")
+        record.result(m)
+
+        # x[(u1,u2)]=1 は u1 が u2 より上にあることを表す
+        # 推移性制約により全順序になるので、比較ソートで O(k log k) で復元できる
+        def above(u1, u2):
+            return -1 if x[(u1, u2)].X > 0.5 else 1
+
+        for k, nodes in V_layers.items():
+            order[k] = array("i", sorted(nodes, key=cmp_to_key(above)))
+
+        if return_vars:
+            x_val = {key: var.X for key, var in x.items()}
+            c_val = {key: var.X for key, var in c.items()}
+
+        record.lap("extract")
+
+    record.finish()
+
+    if return_vars:
+        return order, x_val, c_val
+    return order
+
+
+def order_to_positions(order):
+    """
+    層ごとの順序配列を draw() の node_order 形式に変換
 
-        x_val = {key: var.X for key, var in x.items()}
-        c_val = {key: var.X for key, var in c.items()}
+    Args:
+        order: 各層のノード配列 dict[int: array('i')]
 
-    return x_val, c_val
+    Returns:
+        node_order: 各ノードの層内の位置 dict[int: int]
+    """
+    node_order = {}
+    for nodes in order.values():
+        for pos, node in enumerate(nodes):
+            node_order[node] = pos
+    return node_order
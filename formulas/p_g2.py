@@ -1,13 +1,16 @@
-import gurobipy as gp
-from gurobipy import GRB
-
 from longest_path import longest_path
 
 from create_gurobi_env import create_gurobi_env
+from solve_stats import start_record
+
 
+def pg2(label, V, A, w, lam, V0, Vl, stats=None, verbose=True):
+    import gurobipy as gp
+    from gurobipy import GRB
 
-def pg2(label, V, A, w, lam, V0, Vl):
-    env = create_gurobi_env()
+    record = start_record(stats, label)
+    env = create_gurobi_env(verbose)
+    record.lap("env")
     val = {}
 
     with gp.Model(name=label, env=env) as m:
@@ -26,10 +29,18 @@ def pg2(label, V, A, w, lam, V0, Vl):
         m.setObjective(
             gp.quicksum(w[(u, v)] * (x[v] - x[u]) for (u, v) in A), GRB.MINIMIZE
         )
-        m.optimize()
+        record.lap("build")
+        record.model(m)
+
+        m.optimize(record.callback)
+        record.lap("solve")
+        record.result(m)
 
         if m.status == GRB.OPTIMAL:
             for v in V:
                 val[v] = int(x[v].X)
 
+        record.lap("extract")
+
+    record.finish()
     return val
@@ -1,24 +1,35 @@
-import gurobipy as gp
-from gurobipy import GRB
-
 from longest_path import longest_path
 
+from bounds import TOL, reached_bound, span_bounds, span_objective_bound
 from create_gurobi_env import create_gurobi_env
+from solve_stats import start_record
+
 
+def pl(label, V, A, w, lam, V0, Vl, stats=None, verbose=True):
+    import gurobipy as gp
+    from gurobipy import GRB
 
-def pl(label, V, A, w, lam, V0, Vl):
-    env = create_gurobi_env()
+    record = start_record(stats, label)
+    env = create_gurobi_env(verbose)
+    record.lap("env")
     val = {}
 
     with gp.Model(name=label, env=env) as m:
 
         l = longest_path(V, A)
 
+        # 最長路のポテンシャルで各エッジのスパンの範囲を絞る
+        low, high, span = span_bounds(V, A, lam, Vl, l)
+        bound = span_objective_bound(A, w, span)
+
         K = {}
         for s, t in A:
-            K[(s, t)] = list(range(lam[(s, t)], l + 1))
+            K[(s, t)] = list(range(span[(s, t)][0], min(span[(s, t)][1], l) + 1))
 
         y = m.addVars(V, vtype=GRB.INTEGER, lb=0, name="y")
+        for v in V:
+            y[v].LB = low[v]
+            y[v].UB = high[v]
 
         x_keys = [(u, v, k) for (u, v) in A for k in K[(u, v)]]
         x = m.addVars(x_keys, vtype=GRB.BINARY, name="x")
@@ -44,11 +55,21 @@ def pl(label, V, A, w, lam, V0, Vl):
             for (u, v) in A
         )
         m.setObjective(obj, GRB.MINIMIZE)
+        m.Params.BestObjStop = bound + TOL * max(1, bound)
+        record.note(lower_bound=bound)
 
-        m.optimize()
+        record.lap("build")
+        record.model(m)
 
-        if m.status == GRB.OPTIMAL:
+        m.optimize(record.callback)
+        record.lap("solve")
+        record.result(m)
+
+        if reached_bound(m):
             for v in V:
                 val[v] = int(y[v].X)
 
+        record.lap("extract")
+
+    record.finish()
     return val
@@ -1,20 +1,31 @@
-import gurobipy as gp
-from gurobipy import GRB
-
 from longest_path import longest_path
 
+from bounds import TOL, reached_bound, span_bounds, span_objective_bound
 from create_gurobi_env import create_gurobi_env
+from solve_stats import start_record
+
 
+def pq(label, V, A, w, lam, V0, Vl, stats=None, verbose=True):
+    import gurobipy as gp
+    from gurobipy import GRB
 
-def pq(label, V, A, w, lam, V0, Vl):
-    env = create_gurobi_env()
+    record = start_record(stats, label)
+    env = create_gurobi_env(verbose)
+    record.lap("env")
     val = {}
 
     with gp.Model(name=label, env=env) as m:
 
         l = longest_path(V, A)
 
+        # 最長路のポテンシャルによる階層の範囲と目的関数の下界
+        low, high, span = span_bounds(V, A, lam, Vl, l)
+        bound = span_objective_bound(A, w, span)
+
         x = m.addVars(V, vtype=GRB.INTEGER, lb=0, name="y")
+        for v in V:
+            x[v].LB = low[v]
+            x[v].UB = high[v]
 
         m.addConstrs(
             (x[v] - x[u] >= lam[(u, v)] for (u, v) in A), name="diff_constraint"
@@ -26,10 +37,20 @@ def pq(label, V, A, w, lam, V0, Vl):
         m.setObjective(
             gp.quicksum(w[(u, v)] * ((x[v] - x[u]) ** 2) for (u, v) in A), GRB.MINIMIZE
         )
-        m.optimize()
+        m.Params.BestObjStop = bound + TOL * max(1, bound)
+        record.note(lower_bound=bound)
+        record.lap("build")
+        record.model(m)
 
-        if m.status == GRB.OPTIMAL:
+        m.optimize(record.callback)
+        record.lap("solve")
+        record.result(m)
+
+        if reached_bound(m):
             for v in V:
                 val[v] = int(x[v].X)
 
+        record.lap("extract")
+
+    record.finish()
     return val
@@ -7,33 +7,122 @@
 - サイクルを含む
 """
 
+import math
 import random
 from collections import deque
 
+from union_find import UnionFind
 
-def is_connected(V, A):
-    """グラフが弱連結かどうかを判定"""
-    if not V:
-        return True
 
-    # 無向グラフとして扱って連結性を確認
+def component_labels(V, A):
+    """
+    弱連結成分ごとにノードへ番号を付ける（エッジを無向として BFS）
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+
+    Returns:
+        label: 各ノードの成分番号 dict（V に現れる順に 0, 1, 2, ...）
+        count: 成分の数 int
+    """
     adj = {v: [] for v in V}
     for u, v in A:
         adj[u].append(v)
         adj[v].append(u)
 
-    visited = set()
-    queue = deque([V[0]])
-    visited.add(V[0])
+    label = {}
+    count = 0
+    for start in V:
+        if start in label:
+            continue
 
-    while queue:
-        node = queue.popleft()
-        for neighbor in adj[node]:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append(neighbor)
+        label[start] = count
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for neighbor in adj[node]:
+                if neighbor not in label:
+                    label[neighbor] = count
+                    queue.append(neighbor)
+        count += 1
 
-    return len(visited) == len(V)
+    return label, count
+
+
+def is_connected(V, A, uf=None):
+    """
+    グラフが弱連結かどうかを判定
+
+    uf に V, A から構築した UnionFind を渡すと、BFS を行わずにその成分数で判定する
+    """
+    if not V:
+        return True
+
+    if uf is not None:
+        return uf.count == 1
+
+    # 無向グラフとして扱って連結性を確認
+    _, count = component_labels(V, A)
+    return count == 1
+
+
+def _connect_components(V, A, uf):
+    """
+    隣り合うノード (V[i], V[i+1]) が別の成分に属するときだけ、その間にエッジを追加
+
+    追加されるエッジは成分を併合するものだけなので、連結になるのに必要な本数で済む。
+    V が昇順なら、追加されるエッジも小さい番号から大きい番号へ向かう。
+    """
+    for u, v in zip(V, V[1:]):
+        if uf.count == 1:
+            break
+        if uf.union(u, v):
+            A.append((u, v))
+
+
+def _sample_indices(rng, total, p):
+    """
+    0, 1, ..., total-1 の各インデックスを確率 p で独立に選び、昇順に返す
+
+    選ばれなかったインデックスを幾何分布に従う長さでまとめて読み飛ばすので、
+    計算量は total ではなく選ばれる個数に比例する。
+    """
+    if p <= 0:
+        return
+    if p >= 1:
+        yield from range(total)
+        return
+
+    log_q = math.log(1.0 - p)
+    i = -1
+    while True:
+        i += 1 + int(math.log(1.0 - rng.random()) / log_q)
+        if i >= total:
+            return
+        yield i
+
+
+def _sample_pairs(rng, n, p):
+    """u != v であるすべての順序対 (u, v) を確率 p で選ぶ"""
+    if n < 2:
+        return
+    for k in _sample_indices(rng, n * (n - 1), p):
+        u, j = divmod(k, n - 1)
+        yield u, j if j < u else j + 1
+
+
+def _sample_upper_pairs(rng, n, p):
+    """i < j であるすべての対 (i, j) を確率 p で選ぶ"""
+    row = 0
+    row_start = 0
+    row_len = n - 1
+    for k in _sample_indices(rng, n * (n - 1) // 2, p):
+        while k >= row_start + row_len:
+            row_start += row_len
+            row += 1
+            row_len -= 1
+        yield row, row + 1 + (k - row_start)
 
 
 def generate_random_connected_graph(n, edge_prob=0.3, seed=None):
@@ -49,29 +138,28 @@ def generate_random_connected_graph(n, edge_prob=0.3, seed=None):
         V: ノード集合 list[int]
         A: エッジ集合 list[tuple(int, int)]
     """
-    if seed is not None:
-        random.seed(seed)
+    rng = random.Random(seed)
 
     V = list(range(n))
 
     # まず連結性を保証するためのスパニングツリーを作成
+    # 未訪問ノードをランダムな順に、訪問済みノードからランダムに選んだ親につなぐ
     A = []
-    unvisited = set(V[1:])
-    visited = {V[0]}
+    unvisited = V[1:]
+    rng.shuffle(unvisited)
+    visited = [V[0]]
 
-    while unvisited:
-        u = random.choice(list(visited))
-        v = random.choice(list(unvisited))
+    for v in unvisited:
+        u = rng.choice(visited)
         A.append((u, v))
-        visited.add(v)
-        unvisited.remove(v)
+        visited.append(v)
 
     # 追加のエッジをランダムに生成
-    for u in V:
-        for v in V:
-            if u != v and (u, v) not in A:
-                if random.random() < edge_prob:
-                    A.append((u, v))
+    edges = set(A)
+    for u, v in _sample_pairs(rng, n, edge_prob):
+        if (u, v) not in edges:
+            edges.add((u, v))
+            A.append((u, v))
 
     return V, A
 
@@ -89,24 +177,17 @@ def generate_dag(n, edge_prob=0.3, seed=None):
         V: ノード集合 list[int]
         A: エッジ集合 list[tuple(int, int)]
     """
-    if seed is not None:
-        random.seed(seed)
+    rng = random.Random(seed)
 
     V = list(range(n))
-    A = []
 
     # トポロジカル順序を保証するため、小さい番号から大きい番号へのエッジのみ生成
-    for u in V:
-        for v in V:
-            if u < v and random.random() < edge_prob:
-                A.append((u, v))
-
-    # 連結性を確保
-    if not is_connected(V, A):
-        # 連結になるまでエッジを追加
-        for i in range(len(V) - 1):
-            if (i, i + 1) not in A:
-                A.append((i, i + 1))
+    A = list(_sample_upper_pairs(rng, n, edge_prob))
+
+    # 連結性を確保（成分をまたぐエッジだけを追加）
+    uf = UnionFind(V, A)
+    if not is_connected(V, A, uf):
+        _connect_components(V, A, uf)
 
     return V, A
 
@@ -125,8 +206,7 @@ def generate_cyclic_graph(n, num_cycles=2, edge_prob=0.2, seed=None):
         V: ノード集合 list[int]
         A: エッジ集合 list[tuple(int, int)]
     """
-    if seed is not None:
-        random.seed(seed)
+    rng = random.Random(seed)
 
     V = list(range(n))
     A = []
@@ -153,23 +233,23 @@ def generate_cyclic_graph(n, num_cycles=2, edge_prob=0.2, seed=None):
     # 残りのノードを接続
     if node_idx < n:
         for i in range(node_idx, n):
-            target = random.randint(0, node_idx - 1)
+            target = rng.randint(0, node_idx - 1)
             A.append((target, i))
             A.append((i, target))
 
     # サイクル間を接続
     if num_cycles > 1:
         for i in range(num_cycles - 1):
-            u = random.randint(0, nodes_per_cycle - 1) + i * nodes_per_cycle
-            v = random.randint(0, nodes_per_cycle - 1) + (i + 1) * nodes_per_cycle
+            u = rng.randint(0, nodes_per_cycle - 1) + i * nodes_per_cycle
+            v = rng.randint(0, nodes_per_cycle - 1) + (i + 1) * nodes_per_cycle
             A.append((u, v))
 
     # 追加のランダムエッジ
-    for u in V:
-        for v in V:
-            if u != v and (u, v) not in A:
-                if random.random() < edge_prob:
-                    A.append((u, v))
+    edges = set(A)
+    for u, v in _sample_pairs(rng, n, edge_prob):
+        if (u, v) not in edges:
+            edges.add((u, v))
+            A.append((u, v))
 
     return V, A
 
@@ -188,15 +268,15 @@ def generate_mixed_graph(n, edge_prob=0.3, cycle_prob=0.3, seed=None):
         V: ノード集合 list[int]
         A: エッジ集合 list[tuple(int, int)]
     """
-    if seed is not None:
-        random.seed(seed)
+    rng = random.Random(seed)
 
     V = list(range(n))
     A = []
 
     # ノードをDAG部分とサイクル部分に分割
-    cycle_nodes = [v for v in V if random.random() < cycle_prob]
-    dag_nodes = [v for v in V if v not in cycle_nodes]
+    cycle_nodes = [v for v in V if rng.random() < cycle_prob]
+    cycle_set = set(cycle_nodes)
+    dag_nodes = [v for v in V if v not in cycle_set]
 
     # サイクル部分を生成
     if len(cycle_nodes) >= 3:
@@ -207,28 +287,25 @@ def generate_mixed_graph(n, edge_prob=0.3, cycle_prob=0.3, seed=None):
 
     # DAG部分を生成
     dag_nodes_sorted = sorted(dag_nodes)
-    for i, u in enumerate(dag_nodes_sorted):
-        for v in dag_nodes_sorted[i + 1 :]:
-            if random.random() < edge_prob:
-                A.append((u, v))
+    for i, j in _sample_upper_pairs(rng, len(dag_nodes_sorted), edge_prob):
+        A.append((dag_nodes_sorted[i], dag_nodes_sorted[j]))
 
     # DAG部分とサイクル部分を接続
     if dag_nodes and cycle_nodes:
         # DAGからサイクルへ
-        u = random.choice(dag_nodes)
-        v = random.choice(cycle_nodes)
+        u = rng.choice(dag_nodes)
+        v = rng.choice(cycle_nodes)
         A.append((u, v))
 
         # サイクルからDAGへ
-        u = random.choice(cycle_nodes)
-        v = random.choice(dag_nodes)
+        u = rng.choice(cycle_nodes)
+        v = rng.choice(dag_nodes)
         A.append((u, v))
 
-    # 連結性を確保
-    if not is_connected(V, A):
-        for i in range(len(V) - 1):
-            if not is_connected(V, A):
-                A.append((i, i + 1))
+    # 連結性を確保（成分をまたぐエッジだけを追加）
+    uf = UnionFind(V, A)
+    if not is_connected(V, A, uf):
+        _connect_components(V, A, uf)
 
     return V, A
 
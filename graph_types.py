@@ -0,0 +1,249 @@
+"""
+配列で保持するグラフと階層割当の結果の型
+
+ノードを 0, 1, ..., n-1 の番号で表し、エッジの始点・終点・重み・最小階層差を
+array に並べて保持する。エッジのタプルをキーとする dict に比べてメモリが数分の1で済む。
+既存の関数に渡すときは to_lists() / to_dicts() でリストと dict の形に変換する。
+
+使用例:
+    from graph_types import Graph, LayoutResult
+    from torus import torus
+
+    g = Graph.from_lists(V, A, w, lam)
+    y_val, t_val, L = torus(*g.to_lists())
+    result = LayoutResult.from_dicts(g, y_val, t_val, L)
+    print(result.layer_nodes(0))
+"""
+
+from array import array
+
+
+class Graph:
+    """
+    配列で保持する有向グラフ
+
+    Attributes:
+        n: ノード数 int
+        src: エッジの始点 array('i')
+        dst: エッジの終点 array('i')
+        w: エッジ重み array('d')
+        lam: エッジの最小階層差 array('i')
+        labels: 番号 i のノードの元のラベル list（元が 0..n-1 なら None）
+    """
+
+    __slots__ = ("n", "src", "dst", "w", "lam", "labels")
+
+    def __init__(self, n, src=None, dst=None, w=None, lam=None, labels=None):
+        self.n = n
+        self.src = src if src is not None else array("i")
+        self.dst = dst if dst is not None else array("i")
+        m = len(self.src)
+        self.w = w if w is not None else array("d", [1.0]) * m
+        self.lam = lam if lam is not None else array("i", [1]) * m
+        self.labels = labels
+
+    @classmethod
+    def from_lists(cls, V, A, w=None, lam=None):
+        """
+        リストと dict の形から作る
+
+        Args:
+            V: ノード集合 list（0..n-1 以外のラベルは番号を付け直す）
+            A: エッジ集合 list[tuple]
+            w: エッジ重み dict (デフォルト: すべて1)
+            lam: エッジの最小階層差 dict (デフォルト: すべて1)
+        """
+        V = list(V)
+        if all(type(v) is int for v in V) and sorted(V) == list(range(len(V))):
+            index = None
+            labels = None
+        else:
+            index = {v: i for i, v in enumerate(V)}
+            labels = V
+
+        src = array("i")
+        dst = array("i")
+        for u, v in A:
+            if index is None:
+                src.append(u)
+                dst.append(v)
+            else:
+                src.append(index[u])
+                dst.append(index[v])
+
+        w_arr = None if w is None else array("d", (w[e] for e in A))
+        lam_arr = None if lam is None else array("i", (lam[e] for e in A))
+        return cls(len(V), src, dst, w_arr, lam_arr, labels)
+
+    @property
+    def m(self):
+        """エッジ数"""
+        return len(self.src)
+
+    def __len__(self):
+        return self.n
+
+    def label(self, i):
+        """番号 i のノードの元のラベル"""
+        return i if self.labels is None else self.labels[i]
+
+    def edges(self):
+        """元のラベルによるエッジを順に返す"""
+        if self.labels is None:
+            return zip(self.src, self.dst)
+        labels = self.labels
+        return ((labels[u], labels[v]) for u, v in zip(self.src, self.dst))
+
+    def to_lists(self):
+        """
+        既存の関数に渡すリストと dict の形に変換
+
+        Returns:
+            V: ノード集合 list
+            A: エッジ集合 list[tuple]
+            w: エッジ重み dict
+            lam: エッジの最小階層差 dict
+        """
+        V = list(range(self.n)) if self.labels is None else list(self.labels)
+        A = list(self.edges())
+        return V, A, dict(zip(A, self.w)), dict(zip(A, self.lam))
+
+    def out_csr(self):
+        """
+        出る辺の隣接配列 (CSR)
+
+        Returns:
+            offsets: ノード i の出る辺は targets[offsets[i]:offsets[i+1]] array('i')
+            targets: 終点 array('i')
+            edge_ids: targets と同じ並びのエッジ番号 array('i')
+        """
+        offsets = array("i", [0]) * (self.n + 1)
+        for u in self.src:
+            offsets[u + 1] += 1
+        for i in range(self.n):
+            offsets[i + 1] += offsets[i]
+
+        fill = array("i", offsets[:-1])
+        targets = array("i", [0]) * self.m
+        edge_ids = array("i", [0]) * self.m
+        for e, (u, v) in enumerate(zip(self.src, self.dst)):
+            k = fill[u]
+            targets[k] = v
+            edge_ids[k] = e
+            fill[u] = k + 1
+        return offsets, targets, edge_ids
+
+    def nbytes(self):
+        """配列が使うバイト数"""
+        return sum(
+            a.itemsize * len(a) for a in (self.src, self.dst, self.w, self.lam)
+        )
+
+
+class LayoutResult:
+    """
+    配列で保持する階層割当の結果
+
+    Attributes:
+        layer: ノード i の階層 array('i')
+        torus: エッジ e がトーラス辺なら 1 array('b')
+        order: 階層順・層内の順に並べたノード array('i')
+        offsets: 階層 k のノードは order[offsets[k]:offsets[k+1]] array('i')
+    """
+
+    __slots__ = ("layer", "torus", "order", "offsets")
+
+    def __init__(self, layer, torus, order, offsets):
+        self.layer = layer
+        self.torus = torus
+        self.order = order
+        self.offsets = offsets
+
+    @classmethod
+    def from_dicts(cls, graph, y_val, t_val=None, L=None):
+        """
+        torus() などが返す dict の形から作る
+
+        Args:
+            graph: Graph
+            y_val: 各ノードの階層 dict
+            t_val: 各エッジがトーラス辺か dict (デフォルト: すべて False)
+            L: レイヤー集合 dict[int: list]（リストの順が層内の順序。省略時は番号順）
+        """
+        index = (
+            None
+            if graph.labels is None
+            else {v: i for i, v in enumerate(graph.labels)}
+        )
+
+        def node(v):
+            return v if index is None else index[v]
+
+        layer = array("i", [0]) * graph.n
+        for v, k in y_val.items():
+            layer[node(v)] = k
+
+        torus = array("b", [0]) * graph.m
+        if t_val:
+            for e, edge in enumerate(graph.edges()):
+                if t_val.get(edge):
+                    torus[e] = 1
+
+        num_layers = max(layer, default=-1) + 1
+        offsets = array("i", [0]) * (num_layers + 1)
+        for k in layer:
+            offsets[k + 1] += 1
+        for k in range(num_layers):
+            offsets[k + 1] += offsets[k]
+
+        if L is None:
+            fill = array("i", offsets[:-1])
+            order = array("i", [0]) * graph.n
+            for i, k in enumerate(layer):
+                order[fill[k]] = i
+                fill[k] += 1
+        else:
+            order = array("i")
+            for k in range(num_layers):
+                order.extend(node(v) for v in L.get(k, ()))
+
+        return cls(layer, torus, order, offsets)
+
+    @property
+    def num_layers(self):
+        return len(self.offsets) - 1
+
+    def layer_nodes(self, k):
+        """階層 k のノード（層内の順） array('i')"""
+        return self.order[self.offsets[k] : self.offsets[k + 1]]
+
+    def positions(self):
+        """
+        各ノードの層内の位置
+
+        Returns:
+            pos: ノード i の層内の位置 array('i')
+        """
+        pos = array("i", [0]) * len(self.layer)
+        for k in range(self.num_layers):
+            start = self.offsets[k]
+            for i in range(start, self.offsets[k + 1]):
+                pos[self.order[i]] = i - start
+        return pos
+
+    def to_dicts(self, graph):
+        """
+        torus() と同じ dict の形に変換
+
+        Returns:
+            y_val: 各ノードの階層 dict
+            t_val: 各エッジがトーラス辺か dict[(u,v): bool]
+            L: レイヤー集合 dict[int: list]
+        """
+        y_val = {graph.label(i): k for i, k in enumerate(self.layer)}
+        t_val = {edge: bool(t) for edge, t in zip(graph.edges(), self.torus)}
+        L = {
+            k: [graph.label(i) for i in self.layer_nodes(k)]
+            for k in range(self.num_layers)
+        }
+        return y_val, t_val, L
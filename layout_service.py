@@ -0,0 +1,473 @@
+"""
+レイアウトを計算する常駐サービス（asyncio）
+
+TCP または Unix ソケットで、1行に1つの JSON で表したジョブを受け付ける。
+ジョブは優先度と期限つきのキューに入り、常駐するワーカープールで計算される。
+ワーカーは起動時に gurobipy などを読み込み、Gurobi の環境を使い回すので、
+呼び出し側はインタプリタの起動・読み込み・ライセンスの確認を待たずに済む。
+
+リクエスト（1行に1つ。1つの接続で複数送ってよい）:
+    {"id": 任意, "kind": "torus" | "layering" | "pipeline" | "longest",
+     "graph": {"V": [...], "A": [[u, v], ...], "w": [[u, v, 値], ...], "lam": [...]},
+     "params": {...}, "priority": 0, "deadline": 秒}
+    priority は小さいほど先に計算する。deadline を過ぎても結果が出なければ "expired" を返す。
+
+レスポンス（終わったジョブから順に返す）:
+    {"id": ..., "status": "done", "result": {...}, "elapsed": 秒, "shared": bool}
+    {"id": ..., "status": "error" | "expired", "error": "..."}
+    同じ内容のジョブが計算中なら、新しく計算せずにその結果を共有する (shared=true)。
+
+使用例:
+    python layout_service.py --port 8765 --workers 4
+
+    # 呼び出し側
+    client = await LayoutClient.connect(port=8765)
+    response = await client.request({"kind": "torus", "graph": {"V": V, "A": A}})
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from solution_cache import fingerprint
+
+# 1行の最大長（バイト）
+LINE_LIMIT = 64 * 1024 * 1024
+
+
+# ========== ワーカーで実行する関数 ==========
+
+
+def _init_worker():
+    """ワーカーの初期化（重い依存の読み込みと Gurobi の環境の作成）"""
+    from create_gurobi_env import create_gurobi_env, keep_gurobi_env
+
+    keep_gurobi_env()
+    try:
+        import torus  # noqa: F401
+        import gurobipy  # noqa: F401
+    except ImportError:
+        return
+
+    # ジョブはログを出さずに解くので、verbose=False の環境を先に作って使い回す
+    # （ライセンスを確認できなければ、最初のジョブで改めて作成を試みる）
+    try:
+        create_gurobi_env(False)
+    except Exception:
+        pass
+
+
+def _edge_values(graph, name, A):
+    values = {(u, v): x for u, v, x in graph.get(name) or ()}
+    return {e: values.get(e, 1) for e in A}
+
+
+def _parse_graph(graph):
+    V = list(graph["V"])
+    A = [tuple(e) for e in graph["A"]]
+    return V, A, _edge_values(graph, "w", A), _edge_values(graph, "lam", A)
+
+
+def _layers_result(layer):
+    return {"layer": [[v, k] for v, k in layer.items()]}
+
+
+def solve_torus(graph, params):
+    from torus import torus
+
+    V, A, w, lam = _parse_graph(graph)
+    y_val, t_val, L = torus(V, A, w, lam, verbose=False, **params)
+    return {
+        "layer": [[v, k] for v, k in y_val.items()],
+        "torus": [[u, v] for (u, v), t in t_val.items() if t],
+        "layers": [[k, list(nodes)] for k, nodes in sorted(L.items())],
+    }
+
+
+def solve_layering(graph, params):
+    from pipeline import _layering
+
+    V, A, w, lam = _parse_graph(graph)
+    formulation = params.get("formulation", "pl")
+    layer = _layering(formulation, V, A, w, lam, None, False, params.get("width"))
+    return _layers_result(layer)
+
+
+def solve_longest(graph, params):
+    from pipeline import longest_path_layers
+
+    V, A, _, lam = _parse_graph(graph)
+    return _layers_result(longest_path_layers(V, A, lam))
+
+
+def solve_pipeline(graph, params):
+    from layout_writer import layout_record
+    from pipeline import run_pipeline
+
+    V, A, w, lam = _parse_graph(graph)
+    layout = run_pipeline(
+        {"V": V, "A": A, "w": w, "lam": lam}, verbose=False, **params
+    )
+    return layout_record(params.get("name", "graph"), layout)
+
+
+SOLVERS = {
+    "torus": solve_torus,
+    "layering": solve_layering,
+    "longest": solve_longest,
+    "pipeline": solve_pipeline,
+}
+
+
+def _run(solver, graph, params):
+    start = time.perf_counter()
+    result = solver(graph, params)
+    return result, time.perf_counter() - start
+
+
+# ========== サービス ==========
+
+
+class _Job:
+    __slots__ = ("key", "kind", "graph", "params", "future", "waiters")
+
+    def __init__(self, key, kind, graph, params, future):
+        self.key = key
+        self.kind = kind
+        self.graph = graph
+        self.params = params
+        self.future = future
+        self.waiters = 1
+
+
+class LayoutService:
+    """
+    レイアウトを計算する常駐サービス
+
+    Args:
+        workers: ワーカー数 (デフォルト: CPU数)
+        solvers: ジョブの種類から計算する関数への対応 (デフォルト: SOLVERS)
+            関数は solver(graph, params) -> JSON に変換できる結果
+        processes: Trueのときプロセスプール、Falseのときスレッドプールで計算 (デフォルト: True)
+
+    Attributes:
+        stats: 受け付け・計算・共有・期限切れ・計算せずに捨てた件数 dict
+    """
+
+    def __init__(self, workers=None, solvers=None, processes=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.solvers = dict(SOLVERS if solvers is None else solvers)
+        self.processes = processes
+        self.stats = {
+            "received": 0,
+            "solved": 0,
+            "shared": 0,
+            "expired": 0,
+            "skipped": 0,
+        }
+
+        self._queue = None
+        self._inflight = {}
+        self._seq = itertools.count()
+        self._executor = None
+        self._dispatchers = []
+        self._server = None
+
+    # ----- 起動と停止 -----
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        ワーカープールを起動してソケットで待ち受ける
+
+        Args:
+            host, port: TCP で待ち受けるアドレス（port=0 なら空いている番号）
+            path: 指定した場合は Unix ソケットで待ち受ける
+
+        Returns:
+            address: 待ち受けているアドレス（TCP なら (host, port)、Unix ソケットならパス）
+        """
+        if self.processes:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            # すべてのワーカーを先に起動しておく
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(
+                *(
+                    loop.run_in_executor(self._executor, time.sleep, 0)
+                    for _ in range(self.workers)
+                )
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        self._queue = asyncio.PriorityQueue()
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch()) for _ in range(self.workers)
+        ]
+
+        if path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle, path=path, limit=LINE_LIMIT
+            )
+            return path
+
+        self._server = await asyncio.start_server(
+            self._handle, host, port, limit=LINE_LIMIT
+        )
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # ----- ジョブ -----
+
+    def _key(self, kind, graph, params):
+        V, A, w, lam = _parse_graph(graph)
+        return fingerprint(kind, V, A, w, lam, **params)
+
+    def submit(self, kind, graph, params=None, priority=0):
+        """
+        ジョブをキューに入れる（同じ内容のジョブが計算中ならそれを共有する）
+
+        Returns:
+            job: ジョブ（job.future が (結果, 計算時間) を返す）
+            shared: 計算中のジョブを共有したか bool
+        """
+        if kind not in self.solvers:
+            raise ValueError(f"未知のジョブの種類: {kind}")
+        params = params or {}
+        self.stats["received"] += 1
+
+        key = self._key(kind, graph, params)
+        job = self._inflight.get(key)
+        if job is not None:
+            job.waiters += 1
+            self.stats["shared"] += 1
+            return job, True
+
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(key, kind, graph, params, future)
+        self._inflight[key] = job
+        self._queue.put_nowait((priority, next(self._seq), job))
+        return job, False
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                if job.waiters <= 0:
+                    # 待っていた呼び出し側がすべて期限切れになったジョブは計算しない
+                    self.stats["skipped"] += 1
+                    job.future.cancel()
+                    continue
+                try:
+                    result = await loop.run_in_executor(
+                        self._executor,
+                        _run,
+                        self.solvers[job.kind],
+                        job.graph,
+                        job.params,
+                    )
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    self.stats["solved"] += 1
+                    if not job.future.done():
+                        job.future.set_result(result)
+            finally:
+                self._inflight.pop(job.key, None)
+                self._queue.task_done()
+
+    async def solve(self, request):
+        """
+        1つのリクエストを処理してレスポンスを返す
+
+        Args:
+            request: リクエスト dict
+
+        Returns:
+            response: レスポンス dict
+        """
+        response = {"id": request.get("id")}
+        try:
+            job, shared = self.submit(
+                request.get("kind", "torus"),
+                request["graph"],
+                request.get("params"),
+                request.get("priority", 0),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            response.update(status="error", error=f"{type(e).__name__}: {e}")
+            return response
+
+        try:
+            result, elapsed = await asyncio.wait_for(
+                asyncio.shield(job.future), timeout=request.get("deadline")
+            )
+        except asyncio.TimeoutError:
+            job.waiters -= 1
+            self.stats["expired"] += 1
+            response.update(status="expired", error="期限までに計算が終わりませんでした")
+        except asyncio.CancelledError:
+            response.update(status="expired", error="計算されませんでした")
+        except Exception as e:
+            response.update(status="error", error=f"{type(e).__name__}: {e}")
+        else:
+            response.update(
+                status="done", result=result, elapsed=elapsed, shared=shared
+            )
+        return response
+
+    # ----- 接続 -----
+
+    async def _handle(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(request):
+            response = await self.solve(request)
+            line = json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+            async with lock:
+                writer.write(line.encode("utf-8") + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    request = None
+                    error = {"id": None, "status": "error", "error": str(e)}
+                    async with lock:
+                        writer.write(json.dumps(error).encode("utf-8") + b"\n")
+                        await writer.drain()
+                if request is not None:
+                    task = asyncio.create_task(respond(request))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+# ========== 呼び出し側 ==========
+
+
+class LayoutClient:
+    """
+    サービスへの接続（1つの接続で複数のリクエストを並行して送れる）
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._pending = {}
+        self._ids = itertools.count()
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=None, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._pending.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("接続が切れました"))
+
+    async def request(self, job):
+        """
+        ジョブを送って結果を待つ
+
+        Args:
+            job: リクエスト dict（"id" は自動で付ける）
+
+        Returns:
+            response: レスポンス dict
+        """
+        job = dict(job)
+        job["id"] = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[job["id"]] = future
+        self._writer.write(json.dumps(job).encode("utf-8") + b"\n")
+        await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def _serve(args):
+    service = LayoutService(workers=args.workers)
+    address = await service.start(args.host, args.port, args.unix)
+    print(f"listening on {address}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="レイアウトを計算する常駐サービス")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Unix ソケットのパス（指定すると TCP は使わない）")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
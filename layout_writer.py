@@ -0,0 +1,214 @@
+"""
+レイアウト結果を機械で読める形式で書き出す関数
+
+1つのグラフのレイアウトを1レコード（列ごとのリストをまとめた dict）にまとめ、
+グラフの処理が終わるたびに書き足す。バッチ全体をメモリに保持しない。
+
+形式:
+    .ndjson / .jsonl: 1行に1レコードの JSON（既存のファイルには追記する）
+    .parquet: 1行に1レコードの Parquet（pyarrow が必要。batch_size 件ごとに行グループを書く）
+
+レコード:
+    name: グラフの名前
+    nodes: ノード / labels: 元のラベル（ダミーノードは null） / dummy: ダミーノードか
+    layer: 階層 / order: 層内の位置 / x, y: 座標
+    src, dst: エッジの始点・終点 / torus: トーラス辺か
+    stats: 段階ごとの時間などの JSON 文字列
+
+使用例:
+    from layout_writer import open_layout_writer, layout_record
+
+    with open_layout_writer("layouts.ndjson") as writer:
+        for name, graph in iter_graphs("graphs/"):
+            layout = run_pipeline(graph, name=name)
+            writer.write(layout_record(name, layout, labels=graph["labels"]))
+"""
+
+import json
+
+from torus_geometry import index_positions
+
+# Parquet の行グループあたりのレコード数
+BATCH_SIZE = 64
+
+
+def layout_record(name, layout, labels=None, stats=None):
+    """
+    レイアウトをレコードに変換
+
+    Args:
+        name: グラフの名前 str
+        layout: {"V", "A", "layer", "L", "dummy", "pos", "torus"}
+            (run_pipeline の結果など。"dummy" / "pos" / "torus" は省略可)
+        labels: 番号 i のノードの元のラベル list (デフォルト: 番号のまま)
+        stats: 記録する値 dict (デフォルト: layout の "stages" と "memory")
+
+    Returns:
+        record: dict
+    """
+    V = layout["V"]
+    A = layout["A"]
+    layer = layout["layer"]
+    L = layout.get("L")
+    dummy = layout.get("dummy") or set()
+    is_torus = layout.get("torus", False)
+
+    if L is None:
+        L = {}
+        for v in V:
+            L.setdefault(layer[v], []).append(v)
+        for nodes in L.values():
+            nodes.sort()
+    pos = layout.get("pos") or index_positions(L)
+    order = index_positions(L)
+
+    if stats is None:
+        stats = {k: layout[k] for k in ("stages", "memory") if k in layout}
+
+    def label(v):
+        if v in dummy:
+            return None
+        if labels is None or not 0 <= v < len(labels):
+            return str(v)
+        return str(labels[v])
+
+    return {
+        "name": name,
+        "nodes": list(V),
+        "labels": [label(v) for v in V],
+        "dummy": [v in dummy for v in V],
+        "layer": [layer[v] for v in V],
+        "order": [order[v][1] for v in V],
+        "x": [float(pos[v][0]) for v in V],
+        "y": [float(pos[v][1]) for v in V],
+        "src": [u for u, _ in A],
+        "dst": [v for _, v in A],
+        "torus": [bool(is_torus and layer[u] >= layer[v]) for u, v in A],
+        "stats": json.dumps(stats, ensure_ascii=False, default=str),
+    }
+
+
+class NDJSONWriter:
+    """
+    1行に1レコードの JSON として書き出す
+
+    Args:
+        out: 出力先のパス（既存のファイルには追記する）またはテキストファイルオブジェクト
+    """
+
+    def __init__(self, out):
+        if hasattr(out, "write"):
+            self._f = out
+            self._should_close = False
+        else:
+            self._f = open(out, "a", encoding="utf-8")
+            self._should_close = True
+        self.count = 0
+
+    def write(self, record):
+        """レコードを1行書き足す（書くたびにフラッシュする）"""
+        self._f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self._f.write("\n")
+        self._f.flush()
+        self.count += 1
+
+    def close(self):
+        if self._should_close:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("name", pa.string()),
+            ("nodes", pa.list_(pa.int64())),
+            ("labels", pa.list_(pa.string())),
+            ("dummy", pa.list_(pa.bool_())),
+            ("layer", pa.list_(pa.int32())),
+            ("order", pa.list_(pa.int32())),
+            ("x", pa.list_(pa.float64())),
+            ("y", pa.list_(pa.float64())),
+            ("src", pa.list_(pa.int64())),
+            ("dst", pa.list_(pa.int64())),
+            ("torus", pa.list_(pa.bool_())),
+            ("stats", pa.string()),
+        ]
+    )
+
+
+class ParquetWriter:
+    """
+    1行に1レコードの Parquet として書き出す（pyarrow が必要）
+
+    batch_size 件たまるごとに行グループとして書き出すので、
+    保持するのは高々 batch_size 件のレコードだけになる。
+
+    Args:
+        path: 出力先のパス（既存のファイルは上書きする）
+        batch_size: 行グループあたりのレコード数 (デフォルト: 64)
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Parquet で書き出すには pyarrow が必要です（.ndjson を使ってください）"
+            ) from e
+
+        self.schema = _parquet_schema()
+        self.batch_size = batch_size
+        self.count = 0
+        self._writer = pq.ParquetWriter(path, self.schema)
+        self._batch = []
+
+    def write(self, record):
+        """レコードを書き足す"""
+        self._batch.append(record)
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """たまっているレコードを行グループとして書き出す"""
+        if not self._batch:
+            return
+        import pyarrow as pa
+
+        table = pa.Table.from_pylist(self._batch, schema=self.schema)
+        self._writer.write_table(table)
+        self._batch = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_layout_writer(path, batch_size=BATCH_SIZE):
+    """
+    拡張子に応じた書き出し先を開く
+
+    Args:
+        path: 出力先のパス（.parquet なら Parquet、それ以外は NDJSON）
+        batch_size: Parquet の行グループあたりのレコード数
+
+    Returns:
+        writer: NDJSONWriter または ParquetWriter
+    """
+    if str(path).endswith(".parquet"):
+        return ParquetWriter(path, batch_size)
+    return NDJSONWriter(path)
@@ -0,0 +1,405 @@
+"""
+階層割当の局所探索
+
+ヒューリスティック、緩和問題の丸め、時間制限で止めた torus() などで得た階層割当を、
+ノード（または階層差が lam ちょうどのエッジでつながったノードのまとまり）を
+別の階層へ動かすことで改善する。エッジがトーラス辺かどうかは階層の上下関係
+（y[u] > y[v]）で決まるので、ノードを隣のノードの上下へ動かすことが
+トーラス辺の付け替えになる。
+
+各移動は torus() の目的関数
+    α*L_max + β*Σ w*(スパン)^2 + γ*Σ k*t
+の差分で評価する。スパンの2乗和とトーラス辺数は増分で更新し、
+L_max は階層ごとのノード数（ヒストグラム）から求めるので、
+1回の評価は動かすノードの次数に比例する時間で済む。
+
+使用例:
+    from local_search import local_search
+
+    y_val, t_val, L = local_search(V, A, y_val, time_limit=5.0)
+"""
+
+import math
+import random
+import time
+from collections import defaultdict
+
+from solve_stats import start_record
+
+# 改善とみなす目的関数の減少量の下限
+EPS = 1e-9
+
+
+def repair(n, edges, y, M=None):
+    """
+    階層割当を、ノードの上下関係を保ったまま制約を満たすように修復
+
+    ノードを (y, 番号) の順に並べ、各エッジをこの順で前のノードから後ろのノードへ
+    向いた制約（逆向きならトーラス辺）とみなして、必要なだけ上の階層へ押し上げる。
+    M を指定したとき、最大の階層が M-1 を超えたら、同じ順のまま各ノードを
+    できるだけ下の階層に詰め直す（詰めても超える場合はそのまま返す）。
+
+    Args:
+        n: ノード数（ノードは 0..n-1）
+        edges: エッジ dict[(a, b): (w, lam, k)]
+        y: 各ノードの階層 list[int]（書き換える）
+        M: 階層の上限を M-1 にする (デフォルト: 上限なし)
+
+    Returns:
+        raised: 押し上げたノードの数 int
+    """
+    order = sorted(range(n), key=lambda v: (y[v], v))
+    rank = [0] * n
+    for i, v in enumerate(order):
+        rank[v] = i
+
+    pred = [[] for _ in range(n)]
+    for (a, b), (_, lam, _) in edges.items():
+        if rank[a] < rank[b]:
+            pred[b].append((a, lam))
+        else:
+            pred[a].append((b, lam))
+
+    raised = 0
+    for v in order:
+        low = max((y[p] + lam for p, lam in pred[v]), default=0)
+        if low > y[v]:
+            y[v] = low
+            raised += 1
+
+    if M is not None and max(y, default=0) > M - 1:
+        for v in order:
+            y[v] = max((y[p] + lam for p, lam in pred[v]), default=0)
+    return raised
+
+
+class LocalSearch:
+    """
+    torus() の目的関数についての局所探索
+
+    Args:
+        n: ノード数（ノードは 0..n-1）
+        edges: エッジ dict[(a, b): (w, lam, k)]
+            （k はトーラス辺数の項での重み。元のグラフでは 1）
+        y: 各ノードの階層 list[int]（実行可能な階層割当。書き換える）
+        alpha, beta, gamma: torus() と同じ重み
+        M: トーラス辺のスパンに加える定数 (デフォルト: ノード数)
+
+    Attributes:
+        top: 最大の階層 (L_max)
+        span: Σ w*(スパン)^2
+        torus: Σ k*t
+        moves / block_moves: 適用したノード / まとまりの移動の数
+    """
+
+    def __init__(self, n, edges, y, alpha=100, beta=1, gamma=1000, M=None):
+        self.n = n
+        self.y = y
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.M = n if M is None else M
+
+        self.in_adj = [[] for _ in range(n)]
+        self.out_adj = [[] for _ in range(n)]
+        self.span = 0
+        self.torus = 0
+        for (a, b), (w, lam, k) in edges.items():
+            self.in_adj[b].append((a, w, lam, k))
+            self.out_adj[a].append((b, w, lam, k))
+            span, t = self._edge(y[a], y[b], lam)
+            self.span += w * span * span
+            self.torus += k * t
+
+        self.hist = defaultdict(int)
+        for k in y:
+            self.hist[k] += 1
+        self.top = max(y, default=0)
+        self.moves = 0
+        self.block_moves = 0
+
+    def _edge(self, y_a, y_b, lam):
+        """
+        エッジ (a, b) の (スパン, トーラス辺か)（制約を満たさなければ None）
+
+        lam が 0 のエッジは、torus() と同じく同じ階層に置いてよい（スパン 0 の通常辺）。
+        """
+        if y_a < y_b:
+            return (y_b - y_a, 0) if y_b - y_a >= lam else None
+        if y_a > y_b:
+            return (y_b - y_a + self.M, 1) if y_a - y_b >= lam else None
+        return (0, 0) if lam == 0 else None
+
+    def objective(self):
+        """目的関数の値"""
+        return self.alpha * self.top + self.beta * self.span + self.gamma * self.torus
+
+    def delta(self, moves):
+        """
+        ノードを動かしたときの目的関数の変化
+
+        Args:
+            moves: 動かすノードと移動先の階層 dict[int: int]
+
+        Returns:
+            (変化量, スパンの変化, トーラス辺数の変化, 新しい L_max)
+            （制約を満たさなくなる移動や、階層が 0..M-1 の外になる移動なら None）
+        """
+        y = self.y
+        if not all(0 <= k <= self.M - 1 for k in moves.values()):
+            return None  # torus() の階層の範囲 0..M-1 の外
+        d_span = 0
+        d_torus = 0
+        for v, k in moves.items():
+            for u, w, lam, c in self.in_adj[v]:
+                if u in moves:
+                    continue  # 両端を動かすエッジは始点の側で数える
+                new = self._edge(y[u], k, lam)
+                if new is None:
+                    return None
+                old = self._edge(y[u], y[v], lam)
+                d_span += w * (new[0] * new[0] - old[0] * old[0])
+                d_torus += c * (new[1] - old[1])
+            for x, w, lam, c in self.out_adj[v]:
+                new = self._edge(k, moves.get(x, y[x]), lam)
+                if new is None:
+                    return None
+                old = self._edge(y[v], y[x], lam)
+                d_span += w * (new[0] * new[0] - old[0] * old[0])
+                d_torus += c * (new[1] - old[1])
+
+        # ヒストグラムを一時的に書き換えて新しい L_max を求める
+        hist = self.hist
+        for v, k in moves.items():
+            hist[y[v]] -= 1
+            hist[k] += 1
+        top = max(self.top, max(moves.values()))
+        while top > 0 and not hist[top]:
+            top -= 1
+        for v, k in moves.items():
+            hist[k] -= 1
+            hist[y[v]] += 1
+
+        value = (
+            self.alpha * (top - self.top)
+            + self.beta * d_span
+            + self.gamma * d_torus
+        )
+        return value, d_span, d_torus, top
+
+    def apply(self, moves, result):
+        """delta() で評価した移動を適用する"""
+        _, d_span, d_torus, top = result
+        for v, k in moves.items():
+            self.hist[self.y[v]] -= 1
+            self.hist[k] += 1
+            self.y[v] = k
+        self.span += d_span
+        self.torus += d_torus
+        self.top = top
+
+    def candidates(self, v):
+        """ノード v の移動先の候補（隣のノードから lam 離れた階層と、スパンの2乗和の最小点）"""
+        y = self.y
+        y_v = y[v]
+        found = {y_v - 1, y_v + 1}
+        total = 0
+        weight = 0
+        for u, w, lam, _ in self.in_adj[v]:
+            # トーラス辺は上下が入れ替わるので、lam が 0 でも1階層は離す
+            found.add(y[u] + lam)
+            found.add(y[u] - max(lam, 1))
+            normal = self._edge(y[u], y_v, lam)[1] == 0
+            total += w * (y[u] if normal else y[u] - self.M)
+            weight += w
+        for x, w, lam, _ in self.out_adj[v]:
+            found.add(y[x] - lam)
+            found.add(y[x] + max(lam, 1))
+            normal = self._edge(y_v, y[x], lam)[1] == 0
+            total += w * (y[x] if normal else y[x] + self.M)
+            weight += w
+        if weight:
+            best = math.floor(total / weight)
+            found.update((best, best + 1))
+
+        found.discard(y_v)
+        top = min(self.top + 1, self.M - 1)
+        return [k for k in found if 0 <= k <= top]
+
+    def block(self, v, d, max_block):
+        """
+        ノード v を d (+1 / -1) 動かすときに、一緒に動かす必要があるノードのまとまり
+
+        階層差が lam ちょうどで、動かすと制約を満たさなくなる隣のノードをたどる。
+        lam が 0 で同じ階層にあるエッジは通常辺なので、トーラス辺としては数えない。
+        max_block を超える場合は None。
+        """
+        y = self.y
+        block = {v}
+        stack = [v]
+        while stack:
+            z = stack.pop()
+            tight = []
+            for u, _, lam, _ in self.in_adj[z]:
+                # u→z: 通常辺なら下へ、トーラス辺なら上へ動かすと縮む
+                if y[z] - y[u] == lam and d < 0:
+                    tight.append(u)
+                elif lam and y[u] - y[z] == lam and d > 0:
+                    tight.append(u)
+            for x, _, lam, _ in self.out_adj[z]:
+                if y[x] - y[z] == lam and d > 0:
+                    tight.append(x)
+                elif lam and y[z] - y[x] == lam and d < 0:
+                    tight.append(x)
+            for x in tight:
+                if x not in block:
+                    block.add(x)
+                    if len(block) > max_block:
+                        return None
+                    stack.append(x)
+        return block
+
+    def improve(self, time_limit=None, max_passes=None, max_block=8, seed=0):
+        """
+        改善する移動がなくなるまで、ノードを順に動かす
+
+        各ノードについて、移動先の候補のうち最も目的関数が下がる階層へ動かす。
+        改善する移動がなければ、まとまりを1階層上または下へ動かすことを試す。
+
+        Args:
+            time_limit: 時間の上限（秒） (デフォルト: なし)
+            max_passes: 全ノードを見直す回数の上限 (デフォルト: なし)
+            max_block: 一緒に動かすまとまりのノード数の上限 (デフォルト: 8)
+            seed: ノードを見る順番の乱数シード (デフォルト: 0)
+
+        Returns:
+            passes: 全ノードを見直した回数 int
+        """
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        order = list(range(self.n))
+        random.Random(seed).shuffle(order)
+
+        passes = 0
+        while max_passes is None or passes < max_passes:
+            improved = 0
+            for v in order:
+                if deadline is not None and time.perf_counter() > deadline:
+                    return passes
+
+                best = None
+                for k in self.candidates(v):
+                    moves = {v: k}
+                    result = self.delta(moves)
+                    if result is not None and result[0] < -EPS:
+                        if best is None or result[0] < best[1][0]:
+                            best = (moves, result)
+                if best is None and max_block > 1:
+                    for d in (-1, 1):
+                        block = self.block(v, d, max_block)
+                        if block is None or len(block) == 1:
+                            continue
+                        moves = {z: self.y[z] + d for z in block}
+                        if min(moves.values()) < 0:
+                            continue
+                        result = self.delta(moves)
+                        if result is not None and result[0] < -EPS:
+                            if best is None or result[0] < best[1][0]:
+                                best = (moves, result)
+                if best is None:
+                    continue
+
+                self.apply(*best)
+                if len(best[0]) == 1:
+                    self.moves += 1
+                else:
+                    self.block_moves += 1
+                improved += 1
+
+            passes += 1
+            if not improved:
+                break
+        return passes
+
+
+def local_search(
+    V,
+    A,
+    y_val,
+    w=None,
+    lam=None,
+    alpha=100,
+    beta=1,
+    gamma=1000,
+    M=None,
+    time_limit=1.0,
+    max_block=8,
+    seed=0,
+    stats=None,
+):
+    """
+    階層割当を局所探索で改善
+
+    制約を満たさない階層割当は、repair() で修復してから改善する。
+    結果の階層は torus() と同じ 0..M-1 に収まる（上下関係を保って詰めても
+    収まらない場合は ValueError）。自己ループは無視する。
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+        y_val: 各ノードの階層 dict
+        w: エッジ重み dict (デフォルト: すべて1)
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+        alpha, beta, gamma: torus() と同じ重み
+        M: トーラス辺のスパンに加える定数 (デフォルト: ノード数)
+        time_limit: 時間の上限（秒） (デフォルト: 1.0。None なら改善がなくなるまで)
+        max_block: 一緒に動かすまとまりのノード数の上限 (デフォルト: 8)
+        seed: ノードを見る順番の乱数シード (デフォルト: 0)
+        stats: 計測結果を記録する SolveStats (デフォルト: 記録しない)
+
+    Returns:
+        y_val: 各ノードの階層 dict
+        t_val: 各エッジがトーラス辺か dict
+        L: レイヤー集合 dict[int: list]
+    """
+    record = start_record(stats, "local_search")
+    index = {v: i for i, v in enumerate(V)}
+    edges = {}
+    for e in A:
+        a, b = index[e[0]], index[e[1]]
+        if a != b:
+            edges[(a, b)] = (
+                1 if w is None else w[e],
+                1 if lam is None else lam[e],
+                1,
+            )
+
+    y = [y_val[v] for v in V]
+    low = min(y, default=0)
+    y = [k - low for k in y]
+    if M is None:
+        M = len(V)
+    raised = repair(len(V), edges, y, M)
+    if max(y, default=0) > M - 1:
+        raise ValueError(f"階層が torus() の上限 {M - 1} を超えます")
+
+    search = LocalSearch(len(V), edges, y, alpha, beta, gamma, M)
+    start = search.objective()
+    record.lap("setup")
+    passes = search.improve(time_limit, max_block=max_block, seed=seed)
+    record.lap("search")
+    record.note(
+        raised=raised,
+        passes=passes,
+        moves=search.moves,
+        block_moves=search.block_moves,
+        start=start,
+        objective=search.objective(),
+    )
+    record.finish()
+
+    y_val = {v: y[index[v]] for v in V}
+    t_val = {e: y_val[e[0]] > y_val[e[1]] for e in A if e[0] != e[1]}
+    L = defaultdict(list)
+    for v in V:
+        L[y_val[v]].append(v)
+    return y_val, t_val, L
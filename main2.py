@@ -1,7 +1,7 @@
 from create_gurobi_env import create_gurobi_env
 
 from formulas import p_l, p_g, p_g2, p_q
-from formulas.intersection_reduction import intersection_reduction
+from formulas.intersection_reduction import intersection_reduction, order_to_positions
 
 from collections import defaultdict
 
@@ -12,6 +12,8 @@ from generate_graph import generate_graph
 
 from remove_cycles import remove_cycles
 
+from merge_twins import merge_twins, expand_twins
+
 
 env = create_gurobi_env()
 label = "P_g"
@@ -127,21 +129,12 @@ for u, v in a_val:
     if layer_u < layer_v and layer_v - layer_u == 1:
         E_layers[layer_u].append((u, v))
 
-x_order_val, c_val = intersection_reduction(V_layers, E_layers, w_val)
-
-x_order_bool = {key: val > 0.5 for key, val in x_order_val.items()}
+# ツインノードを併合してモデルを縮小
+V_merged, E_merged, w_merged, members, stats = merge_twins(V_layers, E_layers, w_val)
+print(f"ツイン併合: {stats['before']} -> {stats['after']}")
 
-node_order = {}
-for layer, nodes in V_layers.items():
-    sorted_nodes = sorted(
-        nodes,
-        key=lambda u: sum(
-            1 for v in nodes if u != v and x_order_bool.get((u, v), False)
-        ),
-        reverse=True,
-    )
-    for pos, node in enumerate(sorted_nodes):
-        node_order[node] = pos
+order = expand_twins(intersection_reduction(V_merged, E_merged, w_merged), members)
+node_order = order_to_positions(order)
 
-A += (14, 0)
+A.append((14, 0))
 draw(V, A, x_val, label, node_order)
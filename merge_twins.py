@@ -0,0 +1,119 @@
+"""
+交差削減の前処理として、同じ層で隣接関係が等しいノード（ツイン）を併合する関数
+
+同じ層にあり、上下の層の隣接ノードとエッジ重みがまったく等しいノード同士は、
+互いの相対順序を入れ替えても交差数が変わらない。
+そこでツインを1つの重み付きスーパーノードにまとめてから交差削減を行い、
+得られた順序の中でスーパーノードを連続した位置に展開し直す。
+
+使用例:
+    from merge_twins import merge_twins, expand_twins
+    from formulas.intersection_reduction import intersection_reduction
+
+    V_r, E_r, w_r, members, stats = merge_twins(V_layers, E_layers, w)
+    order = expand_twins(intersection_reduction(V_r, E_r, w_r), members)
+"""
+
+from array import array
+from collections import defaultdict
+
+
+def _model_size(V_layers, E_layers):
+    """交差削減モデルの規模（ノード・順序ペア・3つ組・エッジ・エッジペア数）"""
+    size = {"nodes": 0, "pairs": 0, "triples": 0, "edges": 0, "edge_pairs": 0}
+    for nodes in V_layers.values():
+        k = len(nodes)
+        size["nodes"] += k
+        size["pairs"] += k * (k - 1)
+        size["triples"] += k * (k - 1) * (k - 2)
+    for edges in E_layers.values():
+        k = len(edges)
+        size["edges"] += k
+        size["edge_pairs"] += k * (k - 1) // 2
+    return size
+
+
+def merge_twins(V_layers, E_layers, w):
+    """
+    ツインノードを重み付きスーパーノードに併合
+
+    併合後のエッジの重みは、まとめられた元のエッジの重みの和になる。
+    ツインは上下の隣接ノードごとの重みまで等しいものに限るので、
+    併合後のモデルの交差重みは元のモデルと（定数項を除き）一致する。
+
+    Args:
+        V_layers: 各層のノード dict[int: list[int]]
+        E_layers: 層kから層k+1へのエッジ dict[int: list[tuple(int, int)]]
+        w: エッジ重み dict[(int,int): float]
+
+    Returns:
+        V_merged: 併合後の各層のノード dict[int: list[int]]
+        E_merged: 併合後のエッジ dict[int: list[tuple(int, int)]]
+        w_merged: 併合後のエッジ重み dict[(int,int): float]
+        members: 各スーパーノードが表すノード（層内の順） dict[int: list[int]]
+        stats: 併合前後のモデル規模 dict[str: dict[str: int]]
+    """
+    # 各ノードの上下の隣接ノードと重み
+    upper = defaultdict(list)
+    lower = defaultdict(list)
+    for k, edges in E_layers.items():
+        for u, v in dict.fromkeys(edges):
+            weight = w.get((u, v), 1.0)
+            lower[u].append((v, weight))
+            upper[v].append((u, weight))
+
+    # 隣接関係が等しいノードをグループ化（代表は層内で最初に現れるノード）
+    rep = {}
+    members = {}
+    V_merged = {}
+    for k, nodes in V_layers.items():
+        groups = {}
+        V_merged[k] = []
+        for v in nodes:
+            key = (frozenset(upper[v]), frozenset(lower[v]))
+            r = groups.get(key)
+            if r is None:
+                r = groups[key] = v
+                members[r] = []
+                V_merged[k].append(r)
+            members[r].append(v)
+            rep[v] = r
+
+    # エッジを代表ノード間のエッジにまとめ、重みを合計する
+    E_merged = {}
+    w_merged = {}
+    for k, edges in E_layers.items():
+        E_merged[k] = []
+        for u, v in dict.fromkeys(edges):
+            e = (rep.get(u, u), rep.get(v, v))
+            if e not in w_merged:
+                w_merged[e] = 0.0
+                E_merged[k].append(e)
+            w_merged[e] += w.get((u, v), 1.0)
+
+    stats = {
+        "before": _model_size(V_layers, E_layers),
+        "after": _model_size(V_merged, E_merged),
+    }
+
+    return V_merged, E_merged, w_merged, members, stats
+
+
+def expand_twins(order, members):
+    """
+    スーパーノードの順序を元のノードの順序に展開
+
+    Args:
+        order: 併合後の各層の順序 dict[int: array('i') | list[int]]
+        members: merge_twins が返したスーパーノードの構成 dict[int: list[int]]
+
+    Returns:
+        order: 元のノードの各層の順序 dict[int: array('i')]
+    """
+    expanded = {}
+    for k, nodes in order.items():
+        layer = array("i")
+        for r in nodes:
+            layer.extend(members.get(r, [r]))
+        expanded[k] = layer
+    return expanded
@@ -0,0 +1,424 @@
+"""
+多段階（粗視化・詳細化）による大規模グラフの階層割当
+
+torus() や定式化はノード数が数百を超えると解けなくなるので、次の手順で解く。
+
+    1. 粗視化: 重いエッジから順にノードを対にして（マッチング）縮約することを、
+       ノード数が coarsest 以下になるか、ほとんど減らなくなるまで繰り返す
+       （新しい閉路を作る縮約はしないので、最も粗いグラフが coarsest より大きいこともある）
+    2. 最も粗いグラフを torus() / pg / 最長路で厳密に解く
+       （粗視化が止まって coarsest より大きいまま残った場合、torus() は解けないので
+       閉路を除いた最長路による階層割当から始めて、次の局所探索だけで改善する）
+    3. 射影と詳細化: 粗いグラフの階層を1段ずつ細かいグラフに戻し、
+       各段で制約を満たすように修復してから局所探索で改善する
+       （torus では local_search.LocalSearch、それ以外は refine()）
+
+縮約したノードは、元のノードの階層差を固定した「硬い」まとまりとして扱う。
+エッジ (u, v) で対にしたときは y[v] = y[u] + lam[(u, v)] に固定し、
+粗いエッジの最小階層差は、ずらし幅の差を足して通常辺の向きで満たすように決める。
+戻した階層割当がトーラス辺の向きで制約を満たさない場合は、repair() で
+ノードの上下関係を保ったまま必要なだけ上の階層へ押し上げてから局所改善する。
+
+自己ループは無視する。
+
+使用例:
+    from multilevel import multilevel
+
+    y_val, t_val, L = multilevel(V, A, solver="torus", coarsest=60, verbose=False)
+"""
+
+import math
+import random
+from collections import defaultdict, deque
+
+from local_search import LocalSearch, repair
+from solve_stats import start_record
+
+# 最も粗いグラフのノード数の上限
+COARSEST = 60
+
+# 1段の粗視化でノード数がこの割合より減らなければ粗視化をやめる
+MIN_REDUCTION = 0.9
+
+SOLVERS = ("torus", "pg", "longest")
+
+
+def coarsen(n, edges, rng):
+    """
+    重いエッジのマッチングで1段粗視化
+
+    閉路を除いた DAG の最長路の段数を level として、次のエッジ u→x だけを縮約する
+    （どちらも新しい閉路を作らない）。
+        - x に入るエッジが u からだけか、u から出るエッジが x へだけ
+        - level[x] = level[u] + 1 で、同じ段のほかの対との間に u→(対の上) や
+          (対の下)→x のエッジがない（u から x への長さ2以上の道がない）
+
+    Args:
+        n: ノード数（ノードは 0..n-1）
+        edges: エッジ dict[(a, b): (w, lam, k)]（k はまとめた元のエッジの本数）
+        rng: random.Random
+
+    Returns:
+        n_c: 粗いグラフのノード数
+        edges_c: 粗いグラフのエッジ dict[(A, B): (w, lam, k)]
+        parent: 各ノードの粗いノード list[int]
+        offset: 粗いノードの階層からのずらし幅 list[int]
+    """
+    from remove_cycles import remove_cycles
+
+    kept = remove_cycles(list(range(n)), list(edges))
+    level = longest_layers(n, {e: (1, 1, 1) for e in kept})
+    succ = [[] for _ in range(n)]
+    pred = [[] for _ in range(n)]
+    for a, b in kept:
+        succ[a].append(b)
+        pred[b].append(a)
+
+    # adj[u]: (重み, -lam, 始点, 終点)
+    adj = [[] for _ in range(n)]
+    for (a, b), (w, lam, _) in edges.items():
+        # 逆向きのエッジもある対は縮約しない（トーラス辺が固定されてしまう）
+        if (b, a) in edges:
+            continue
+        safe = len(pred[b]) == 1 or len(succ[a]) == 1
+        tight = level[b] == level[a] + 1
+        if safe or tight:
+            adj[a].append((w, -lam, a, b))
+            adj[b].append((w, -lam, a, b))
+
+    # level の差だけで選んだ対の下 (1) と上 (2)
+    role = [0] * n
+
+    def crossing(a, b):
+        return any(role[z] == 2 and level[z] == level[b] for z in succ[a]) or any(
+            role[z] == 1 and level[z] == level[a] for z in pred[b]
+        )
+
+    parent = [-1] * n
+    offset = [0] * n
+    n_c = 0
+    order = list(range(n))
+    rng.shuffle(order)
+    for u in order:
+        if parent[u] >= 0:
+            continue
+        parent[u] = n_c
+        best = None
+        for item in sorted(adj[u], reverse=True):
+            _, neg_lam, a, b = item
+            if parent[b if a == u else a] >= 0:
+                continue
+            if len(pred[b]) == 1 or len(succ[a]) == 1 or not crossing(a, b):
+                best = item
+                break
+        if best is not None:
+            # y[b] = y[a] + lam に固定する
+            _, neg_lam, a, b = best
+            parent[a] = parent[b] = n_c
+            offset[b] = offset[a] - neg_lam
+            if not (len(pred[b]) == 1 or len(succ[a]) == 1):
+                role[a], role[b] = 1, 2
+        n_c += 1
+
+    edges_c = {}
+    for (a, b), (w, lam, k) in edges.items():
+        A, B = parent[a], parent[b]
+        if A == B:
+            continue
+        lam_c = max(1, lam + offset[a] - offset[b])
+        if (A, B) in edges_c:
+            w_c, lam_old, k_c = edges_c[(A, B)]
+            edges_c[(A, B)] = (w_c + w, max(lam_old, lam_c), k_c + k)
+        else:
+            edges_c[(A, B)] = (w, lam_c, k)
+
+    return n_c, edges_c, parent, offset
+
+
+def longest_layers(n, edges):
+    """
+    最小階層差を考慮した最長路による階層割当（DAG のみ）
+
+    Args:
+        n: ノード数（ノードは 0..n-1）
+        edges: エッジ dict[(a, b): (w, lam, k)]（k はまとめた元のエッジの本数）
+
+    Returns:
+        y: 各ノードの階層 list[int]
+    """
+    succ = [[] for _ in range(n)]
+    indeg = [0] * n
+    for (a, b), (_, lam, _) in edges.items():
+        succ[a].append((b, lam))
+        indeg[b] += 1
+
+    y = [0] * n
+    queue = deque(v for v in range(n) if indeg[v] == 0)
+    visited = 0
+    while queue:
+        a = queue.popleft()
+        visited += 1
+        for b, lam in succ[a]:
+            y[b] = max(y[b], y[a] + lam)
+            indeg[b] -= 1
+            if indeg[b] == 0:
+                queue.append(b)
+    if visited < n:
+        raise ValueError("閉路を含むグラフは最長路で階層割当できません")
+    return y
+
+
+def _cyclic_longest_layers(n, edges):
+    """閉路を除いた DAG の最長路による階層割当（除いたエッジはトーラス辺になる）"""
+    from remove_cycles import remove_cycles
+
+    kept = remove_cycles(list(range(n)), list(edges))
+    y = longest_layers(n, {e: edges[e] for e in kept})
+    repair(n, edges, y)
+    return y
+
+
+def _solve_coarsest(solver, n, edges, params):
+    """最も粗いグラフを厳密に解く"""
+    if solver == "longest":
+        return longest_layers(n, edges)
+
+    from decompose import solve_component
+
+    A = list(edges)
+    w = {e: edges[e][0] for e in A}
+    lam = {e: edges[e][1] for e in A}
+    if solver == "torus":
+        from remove_cycles import remove_cycles
+
+        # Big-M（階層の上限）は torus() と同じノード数を基本に、粗いエッジの
+        # 最小階層差で必要になる階層数（閉路を除いた最長路）までは広げる
+        kept = remove_cycles(list(range(n)), A)
+        height = max(longest_layers(n, {e: edges[e] for e in kept}), default=0)
+        # 粗いエッジがトーラス辺になると、まとめた元のエッジがすべてトーラス辺になる
+        params = dict(
+            params,
+            M=max(n, height + max(lam.values(), default=1) + 1),
+            t_weight={e: edges[e][2] for e in A},
+        )
+    y_val, _, _ = solve_component((solver, list(range(n)), A, w, lam, params))
+    if not y_val:
+        raise RuntimeError(f"最も粗いグラフ（{n} ノード）を解けませんでした")
+    return [y_val[v] for v in range(n)]
+
+
+def _weighted_median(points):
+    points.sort()
+    half = sum(w for _, w in points) / 2
+    total = 0
+    for target, w in points:
+        total += w
+        if total >= half:
+            return target
+    return points[-1][0]
+
+
+def refine(n, edges, y, power=2, M=None, sweeps=4):
+    """
+    ノードを1つずつ動かす局所改善
+
+    各エッジがトーラス辺かどうか（y[u] > y[v]）と最大の階層を変えない範囲で、
+    Σ w*(スパン)^power が最小になる階層へノードを動かす。
+    スパンは通常辺が y[v]-y[u]、トーラス辺が y[v]-y[u]+M。
+
+    Args:
+        n: ノード数（ノードは 0..n-1）
+        edges: エッジ dict[(a, b): (w, lam, k)]（k はまとめた元のエッジの本数）
+        y: 各ノードの階層 list[int]（実行可能な階層割当。書き換える）
+        power: スパンの指数 1 または 2 (デフォルト: 2)
+        M: トーラス辺のスパンに加える定数 (デフォルト: ノード数)
+        sweeps: 全ノードを見直す回数の上限 (デフォルト: 4)
+
+    Returns:
+        moved: 動かしたノードの数 int
+    """
+    if M is None:
+        M = n
+    in_adj = [[] for _ in range(n)]
+    out_adj = [[] for _ in range(n)]
+    for (a, b), (w, lam, _) in edges.items():
+        out_adj[a].append((b, w, lam))
+        in_adj[b].append((a, w, lam))
+
+    top = max(y, default=0)
+    moved = 0
+    for _ in range(sweeps):
+        moved_in_sweep = 0
+        for v in range(n):
+            y_v = y[v]
+            lo, hi = 0, top
+            # (目標の階層, 重み): スパンは |y - 目標| になる
+            points = []
+            for u, w, lam in in_adj[v]:
+                # lam が 0 なら同じ階層でも通常辺
+                if y[u] < y_v or (y[u] == y_v and not lam):
+                    lo = max(lo, y[u] + lam)
+                    points.append((y[u], w))
+                else:
+                    hi = min(hi, y[u] - lam)
+                    points.append((y[u] - M, w))
+            for x, w, lam in out_adj[v]:
+                if y_v < y[x] or (y_v == y[x] and not lam):
+                    hi = min(hi, y[x] - lam)
+                    points.append((y[x], w))
+                else:
+                    lo = max(lo, y[x] + lam)
+                    points.append((y[x] + M, w))
+            if not points or lo >= hi:
+                continue
+
+            if power == 1:
+                best = _weighted_median(points)
+                candidates = (best,)
+            else:
+                best = sum(t * w for t, w in points) / sum(w for _, w in points)
+                candidates = (math.floor(best), math.floor(best) + 1)
+
+            def cost(k):
+                return sum(w * abs(k - t) ** power for t, w in points)
+
+            current = cost(y_v)
+            for k in candidates:
+                k = min(max(k, lo), hi)
+                c = cost(k)
+                if c < current:
+                    y_v, current = k, c
+            if y_v != y[v]:
+                y[v] = y_v
+                moved_in_sweep += 1
+
+        moved += moved_in_sweep
+        if not moved_in_sweep:
+            break
+    return moved
+
+
+def multilevel(
+    V,
+    A,
+    w=None,
+    lam=None,
+    solver="torus",
+    coarsest=COARSEST,
+    sweeps=4,
+    time_limit=None,
+    seed=0,
+    stats=None,
+    verbose=True,
+    **params,
+):
+    """
+    多段階の粗視化・詳細化による階層割当
+
+    solver="torus" の結果の階層は torus() と同じ 0..M-1 に収まる（上下関係を保って
+    詰めても収まらない場合は ValueError）。
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+        w: エッジ重み dict (デフォルト: すべて1)
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+        solver: 最も粗いグラフの解き方
+            "torus": torus()（詳細化では local_search で torus() の目的関数を小さくする）
+            "pg": pg（DAG のみ。詳細化ではスパンの和を小さくする）
+            "longest": 最小階層差を考慮した最長路（DAG のみ。Gurobi を使わない）
+        coarsest: 最も粗いグラフのノード数の上限 (デフォルト: 60)
+            （solver="torus" で粗視化がこれより大きいまま止まったときは、
+            最も粗いグラフを torus() ではなく最長路と局所探索で解く）
+        sweeps: 各段の詳細化で全ノードを見直す回数の上限 (デフォルト: 4)
+        time_limit: torus の各段の局所探索の時間の上限（秒） (デフォルト: なし)
+        seed: マッチングの順番の乱数シード (デフォルト: 0)
+        stats: 計測結果を記録する SolveStats (デフォルト: 記録しない)
+        verbose: False のとき Gurobi のログと失敗時の出力を抑える (デフォルト: True)
+        **params: torus() に渡すその他の引数（alpha / beta / gamma）
+
+    Returns:
+        y_val: 各ノードの階層 dict
+        t_val: 各エッジがトーラス辺か dict
+        L: レイヤー集合 dict[int: list]
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"未知の解法: {solver}")
+
+    record = start_record(stats, "multilevel")
+    index = {v: i for i, v in enumerate(V)}
+    n = len(V)
+    edges = {}
+    for e in A:
+        a, b = index[e[0]], index[e[1]]
+        if a != b:
+            edges[(a, b)] = (
+                1 if w is None else w[e],
+                1 if lam is None else lam[e],
+                1,
+            )
+
+    # ========== 粗視化 ==========
+
+    rng = random.Random(seed)
+    levels = []
+    sizes = [n]
+    n_c, edges_c = n, edges
+    while n_c > coarsest:
+        n_next, edges_next, parent, offset = coarsen(n_c, edges_c, rng)
+        if n_next > MIN_REDUCTION * n_c:
+            break
+        levels.append((n_c, edges_c, parent, offset))
+        n_c, edges_c = n_next, edges_next
+        sizes.append(n_c)
+    record.lap("coarsen")
+
+    # ========== 最も粗いグラフを解く ==========
+
+    params = dict(params, stats=stats, verbose=verbose)
+    if solver == "pg":
+        params = {"stats": stats, "verbose": verbose}
+    if solver == "torus" and n_c > coarsest:
+        # 粗視化が止まったグラフは torus() では解けない大きさなので、
+        # 最長路から始めて下の局所探索に任せる
+        y = _cyclic_longest_layers(n_c, edges_c)
+        coarsest_solve = "longest"
+    else:
+        y = _solve_coarsest(solver, n_c, edges_c, params)
+        coarsest_solve = solver
+    record.lap("coarsest")
+
+    # ========== 射影と詳細化 ==========
+
+    # 詳細化では、トーラス辺のスパンを元のグラフと同じ M で測る
+    M = params.get("M", n)
+    weights = {k: params[k] for k in ("alpha", "beta", "gamma") if k in params}
+
+    def improve(n_f, edges_f, y):
+        if solver != "torus":
+            return refine(n_f, edges_f, y, 1 if solver == "pg" else 2, M, sweeps)
+        search = LocalSearch(n_f, edges_f, y, M=M, **weights)
+        search.improve(time_limit, max_passes=sweeps, seed=seed)
+        return search.moves + search.block_moves
+
+    moved = improve(n_c, edges_c, y)
+    raised = 0
+    for n_f, edges_f, parent, offset in reversed(levels):
+        y = [y[parent[v]] + offset[v] for v in range(n_f)]
+        raised += repair(n_f, edges_f, y, M if solver == "torus" else None)
+        moved += improve(n_f, edges_f, y)
+    record.lap("refine")
+    if solver == "torus" and max(y, default=0) > M - 1:
+        # local_search() と同じく、torus() の階層の範囲に収まらなければエラー
+        raise ValueError(f"階層が torus() の上限 {M - 1} を超えます")
+    record.note(
+        levels=sizes, coarsest_solve=coarsest_solve, raised=raised, moved=moved
+    )
+    record.finish()
+
+    y_val = {v: y[index[v]] for v in V}
+    t_val = {e: y_val[e[0]] > y_val[e[1]] for e in A if e[0] != e[1]}
+    L = defaultdict(list)
+    for v in V:
+        L[y_val[v]].append(v)
+    return y_val, t_val, L
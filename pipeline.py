@@ -0,0 +1,490 @@
+"""
+グラフの読み込みから描画までを通して実行するパイプライン
+
+エッジリストまたは GraphML を読み込み、次の段階を順に実行する。
+
+    1. cycles: 閉路の扱い
+        remove: remove_cycles で閉路を除去 / torus: torus() で階層割当まで行う / none: 何もしない
+    2. layering: 階層割当 (pg / pg2 / pq / pl / longest / cg)（cycles=torus のときは省略）
+    3. dummy: 長いエッジにダミーノードを挿入
+    4. crossing: 交差削減 (ilp: ツイン併合 + intersection_reduction / none: ノード番号順)
+    5. coordinates: Brandes–Köpf法による座標割当 (bk / none)
+    6. render: 出力の拡張子で形式を決めて書き出す (.svg / .json / .png / .pdf など)
+
+各段階の経過時間とメモリ使用量（プロセスの最大常駐メモリ、--trace-memory のときは
+段階内で Python が確保したメモリの最大値）を記録する。
+入力にディレクトリを指定すると、中のグラフを1つずつ読み込んで処理する。
+
+入力形式:
+    エッジリスト: 1行に "u v [w [lam]]"（# 以降はコメント）。ノードのラベルは任意の文字列
+    GraphML: 拡張子 .graphml（エッジの weight / lam 属性を w / lam として読む）
+
+使用例:
+    python pipeline.py graph.txt -o fig/graph.svg
+    python pipeline.py graphs/ -o fig/ --cycles torus --stats stats.jsonl --quiet
+    python pipeline.py graphs/ --layouts layouts.ndjson --quiet
+    cat graph.txt | python pipeline.py - -o fig/graph.json --layering longest
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from coordinates import assign_coordinates
+from dummy_nodes import insert_dummy_nodes, layered_edges
+from layout_writer import layout_record, open_layout_writer
+from merge_twins import merge_twins, expand_twins
+from remove_cycles import remove_cycles
+from solve_stats import SolveStats, start_record
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 入力として読み込む拡張子
+GRAPH_SUFFIXES = (".txt", ".edges", ".el", ".graphml")
+
+LAYERINGS = ("pg", "pg2", "pq", "pl", "longest", "cg")
+
+
+# ========== 入力 ==========
+
+
+class _Labels:
+    """任意のラベルに 0, 1, 2, ... の番号を付ける"""
+
+    def __init__(self):
+        self.index = {}
+        self.labels = []
+
+    def __call__(self, label):
+        i = self.index.get(label)
+        if i is None:
+            i = self.index[label] = len(self.labels)
+            self.labels.append(label)
+        return i
+
+
+def read_edge_list(f):
+    """
+    エッジリストを読み込む
+
+    Args:
+        f: テキストファイルオブジェクト（1行に "u v [w [lam]]"）
+
+    Returns:
+        graph: {"V", "A", "w", "lam", "labels"}
+            V は 0 から始まる番号、labels[i] が番号 i の元のラベル
+    """
+    label = _Labels()
+    A = []
+    w = {}
+    lam = {}
+
+    for line in f:
+        line = line.split("#", 1)[0].split()
+        if not line:
+            continue
+        if len(line) == 1:
+            label(line[0])
+            continue
+
+        e = (label(line[0]), label(line[1]))
+        if e not in w:
+            A.append(e)
+        w[e] = float(line[2]) if len(line) > 2 else 1
+        lam[e] = int(line[3]) if len(line) > 3 else 1
+
+    return {
+        "V": list(range(len(label.labels))),
+        "A": A,
+        "w": w,
+        "lam": lam,
+        "labels": label.labels,
+    }
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def read_graphml(f):
+    """
+    GraphML を読み込む（要素を1つずつ処理して捨てるので大きなファイルも読める）
+
+    Args:
+        f: パスまたはバイナリファイルオブジェクト
+
+    Returns:
+        graph: {"V", "A", "w", "lam", "labels"}（read_edge_list と同じ）
+    """
+    label = _Labels()
+    A = []
+    w = {}
+    lam = {}
+
+    # <key id="d0" for="edge" attr.name="weight"> の id から属性名への対応
+    key_names = {}
+
+    for _, elem in ET.iterparse(f, events=("end",)):
+        tag = _local(elem.tag)
+        if tag == "key":
+            key_names[elem.get("id")] = elem.get("attr.name", elem.get("id"))
+        elif tag == "node":
+            label(elem.get("id"))
+            elem.clear()
+        elif tag == "edge":
+            e = (label(elem.get("source")), label(elem.get("target")))
+            data = {
+                key_names.get(d.get("key"), d.get("key")): d.text
+                for d in elem
+                if _local(d.tag) == "data"
+            }
+            if e not in w:
+                A.append(e)
+            w[e] = float(data.get("weight", 1))
+            lam[e] = int(data.get("lam", 1))
+            elem.clear()
+
+    return {
+        "V": list(range(len(label.labels))),
+        "A": A,
+        "w": w,
+        "lam": lam,
+        "labels": label.labels,
+    }
+
+
+def read_graph(path):
+    """
+    拡張子に応じてグラフを読み込む（"-" は標準入力のエッジリスト）
+    """
+    if path == "-":
+        return read_edge_list(sys.stdin)
+    if path.endswith(".graphml"):
+        return read_graphml(path)
+    with open(path, encoding="utf-8") as f:
+        return read_edge_list(f)
+
+
+def iter_graphs(path):
+    """
+    入力のグラフを1つずつ読み込む
+
+    Args:
+        path: ファイル・ディレクトリのパス、または "-"（標準入力）
+
+    Yields:
+        name: グラフの名前（拡張子を除いたファイル名） str
+        graph: read_graph の結果
+    """
+    if path != "-" and os.path.isdir(path):
+        entries = sorted(
+            entry.path
+            for entry in os.scandir(path)
+            if entry.is_file() and entry.name.endswith(GRAPH_SUFFIXES)
+        )
+        for entry in entries:
+            yield os.path.splitext(os.path.basename(entry))[0], read_graph(entry)
+    else:
+        name = "stdin" if path == "-" else os.path.splitext(os.path.basename(path))[0]
+        yield name, read_graph(path)
+
+
+# ========== 各段階 ==========
+
+
+def _max_rss_kb():
+    """プロセスの最大常駐メモリ (KB)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+@contextmanager
+def _stage(record, name, memory, trace_memory):
+    """段階の経過時間とメモリ使用量を記録"""
+    if trace_memory:
+        tracemalloc.reset_peak()
+    with record.stage(name):
+        yield
+    entry = {"max_rss_kb": _max_rss_kb()}
+    if trace_memory:
+        entry["traced_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+    memory[name] = entry
+
+
+def longest_path_layers(V, A, lam=None):
+    """
+    最長路による階層割当（Gurobi を使わない）
+
+    各ノードを、先行ノードの階層 + エッジの最小階層差のうち最大の階層に置く。
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]（DAG）
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+
+    Returns:
+        layer: 各ノードの階層 dict[int: int]
+    """
+    succ = defaultdict(list)
+    indeg = {v: 0 for v in V}
+    for u, v in A:
+        succ[u].append(v)
+        indeg[v] += 1
+
+    layer = {v: 0 for v in V}
+    queue = deque(v for v in V if indeg[v] == 0)
+    while queue:
+        u = queue.popleft()
+        for v in succ[u]:
+            layer[v] = max(layer[v], layer[u] + (1 if lam is None else lam[(u, v)]))
+            indeg[v] -= 1
+            if indeg[v] == 0:
+                queue.append(v)
+    return layer
+
+
+def _layering(name, V, A, w, lam, stats, verbose, width=None):
+    if name == "longest":
+        return longest_path_layers(V, A, lam)
+
+    heads = {v for _, v in A}
+    tails = {u for u, _ in A}
+    V0 = [i for i in V if i not in heads]
+    Vl = [i for i in V if i not in tails]
+    if name == "cg":
+        from formulas.coffman_graham import cg
+
+        return cg("CG", V, A, w, lam, V0, Vl, stats=stats, verbose=verbose, width=width)
+
+    from formulas import p_g, p_g2, p_q, p_l
+
+    func = {"pg": p_g.pg, "pg2": p_g2.pg2, "pq": p_q.pq, "pl": p_l.pl}[name]
+    return func(name.upper(), V, A, w, lam, V0, Vl, stats=stats, verbose=verbose)
+
+
+def _render(out, V, A, L, pos):
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    if out.endswith(".svg"):
+        from svg_writer import write_svg
+
+        write_svg(out, V, A, L, pos=pos)
+    elif out.endswith(".json"):
+        from svg_writer import write_json
+
+        write_json(out, V, A, L, pos=pos)
+    else:
+        from draw_torus import render_torus
+
+        render_torus(V, A, L, out, pos=pos)
+
+
+def run_pipeline(
+    graph,
+    name="graph",
+    cycles="remove",
+    layering="pl",
+    width=None,
+    crossing="ilp",
+    coordinates="bk",
+    out=None,
+    stats=None,
+    verbose=True,
+    trace_memory=False,
+):
+    """
+    1つのグラフについてパイプラインを実行
+
+    Args:
+        graph: {"V", "A", "w", "lam"}（read_graph の結果など）
+        name: 記録に使うグラフの名前
+        cycles: 閉路の扱い "remove" / "torus" / "none"
+        layering: 階層割当 "pg" / "pg2" / "pq" / "pl" / "longest" / "cg"
+        width: layering="cg" のときの1階層あたりのノード数の上限
+            (デフォルト: ノード数の平方根を切り上げた値)
+        crossing: 交差削減 "ilp" / "none"
+        coordinates: 座標割当 "bk" / "none"
+        out: 出力先のパス (デフォルト: 書き出さない)
+        stats: 記録を追加する SolveStats (デフォルト: 記録しない)
+        verbose: False のとき Gurobi のログを出力しない
+        trace_memory: 段階ごとに Python が確保したメモリを計測する（遅くなる）
+
+    Returns:
+        layout: {"V", "A", "layer", "L", "dummy", "pos", "torus", "stages", "memory"}
+            V, A, layer, L はダミーノードを含む
+    """
+    V = list(graph["V"])
+    A = [(u, v) for u, v in graph["A"] if u != v]
+    w = {e: graph.get("w", {}).get(e, 1) for e in A}
+    lam = {e: graph.get("lam", {}).get(e, 1) for e in A}
+
+    # stats がなくても段階の時間を返せるように、パイプライン自体の記録は常に取る
+    record = start_record(stats if stats is not None else SolveStats(), name)
+    record.note(nodes=len(V), edges=len(A))
+    memory = {}
+    is_torus = cycles == "torus"
+
+    if trace_memory:
+        tracemalloc.start()
+
+    try:
+        with _stage(record, "cycles", memory, trace_memory):
+            if cycles == "remove":
+                A = remove_cycles(V, A)
+            elif is_torus:
+                from torus import torus
+
+                layer, _, _ = torus(V, A, w, lam, stats=stats, verbose=verbose)
+
+        if not is_torus:
+            with _stage(record, "layering", memory, trace_memory):
+                layer = _layering(layering, V, A, w, lam, stats, verbose, width)
+
+        if len(layer) < len(V):
+            raise RuntimeError(f"{name}: 階層割当に失敗しました")
+
+        with _stage(record, "dummy", memory, trace_memory):
+            V2, A2, layer2, dummy, chains = insert_dummy_nodes(
+                V, A, layer, torus=is_torus
+            )
+            w2 = {}
+            for e, path in chains.items():
+                for p, q in zip(path, path[1:]):
+                    w2[(p, q)] = w2[(q, p)] = w[e]
+            V_layers, E_layers = layered_edges(V2, A2, layer2)
+
+        with _stage(record, "crossing", memory, trace_memory):
+            if crossing == "ilp" and any(E_layers.values()):
+                from formulas.intersection_reduction import intersection_reduction
+
+                V_m, E_m, w_m, members, sizes = merge_twins(V_layers, E_layers, w2)
+                order = intersection_reduction(
+                    V_m, E_m, w_m, stats=stats, verbose=verbose
+                )
+                order = expand_twins(order, members)
+                L = {k: list(order[k]) for k in sorted(order)}
+                record.note(twins=sizes)
+            else:
+                L = {k: sorted(V_layers[k]) for k in sorted(V_layers)}
+
+        with _stage(record, "coordinates", memory, trace_memory):
+            if coordinates == "bk":
+                pos = assign_coordinates(L, A2, dummy=dummy, torus=is_torus)
+            else:
+                pos = None
+
+        if out is not None:
+            with _stage(record, "render", memory, trace_memory):
+                _render(out, V, A2, L, pos)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    record.note(memory=memory)
+    record.finish()
+
+    return {
+        "V": V2,
+        "A": A2,
+        "layer": layer2,
+        "L": L,
+        "dummy": dummy,
+        "pos": pos,
+        "torus": is_torus,
+        "stages": record.data["stages"],
+        "memory": memory,
+    }
+
+
+# ========== コマンドライン ==========
+
+
+def _output_path(out, name, fmt, is_dir):
+    if out is None:
+        return None
+    if is_dir:
+        return os.path.join(out, f"{name}.{fmt}")
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="グラフを読み込み、階層割当から描画までを実行する"
+    )
+    parser.add_argument("input", help="入力ファイル・ディレクトリ、または - (標準入力)")
+    parser.add_argument(
+        "-o", "--out", help="出力ファイル（入力がディレクトリなら出力ディレクトリ）"
+    )
+    parser.add_argument(
+        "--format", default="svg", help="出力ディレクトリに書き出す形式 (デフォルト: svg)"
+    )
+    parser.add_argument(
+        "--cycles", choices=("remove", "torus", "none"), default="remove"
+    )
+    parser.add_argument("--layering", choices=LAYERINGS, default="pl")
+    parser.add_argument(
+        "--width", type=int, help="--layering cg のときの1階層あたりのノード数の上限"
+    )
+    parser.add_argument("--crossing", choices=("ilp", "none"), default="ilp")
+    parser.add_argument("--coordinates", choices=("bk", "none"), default="bk")
+    parser.add_argument("--stats", help="記録を追記する JSONL ファイル")
+    parser.add_argument(
+        "--layouts", help="レイアウトを書き足す .ndjson / .parquet ファイル"
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="段階ごとの確保メモリを計測する"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="ログを出力しない")
+    args = parser.parse_args(argv)
+
+    is_dir = args.input != "-" and os.path.isdir(args.input)
+    stats = SolveStats(path=args.stats)
+
+    writer = open_layout_writer(args.layouts) if args.layouts else None
+
+    try:
+        for name, graph in iter_graphs(args.input):
+            start = time.perf_counter()
+            layout = run_pipeline(
+                graph,
+                name=name,
+                cycles=args.cycles,
+                layering=args.layering,
+                width=args.width,
+                crossing=args.crossing,
+                coordinates=args.coordinates,
+                out=_output_path(args.out, name, args.format, is_dir),
+                stats=stats,
+                verbose=not args.quiet,
+                trace_memory=args.trace_memory,
+            )
+            if writer is not None:
+                writer.write(layout_record(name, layout, labels=graph["labels"]))
+            if not args.quiet:
+                stages = " ".join(f"{k}={v:.3f}s" for k, v in layout["stages"].items())
+                rss = max(
+                    (m["max_rss_kb"] or 0 for m in layout["memory"].values()),
+                    default=0,
+                )
+                print(
+                    f"{name}: n={len(graph['V'])} m={len(graph['A'])} "
+                    f"total={time.perf_counter() - start:.3f}s {stages} "
+                    f"max_rss={rss / 1024:.1f}MB",
+                    file=sys.stderr,
+                )
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,236 @@
-def dfs(G, pos, remove_edges, vis):
-    vis[pos] = True
-    for i in range(len(G[pos])):
-        print(pos, G[pos])
-        nex = G[pos][i]
-        if vis[nex] == False:
-            dfs(G, nex, remove_edges, vis)
+"""
+閉路を除去してDAGにする関数（フィードバック辺集合の削除）
+
+強連結成分に分解し、各成分の内部で Eades–Lin–Smyth の貪欲法によりノードを並べ、
+その順序で後ろ向きになる辺を取り除く。計算量は O(V+E) で、再帰を使わない。
+小さい強連結成分は、exact_limit を指定すると部分集合DPで最小の辺集合を求める。
+
+使用例:
+    from remove_cycles import remove_cycles
+
+    A = remove_cycles(V, A)  # 残った辺だけのリスト（DAG）
+"""
+
+from collections import defaultdict, deque
+
+
+def strongly_connected_components(V, A):
+    """
+    強連結成分を求める（Tarjan法の非再帰版）
+
+    Args:
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+
+    Returns:
+        components: 強連結成分のリスト list[list]（トポロジカル順の逆順）
+    """
+    adj = defaultdict(list)
+    for u, v in A:
+        adj[u].append(v)
+
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in V:
+        if root in index:
+            continue
+
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(adj[root]))]
+
+        while work:
+            v, it = work[-1]
+            for w in it:
+                if w not in index:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(adj[w])))
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[v])
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def _greedy_order(nodes, succ, pred):
+    """
+    Eades–Lin–Smyth の貪欲法でノードを並べる
+
+    シンクを右端へ、ソースを左端へ順に取り除き、どちらもなければ
+    (出次数 - 入次数) が最大のノードを左端へ取り除く。
+    """
+    outdeg = {v: len(succ[v]) for v in nodes}
+    indeg = {v: len(pred[v]) for v in nodes}
+    alive = set(nodes)
+
+    # 各ノードの分類 ("sink" / "source" / 次数差) と、分類ごとの待ち行列
+    # 分類が変わったノードは新しい待ち行列に追加し、古いものは取り出し時に読み飛ばす
+    state = {}
+    sinks = deque()
+    sources = deque()
+    buckets = defaultdict(deque)
+    max_delta = -len(nodes)
+
+    def classify(v):
+        nonlocal max_delta
+        if outdeg[v] == 0:
+            key = "sink"
+            sinks.append(v)
+        elif indeg[v] == 0:
+            key = "source"
+            sources.append(v)
         else:
-            print("remove", (pos, nex))
-            remove_edges.add((pos, nex))
-            G[pos].remove(nex)
-    vis[pos] = False
+            key = outdeg[v] - indeg[v]
+            buckets[key].append(v)
+            max_delta = max(max_delta, key)
+        state[v] = key
 
+    def pop_valid(queue, key):
+        while queue:
+            v = queue.popleft()
+            if v in alive and state[v] == key:
+                return v
+        return None
 
-def remove_cycles(V, A):
-    n = len(V)
-    G = [[] for _ in range(n)]
-    remove_edges = set()
-    vis = [False] * n
+    def remove(v):
+        alive.discard(v)
+        for w in succ[v]:
+            if w in alive:
+                indeg[w] -= 1
+                classify(w)
+        for u in pred[v]:
+            if u in alive:
+                outdeg[u] -= 1
+                classify(u)
 
+    for v in nodes:
+        classify(v)
+
+    left = []
+    right = []
+    while alive:
+        v = pop_valid(sinks, "sink")
+        if v is not None:
+            right.append(v)
+            remove(v)
+            continue
+
+        v = pop_valid(sources, "source")
+        if v is not None:
+            left.append(v)
+            remove(v)
+            continue
+
+        while True:
+            v = pop_valid(buckets[max_delta], max_delta)
+            if v is not None:
+                break
+            max_delta -= 1
+        left.append(v)
+        remove(v)
+
+    return left + right[::-1]
+
+
+def _exact_order(nodes, succ):
+    """
+    後ろ向きの辺の数が最小になる順序を部分集合DPで求める（O(2^k k)）
+    """
+    k = len(nodes)
+    bit = {v: 1 << i for i, v in enumerate(nodes)}
+
+    # out_edges[i]: ノード i から出る辺の終点のビット（多重辺は本数分数える）
+    out_edges = [[bit[w] for w in succ[v] if w in bit] for v in nodes]
+
+    size = 1 << k
+    best = [None] * size
+    choice = [0] * size
+    best[0] = 0
+    for S in range(size):
+        if best[S] is None:
+            continue
+        for i in range(k):
+            if S & (1 << i):
+                continue
+            # i を S の後ろに置くと、i から S への辺が後ろ向きになる
+            cost = best[S] + sum(1 for b in out_edges[i] if S & b)
+            T = S | (1 << i)
+            if best[T] is None or cost < best[T]:
+                best[T] = cost
+                choice[T] = i
+
+    order = []
+    S = size - 1
+    while S:
+        i = choice[S]
+        order.append(nodes[i])
+        S &= ~(1 << i)
+    return order[::-1]
+
+
+def remove_cycles(V, A, exact_limit=0):
+    """
+    閉路を除去してDAGにする
+
+    Args:
+        V: ノード集合 list（任意のハッシュ可能なラベル）
+        A: エッジ集合 list[tuple]
+        exact_limit: ノード数がこの値以下の強連結成分では、
+            取り除く辺の数が最小になる順序を厳密に求める (デフォルト: 0 = 使わない)
+
+    Returns:
+        A: 取り除かれなかったエッジのリスト（元の順序を保つ）
+    """
+    succ = defaultdict(list)
+    pred = defaultdict(list)
     for u, v in A:
-        G[u].append(v)
+        if u != v:
+            succ[u].append(v)
+            pred[v].append(u)
+
+    remove_edges = set()
+
+    for component in strongly_connected_components(V, A):
+        if len(component) < 2:
+            continue
+
+        members = set(component)
+        c_succ = {v: [w for w in succ[v] if w in members] for v in component}
+        c_pred = {v: [u for u in pred[v] if u in members] for v in component}
+
+        if len(component) <= exact_limit:
+            order = _exact_order(component, c_succ)
+        else:
+            order = _greedy_order(component, c_succ, c_pred)
 
-    for i in range(n):
-        if vis[i] == False:
-            dfs(G, i, remove_edges, vis)
+        rank = {v: i for i, v in enumerate(order)}
+        for v in component:
+            for w in c_succ[v]:
+                if rank[v] > rank[w]:
+                    remove_edges.add((v, w))
 
-    return [a for a in A if a not in remove_edges]
+    return [(u, v) for u, v in A if u != v and (u, v) not in remove_edges]
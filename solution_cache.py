@@ -0,0 +1,349 @@
+"""
+最適化結果の永続キャッシュ
+
+グラフとパラメータを正規化して求めたフィンガープリントをキーとして、
+torus / 階層割当の定式化 (pg, pg2, pq, pl) / intersection_reduction の結果を
+SQLite に保存する。同じグラフを再び解くときは保存された結果を返す。
+
+- ノードやエッジの並び順、エッジの重複、w / lam の省略（すべて1）は
+  フィンガープリントに影響しない
+- WAL モードとロック待ちのタイムアウトにより、複数プロセスから同時に読み書きできる
+- 保存された結果の合計サイズが max_bytes を超えると、最後に使われたのが古いものから削除する
+
+使用例:
+    from solution_cache import SolutionCache, cached_torus
+
+    cache = SolutionCache("./solution_cache.sqlite")
+    y_val, t_val, L = cached_torus(cache, V, A)  # 2回目以降は保存された結果を返す
+"""
+
+import hashlib
+import pickle
+import sqlite3
+import time
+
+# キャッシュの形式を変えたときに上げる（古い結果を使わないようにする）
+CACHE_VERSION = 1
+
+# デフォルトの最大サイズ（バイト）
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def _sorted(items):
+    """任意のラベルを含む要素を決まった順に並べる"""
+    return sorted(items, key=repr)
+
+
+def _normalize_weights(weights, edges):
+    """エッジに対する値を (エッジ, 値) の並びにする（省略時はすべて1）"""
+    if weights is None:
+        return tuple((e, 1) for e in edges)
+    return tuple((e, weights[e]) for e in edges)
+
+
+def fingerprint(kind, V, A, w=None, lam=None, **params):
+    """
+    グラフとパラメータのフィンガープリント
+
+    Args:
+        kind: 問題の種類（"torus"、定式化の名前など） str
+        V: ノード集合 list
+        A: エッジ集合 list[tuple]
+        w: エッジ重み dict (デフォルト: すべて1)
+        lam: エッジの最小階層差 dict (デフォルト: すべて1)
+        **params: 結果に影響するその他のパラメータ
+
+    Returns:
+        key: 16進数の文字列 str
+    """
+    edges = tuple(_sorted(set(A)))
+    data = (
+        CACHE_VERSION,
+        kind,
+        tuple(_sorted(set(V))),
+        edges,
+        _normalize_weights(w, edges),
+        _normalize_weights(lam, edges),
+        tuple(sorted((k, repr(v)) for k, v in params.items())),
+    )
+    return hashlib.sha256(repr(data).encode("utf-8")).hexdigest()
+
+
+def layers_fingerprint(kind, V_layers, E_layers, w, **params):
+    """
+    層ごとのノードとエッジで与えられる問題（交差削減）のフィンガープリント
+
+    Args:
+        kind: 問題の種類 str
+        V_layers: 各層のノード dict[int: list]
+        E_layers: 層kから層k+1へのエッジ dict[int: list[tuple]]
+        w: エッジ重み dict
+        **params: 結果に影響するその他のパラメータ
+
+    Returns:
+        key: 16進数の文字列 str
+    """
+    layers = tuple((k, tuple(_sorted(V_layers[k]))) for k in sorted(V_layers))
+    edges = tuple((k, tuple(_sorted(set(E_layers[k])))) for k in sorted(E_layers))
+    weights = tuple(
+        (e, w[e] if w is not None and e in w else 1) for _, es in edges for e in es
+    )
+    data = (
+        CACHE_VERSION,
+        kind,
+        layers,
+        edges,
+        weights,
+        tuple(sorted((k, repr(v)) for k, v in params.items())),
+    )
+    return hashlib.sha256(repr(data).encode("utf-8")).hexdigest()
+
+
+class SolutionCache:
+    """
+    SQLite による最適化結果のキャッシュ
+
+    Attributes:
+        path: データベースファイルのパス
+        max_bytes: 保存する結果の合計サイズの上限
+        hits: キャッシュから返した回数
+        misses: キャッシュになかった回数
+    """
+
+    def __init__(self, path, max_bytes=MAX_BYTES, timeout=30.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS solutions ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS solutions_accessed ON solutions (accessed)"
+        )
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def __contains__(self, key):
+        row = self._conn.execute(
+            "SELECT 1 FROM solutions WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def total_bytes(self):
+        """保存されている結果の合計サイズ"""
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM solutions"
+        ).fetchone()[0]
+
+    def get(self, key, default=None):
+        """
+        保存された結果を取得（最終使用時刻を更新）
+
+        Returns:
+            value: 保存された結果（なければ default）
+        """
+        row = self._conn.execute(
+            "SELECT value FROM solutions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._conn.execute(
+            "UPDATE solutions SET accessed = ? WHERE key = ?", (time.time(), key)
+        )
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        """結果を保存し、上限を超えた分を古いものから削除"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO solutions (key, value, size, accessed)"
+                " VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self._evict()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM solutions ORDER BY accessed"
+        ).fetchall()
+        remove = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            remove.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM solutions WHERE key = ?", remove)
+
+    def clear(self):
+        self._conn.execute("DELETE FROM solutions")
+
+
+def _solved(value):
+    """
+    求解に成功した結果か
+
+    各ソルバーは失敗すると空の階層割当（torus() なら y_val が空の dict）を返す。
+    エッジのないグラフの t_val のように、空でも正しい結果の要素はあるので、
+    最初の要素だけを見る。
+    """
+    first = value[0] if isinstance(value, tuple) else value
+    return bool(first)
+
+
+def _optimal(records):
+    """記録した Gurobi の求解がすべて最適性を示して終わったか（時間切れの暫定解でないか）"""
+    results = [r["result"] for r in records if "result" in r]
+    if not results:
+        return True
+
+    from gurobipy import GRB
+
+    for result in results:
+        status = result.get("Status")
+        if status == GRB.OPTIMAL:
+            continue
+        # 暫定解が組合せ的な下界に達して止まった場合も最適
+        if status == GRB.USER_OBJ_LIMIT and result.get("SolCount"):
+            continue
+        return False
+    return True
+
+
+def cached(cache, key, solve, stats=None):
+    """
+    キャッシュにあれば保存された結果を、なければ solve() を実行して保存した結果を返す
+
+    最適化に失敗した結果（空の階層割当）は保存しない。
+    stats を指定すると、solve() の間に stats に追加された記録から求解の状態を調べ、
+    最適性が示されなかった結果（時間切れの暫定解など）も保存しない。
+
+    Args:
+        cache: SolutionCache（None ならキャッシュを使わない）
+        key: フィンガープリント str
+        solve: 結果を返す引数なしの関数
+        stats: solve() の中のソルバーに渡した SolveStats (デフォルト: 状態を調べない)
+    """
+    if cache is None:
+        return solve()
+
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    start = 0 if stats is None else len(stats.records)
+    value = solve()
+    ok = _solved(value)
+    if ok and stats is not None:
+        ok = _optimal(stats.records[start:])
+    if ok:
+        cache.put(key, value)
+    return value
+
+
+def cached_torus(cache, V, A, w=None, lam=None, alpha=100, beta=1, gamma=1000):
+    """
+    torus() の結果をキャッシュする
+
+    引数と戻り値は torus() と同じ（先頭に cache を取る）。
+    """
+    from solve_stats import SolveStats
+    from torus import torus
+
+    key = fingerprint("torus", V, A, w, lam, alpha=alpha, beta=beta, gamma=gamma)
+    stats = SolveStats()
+    return cached(
+        cache,
+        key,
+        lambda: torus(
+            V, A, w=w, lam=lam, alpha=alpha, beta=beta, gamma=gamma, stats=stats
+        ),
+        stats,
+    )
+
+
+def cached_layering(cache, formulation, label, V, A, w, lam, V0, Vl):
+    """
+    階層割当の定式化 (pg, pg2, pq, pl) の結果をキャッシュする
+
+    Args:
+        cache: SolutionCache
+        formulation: 定式化の関数（p_g.pg など）
+        その他: 定式化の関数と同じ
+
+    Returns:
+        val: 各ノードの階層 dict
+    """
+    from solve_stats import SolveStats
+
+    key = fingerprint(
+        formulation.__module__ + "." + formulation.__name__,
+        V,
+        A,
+        w,
+        lam,
+        V0=tuple(_sorted(V0)),
+        Vl=tuple(_sorted(Vl)),
+    )
+    stats = SolveStats()
+    return cached(
+        cache,
+        key,
+        lambda: formulation(label, V, A, w, lam, V0, Vl, stats=stats),
+        stats,
+    )
+
+
+def cached_intersection_reduction(cache, V_layers, E_layers, w):
+    """
+    intersection_reduction() の結果をキャッシュする
+
+    Returns:
+        order: 各層のノードを上から並べた配列 dict[int: array('i')]
+    """
+    from formulas.intersection_reduction import intersection_reduction
+    from solve_stats import SolveStats
+
+    key = layers_fingerprint("intersection_reduction", V_layers, E_layers, w)
+    stats = SolveStats()
+    return cached(
+        cache,
+        key,
+        lambda: intersection_reduction(V_layers, E_layers, w, stats=stats),
+        stats,
+    )
@@ -0,0 +1,204 @@
+"""
+最適化の計測（段階ごとの時間とモデルの統計量）
+
+各ソルバー関数 (torus, pg, pg2, pq, pl, intersection_reduction) は stats 引数に
+SolveStats を渡すと、1回の求解ごとに次の記録を追加する。
+
+    {
+        "label": 問題の名前,
+        "stages": {"env": 秒, "build": 秒, "solve": 秒, "extract": 秒},
+        "model": {"NumVars", "NumConstrs", "NumQConstrs", "NumNZs", "NumQNZs",
+                  "NumIntVars", "NumBinVars"},
+        "result": {"Status", "Runtime", "ObjVal", "ObjBound", "MIPGap",
+                   "NodeCount", "IterCount", "SolCount"},
+        "gap": [[経過秒, 暫定解, 下界, ギャップ], ...],
+        ...その他 note() で追加した値
+    }
+
+path を指定すると、記録を1行1つの JSON (JSONL) としてファイルに追記する。
+段階の時間は、ソルバー関数の中で record.lap(段階名) を呼んだ時点の区切りで測る。
+
+使用例:
+    from solve_stats import SolveStats
+    from torus import torus
+
+    stats = SolveStats(path="solve_stats.jsonl")
+    torus(V, A, stats=stats, verbose=False)
+    print(stats.records[-1]["stages"])
+"""
+
+import json
+import math
+import time
+from contextlib import contextmanager
+
+MODEL_ATTRS = (
+    "NumVars",
+    "NumConstrs",
+    "NumQConstrs",
+    "NumNZs",
+    "NumQNZs",
+    "NumIntVars",
+    "NumBinVars",
+)
+
+RESULT_ATTRS = (
+    "Status",
+    "Runtime",
+    "ObjVal",
+    "ObjBound",
+    "MIPGap",
+    "NodeCount",
+    "IterCount",
+    "SolCount",
+)
+
+
+def _attr(m, name):
+    """モデルの属性（取得できない場合は None）"""
+    try:
+        value = getattr(m, name)
+    except Exception:
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class SolveRecord:
+    """
+    1回の求解の記録
+
+    stats が None のときは何も記録しない（計測のコストもかからない）。
+    """
+
+    def __init__(self, stats, label):
+        self.stats = stats
+        self.data = {"label": label, "stages": {}, "gap": []}
+        self._last_gap = None
+        self._lap = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """with ブロックの経過時間を段階 name の時間として記録"""
+        if self.stats is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stages = self.data["stages"]
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+    def lap(self, name):
+        """前回の lap() (または記録の開始) からの経過時間を段階 name の時間として記録"""
+        if self.stats is None:
+            return
+        now = time.perf_counter()
+        stages = self.data["stages"]
+        stages[name] = stages.get(name, 0.0) + now - self._lap
+        self._lap = now
+
+    def model(self, m):
+        """変数・制約・非ゼロ要素の数を記録"""
+        if self.stats is not None:
+            m.update()
+            self.data["model"] = {name: _attr(m, name) for name in MODEL_ATTRS}
+
+    def result(self, m):
+        """求解の状態・目的関数値・探索ノード数などを記録"""
+        if self.stats is not None:
+            self.data["result"] = {name: _attr(m, name) for name in RESULT_ATTRS}
+
+    def note(self, **values):
+        """その他の値を記録"""
+        if self.stats is not None:
+            self.data.update(values)
+
+    @property
+    def callback(self):
+        """MIP ギャップの推移を記録する Gurobi のコールバック（stats が None なら None）"""
+        if self.stats is None:
+            return None
+
+        from gurobipy import GRB
+
+        def callback(model, where):
+            if where != GRB.Callback.MIP:
+                return
+            best = model.cbGet(GRB.Callback.MIP_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+            if (best, bound) == self._last_gap:
+                return
+            self._last_gap = (best, bound)
+
+            runtime = model.cbGet(GRB.Callback.RUNTIME)
+            if abs(best) < GRB.INFINITY:
+                gap = abs(best - bound) / max(abs(best), 1e-10)
+            else:
+                best = None
+                gap = None
+            self.data["gap"].append([runtime, best, bound, gap])
+
+        return callback
+
+    def finish(self):
+        """記録を stats に追加"""
+        if self.stats is not None:
+            self.stats.add(self.data)
+
+
+class SolveStats:
+    """
+    求解の記録の集まり
+
+    Args:
+        path: 記録を追記する JSONL ファイルのパス (デフォルト: メモリ上のみ)
+
+    Attributes:
+        records: 記録のリスト list[dict]
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.records = []
+
+    def record(self, label):
+        """新しい求解の記録を開始"""
+        return SolveRecord(self, label)
+
+    def add(self, data):
+        self.records.append(data)
+        if self.path is not None:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(data, ensure_ascii=False, default=str) + "\n")
+
+    def totals(self):
+        """
+        段階ごとの合計時間
+
+        Returns:
+            totals: dict[str: float]
+        """
+        totals = {}
+        for data in self.records:
+            for name, seconds in data["stages"].items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+
+def start_record(stats, label):
+    """
+    求解の記録を開始（stats が None なら何も記録しない記録を返す）
+
+    Args:
+        stats: SolveStats または None
+        label: 問題の名前 str
+
+    Returns:
+        record: SolveRecord
+    """
+    if stats is None:
+        return SolveRecord(None, label)
+    return stats.record(label)
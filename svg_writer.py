@@ -0,0 +1,217 @@
+"""
+大規模な階層グラフの描画を SVG / JSON に直接書き出す関数
+
+matplotlib や networkx を使わず、ノード・通常エッジ・トーラスの継ぎ目の線分を
+レイアウトを1回走査しながらそのままファイルに書き出す。
+描画要素をメモリ上に保持しないので、数万要素以上のグラフでも書き出せる。
+
+使用例:
+    from svg_writer import write_svg, write_json
+
+    write_svg("./fig/large.svg", V, A, L, pos=pos)
+    write_json("./fig/large.json", V, A, L, pos=pos)
+"""
+
+import json
+
+from torus_geometry import index_positions, split_seam_edge, shrink_segment
+
+# 座標1単位あたりのピクセル数
+SCALE = 60
+
+# ノード半径（座標単位）
+NODE_RADIUS = 0.15
+
+# まとめて書き出す要素数
+CHUNK_SIZE = 4096
+
+
+def _escape(text):
+    """テキストの & < > を文字参照にする（xml.sax.saxutils は読み込みが遅いので使わない）"""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _iter_segments(A, L, pos):
+    """
+    エッジを線分に分割して順に返す
+
+    Yields:
+        (kind, p, q): kind は "edge"（通常エッジ）、"seam_out"（右端の境界へ）、
+            "seam_in"（左端の境界から）のいずれか
+    """
+    node_to_layer = {node: layer_num for layer_num, nodes in L.items() for node in nodes}
+    min_layer = min(L.keys()) if L else 0
+    max_layer = max(L.keys()) if L else 0
+
+    for u, v in A:
+        u_layer = node_to_layer.get(u)
+        v_layer = node_to_layer.get(v)
+        if u_layer is None or v_layer is None:
+            continue
+        if u_layer < v_layer:
+            yield "edge", pos[u], pos[v]
+        else:
+            seam_out, seam_in = split_seam_edge(pos[u], pos[v], min_layer, max_layer)
+            yield "seam_out", *seam_out
+            yield "seam_in", *seam_in
+
+
+def _open(out):
+    """パスならファイルを開き、ファイルオブジェクトならそのまま使う"""
+    if hasattr(out, "write"):
+        return out, False
+    return open(out, "w", encoding="utf-8"), True
+
+
+def write_svg(out, V, A, L, pos=None, with_labels=False, scale=SCALE):
+    """
+    階層グラフの描画を SVG として書き出す
+
+    Args:
+        out: 出力先のパスまたはテキストファイルオブジェクト
+        V: ノード集合 int[]
+        A: エッジ集合 [int, int][]
+        L: レイヤー集合 dict(layer: node[])
+        pos: ノードの座標 dict(node: (x, y))（省略時は (レイヤー, 添字)）
+        with_labels: ノードのラベルを書き出すか (デフォルト: False)
+        scale: 座標1単位あたりのピクセル数 (デフォルト: 60)
+    """
+    if pos is None:
+        pos = index_positions(L)
+
+    min_layer = min(L.keys()) if L else 0
+    max_layer = max(L.keys()) if L else 0
+    min_y = min((y for _, y in pos.values()), default=0)
+    max_y = max((y for _, y in pos.values()), default=0)
+
+    # 描画域は draw_torus と同じく、両端のレイヤーの外側に 0.5 ずつ余白を取る
+    x0 = min_layer - 0.5
+    y0 = min_y - 0.5
+    width = (max_layer - min_layer + 1) * scale
+    height = (max_y - min_y + 1) * scale
+    r = NODE_RADIUS * scale
+
+    def sx(x):
+        return f"{(x - x0) * scale:.2f}"
+
+    def sy(y):
+        return f"{(y - y0) * scale:.2f}"
+
+    f, should_close = _open(out)
+    try:
+        f.write(
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{width:.0f}" height="{height:.0f}" '
+            f'viewBox="0 0 {width:.2f} {height:.2f}">\n'
+            '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" '
+            'markerWidth="6" markerHeight="6" orient="auto-start-reverse">'
+            '<path d="M 0 0 L 10 5 L 0 10 z"/></marker></defs>\n'
+            '<g stroke="black" stroke-width="1">\n'
+        )
+
+        # エッジと継ぎ目の線分（鏃は終点側の線分にのみ付ける）
+        buf = []
+        for kind, p, q in _iter_segments(A, L, pos):
+            start = NODE_RADIUS if kind != "seam_in" else 0.0
+            end = NODE_RADIUS if kind != "seam_out" else 0.0
+            p, q = shrink_segment(p, q, start, end)
+            marker = "" if kind == "seam_out" else ' marker-end="url(#arrow)"'
+            buf.append(
+                f'<line x1="{sx(p[0])}" y1="{sy(p[1])}" '
+                f'x2="{sx(q[0])}" y2="{sy(q[1])}"{marker}/>\n'
+            )
+            if len(buf) >= CHUNK_SIZE:
+                f.write("".join(buf))
+                buf.clear()
+        f.write("".join(buf))
+        buf.clear()
+
+        f.write('</g>\n<g fill="lightblue">\n')
+
+        # ノード
+        for v in V:
+            if v not in pos:
+                continue
+            x, y = pos[v]
+            buf.append(f'<circle cx="{sx(x)}" cy="{sy(y)}" r="{r:.2f}"/>\n')
+            if len(buf) >= CHUNK_SIZE:
+                f.write("".join(buf))
+                buf.clear()
+        f.write("".join(buf))
+        buf.clear()
+
+        f.write("</g>\n")
+
+        # ラベル
+        if with_labels:
+            f.write(
+                '<g font-size="10" text-anchor="middle" dominant-baseline="central">\n'
+            )
+            for v in V:
+                if v not in pos:
+                    continue
+                x, y = pos[v]
+                label = _escape(str(v))
+                buf.append(f'<text x="{sx(x)}" y="{sy(y)}">{label}</text>\n')
+                if len(buf) >= CHUNK_SIZE:
+                    f.write("".join(buf))
+                    buf.clear()
+            f.write("".join(buf))
+            buf.clear()
+            f.write("</g>\n")
+
+        f.write("</svg>\n")
+    finally:
+        if should_close:
+            f.close()
+
+
+def write_json(out, V, A, L, pos=None):
+    """
+    描画に必要な要素をコンパクトな JSON として書き出す
+
+    出力形式:
+        {"nodes": [[node, x, y], ...],
+         "edges": [[x1, y1, x2, y2], [x1, y1, x2, y2, x3, y3, x4, y4], ...]}
+        要素数が4のものは通常エッジ、8のものは逆方向エッジで、
+        右端の境界へ向かう線分と左端の境界から出る線分の組を表す
+
+    Args:
+        out: 出力先のパスまたはテキストファイルオブジェクト
+        V: ノード集合 int[]
+        A: エッジ集合 [int, int][]
+        L: レイヤー集合 dict(layer: node[])
+        pos: ノードの座標 dict(node: (x, y))（省略時は (レイヤー, 添字)）
+    """
+    if pos is None:
+        pos = index_positions(L)
+
+    def dump(values):
+        return json.dumps(values, separators=(",", ":"))
+
+    f, should_close = _open(out)
+    try:
+        f.write('{"nodes":[')
+        sep = ""
+        for v in V:
+            if v in pos:
+                x, y = pos[v]
+                f.write(sep + dump([v, x, y]))
+                sep = ","
+
+        f.write('],"edges":[')
+        sep = ""
+        seam_out = None
+        for kind, p, q in _iter_segments(A, L, pos):
+            if kind == "edge":
+                f.write(sep + dump([*p, *q]))
+            elif kind == "seam_out":
+                seam_out = (p, q)
+                continue
+            else:
+                f.write(sep + dump([*seam_out[0], *seam_out[1], *p, *q]))
+            sep = ","
+        f.write("]}\n")
+    finally:
+        if should_close:
+            f.close()
@@ -0,0 +1,10 @@
+"""
+重い依存を使う関数を呼ぶまで読み込まないことのテスト
+"""
+
+from bench_import import measure
+
+
+def test_core_modules_do_not_import_heavy_dependencies():
+    for module in ("torus", "formulas.p_l", "draw", "draw_torus", "pipeline"):
+        assert measure(module, repeat=1)["heavy"] == [], module
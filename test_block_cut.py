@@ -0,0 +1,132 @@
+"""
+2重連結成分への分解による階層割当のテスト
+"""
+
+import pytest
+
+from block_cut import _violates, align_blocks, block_cut_tree, solve_by_blocks
+from pipeline import longest_path_layers
+from solve_stats import SolveStats
+from torus import torus_objective
+
+
+def chain_of_cycles():
+    """3つの閉路が関節点 2 と 4 でつながり、4 から橋 (4, 7) が出るグラフ"""
+    V = list(range(8))
+    A = [(0, 1), (1, 2), (2, 0), (2, 3), (3, 4), (4, 2), (4, 5), (5, 6), (6, 4), (4, 7)]
+    return V, A
+
+
+def test_block_cut_tree():
+    """ブロックと関節点が求まる"""
+    V, A = chain_of_cycles()
+    blocks, cut = block_cut_tree(V, A)
+
+    nodes = sorted(nodes for nodes, _ in blocks)
+    assert nodes == [[0, 1, 2], [2, 3, 4], [4, 5, 6], [4, 7]]
+    assert cut == {2, 4}
+    assert sorted(e for _, edges in blocks for e in edges) == sorted(A)
+
+
+def test_block_cut_tree_two_cycle_and_isolated():
+    """向きが逆のエッジの組は1つのブロックになり、孤立点はどのブロックにも含まれない"""
+    V = [0, 1, 2, 3]
+    A = [(0, 1), (1, 0), (1, 2)]
+    blocks, cut = block_cut_tree(V, A)
+
+    assert sorted(blocks) == [([0, 1], [(0, 1), (1, 0)]), ([1, 2], [(1, 2)])]
+    assert cut == {1}
+
+
+def test_align_blocks_offsets_and_rotation():
+    """関節点の階層が一致し、period を指定するとコストが増えない回転を使う"""
+    blocks = [([0, 1, 2], [(0, 1), (1, 2), (2, 0)]), ([2, 3], [(2, 3)])]
+    layouts = [({0: 0, 1: 1, 2: 2}, {}, None), ({2: 0, 3: 1}, {}, None)]
+
+    y_val = align_blocks([0, 1, 2, 3, 4], blocks, layouts)
+    assert y_val == {0: 0, 1: 1, 2: 2, 3: 3, 4: 0}
+
+    y_val = align_blocks([0, 1, 2, 3], blocks, layouts, period=3, cost=lambda b, y: 0)
+    assert y_val == {0: 0, 1: 1, 2: 2, 3: 0}
+
+
+def test_solve_by_blocks_longest():
+    """ひし形の鎖を最長路で解くと、グラフ全体を解いた結果と一致する"""
+    V = list(range(1, 8))
+    A = [(1, 2), (1, 3), (2, 4), (3, 4), (4, 5), (4, 6), (5, 7), (6, 7)]
+    stats = SolveStats()
+    y_val, t_val, L = solve_by_blocks(V, A, solver="longest", stats=stats)
+
+    assert y_val == longest_path_layers(V, A)
+    assert not any(t_val.values())
+    assert dict(L) == {0: [1], 1: [2, 3], 2: [4], 3: [5, 6], 4: [7]}
+    assert stats.records[-1]["fallback"] is False
+    assert stats.records[-1]["blocks"] == 2
+
+
+def test_solve_by_blocks_longest_respects_lam():
+    """ブロックを最長路で解くときも、橋と同じく最小階層差を満たす"""
+    V = [1, 2, 3, 4, 5]
+    A = [(1, 2), (1, 3), (2, 3), (3, 4), (4, 5)]
+    lam = {e: 2 for e in A}
+    y_val, _, _ = solve_by_blocks(V, A, lam=lam, solver="longest")
+    assert y_val == {1: 0, 2: 2, 3: 4, 4: 6, 5: 8}
+    assert y_val == longest_path_layers(V, A, lam)
+
+
+def test_violates_uses_lam():
+    """シンクの階層は最小階層差を考慮した最長路の長さと比べる"""
+    V, A = [1, 2, 3], [(1, 2), (2, 3)]
+    lam = {e: 2 for e in A}
+    assert not _violates("pg", V, A, lam, {1: 0, 2: 2, 3: 4})
+    assert _violates("pg", V, A, lam, {1: 0, 2: 1, 3: 2})
+
+
+def _check_torus(V, A, y_val, t_val):
+    for u, v in A:
+        d = y_val[u] - y_val[v] if t_val[(u, v)] else y_val[v] - y_val[u]
+        assert d >= 1
+
+
+def test_solve_by_blocks_torus_star():
+    """橋だけの星は Gurobi を使わずにつなぎ、下界に一致する（最適と示せる）"""
+    V = [0, 1, 2, 3]
+    A = [(0, 1), (0, 2), (0, 3)]
+    stats = SolveStats()
+    y_val, t_val, _ = solve_by_blocks(V, A, solver="torus", stats=stats)
+
+    record = stats.records[-1]
+    _check_torus(V, A, y_val, t_val)
+    assert record["fallback"] is False
+    assert record["solved"] == 0
+    assert record["objective"] == torus_objective(V, A, y_val, t_val) == 100 + 3
+    assert record["lower_bound"] == record["objective"]
+
+
+def test_solve_by_blocks_torus_chain():
+    """閉路の鎖を torus で解き、結果が下界以上になる"""
+    from create_gurobi_env import create_gurobi_env
+
+    try:
+        create_gurobi_env(False)
+    except Exception:
+        pytest.skip("Gurobi の環境を作成できない")
+
+    V, A = chain_of_cycles()
+    stats = SolveStats()
+    y_val, t_val, _ = solve_by_blocks(V, A, solver="torus", stats=stats, verbose=False)
+
+    record = next(r for r in stats.records if r["label"] == "blocks")
+    _check_torus(V, A, y_val, t_val)
+    assert record["lower_bound"] <= torus_objective(V, A, y_val, t_val)
+
+
+def test_torus_objective():
+    """目的関数の値を項ごとに計算する"""
+    V, A = [0, 1, 2], [(0, 1), (1, 2), (2, 0)]
+    y_val = {0: 0, 1: 1, 2: 2}
+    t_val = {(0, 1): False, (1, 2): False, (2, 0): True}
+
+    # L_max = 2, スパン 1, 1, 0 - 2 + 3 = 1, トーラス辺 1 本
+    assert torus_objective(V, A, y_val, t_val) == 100 * 2 + 3 + 1000
+    assert torus_objective(V, A, y_val, t_val, alpha=0, gamma=0, M=5) == 1 + 1 + 9
@@ -0,0 +1,76 @@
+"""
+組合せ的な下界のテスト
+"""
+
+import random
+
+from bounds import cycle_packing, span_bounds, span_objective_bound, torus_bounds
+from generate_torus_graph import generate_cyclic_graph, generate_dag
+from local_search import repair
+from torus import torus_objective
+
+
+def test_cycle_packing_is_edge_disjoint():
+    for seed in range(5):
+        V, A = generate_cyclic_graph(30, num_cycles=4, edge_prob=0.1, seed=seed)
+        cycles = cycle_packing(V, A)
+        assert cycles
+        used = [e for cycle in cycles for e in cycle]
+        assert len(used) == len(set(used))
+        assert set(used) <= set(A)
+        for cycle in cycles:
+            assert all(a[1] == b[0] for a, b in zip(cycle, cycle[1:] + cycle[:1]))
+
+
+def test_torus_bound_is_tight_on_a_cycle():
+    """単純な閉路では、トーラス辺1本で一周する割当が下界に一致する"""
+    n = 5
+    V = list(range(n))
+    A = [(i, (i + 1) % n) for i in V]
+    bound = torus_bounds(V, A)
+    assert bound["torus"] == 1
+    assert bound["L_max"] == 1
+    assert bound["objective"] == 100 * (n - 1) + n + 1000
+
+
+def test_torus_bound_below_feasible_layerings():
+    """どの実行可能な階層割当の目的関数の値も下界以上になる"""
+    for seed in range(5):
+        V, A = generate_cyclic_graph(25, num_cycles=3, edge_prob=0.1, seed=seed)
+        A = list(set(A))
+        rng = random.Random(seed)
+        lam = {e: rng.randint(1, 2) for e in A}
+        w = {e: rng.randint(1, 3) for e in A}
+        # lam ≤ 2 なら、上下関係を保って詰めた階層は 2*(n-1) 以下になる
+        M = 2 * len(V)
+        bound = torus_bounds(V, A, w, lam, M=M)
+
+        for _ in range(5):
+            y = [rng.randrange(100) for _ in V]
+            repair(len(V), {e: (w[e], lam[e], 1) for e in A}, y, M)
+            assert max(y) <= M - 1
+            y_val = dict(zip(V, y))
+            t_val = {(u, v): y_val[u] > y_val[v] for u, v in A}
+            assert sum(t_val.values()) >= bound["torus"]
+            assert bound["objective"] <= torus_objective(
+                V, A, y_val, t_val, w, M=M
+            )
+
+
+def test_span_bounds_contain_layering():
+    """入次数0を 0、出次数0を l に固定した実行可能な割当が範囲に収まる"""
+    for seed in range(5):
+        V, A = generate_dag(20, edge_prob=0.2, seed=seed)
+        lam = {e: 1 for e in A}
+        w = {e: 1 for e in A}
+        sinks = [v for v in V if all(u != v for u, _ in A)]
+        low, _, _ = span_bounds(V, A, lam, [], 0)
+        l = max(low.values())
+        low, high, span = span_bounds(V, A, lam, sinks, l)
+
+        y = {v: l if v in sinks else low[v] for v in V}
+        assert all(low[v] <= y[v] <= high[v] for v in V)
+        assert all(span[e][0] <= y[e[1]] - y[e[0]] <= span[e][1] for e in A)
+        assert span_objective_bound(A, w, span) <= sum(
+            (y[v] - y[u]) ** 2 for u, v in A
+        )
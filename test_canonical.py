@@ -0,0 +1,131 @@
+"""
+部分問題の標準形によるメモ化のテスト
+"""
+
+import random
+
+from canonical import CanonicalMemo, canonical_form, relabel_layering, solve_components
+
+
+def random_graph(rng, n, m):
+    V = list(range(n))
+    A = list({(rng.randrange(n), rng.randrange(n)) for _ in range(m)})
+    return V, [(u, v) for u, v in A if u != v]
+
+
+def permute(V, A, rng):
+    labels = [f"v{i}" for i in range(len(V))]
+    rng.shuffle(labels)
+    mapping = dict(zip(V, labels))
+    A = [(mapping[u], mapping[v]) for u, v in A]
+    rng.shuffle(A)
+    return labels, A, mapping
+
+
+def test_key_invariant_under_relabelling():
+    """ノード番号とエッジの並び順を変えても標準形のキーは同じ"""
+    for seed in range(50):
+        rng = random.Random(seed)
+        V, A = random_graph(rng, 7, 12)
+        key, order = canonical_form(V, A)
+        V2, A2, mapping = permute(V, A, rng)
+        key2, order2 = canonical_form(V2, A2)
+        assert key == key2
+
+        # 標準形の並べ方で番号を付け直すと、同じエッジ集合になる
+        pos = {v: i for i, v in enumerate(order)}
+        pos2 = {v: i for i, v in enumerate(order2)}
+        assert {(pos[u], pos[v]) for u, v in A} == {(pos2[u], pos2[v]) for u, v in A2}
+
+
+def test_key_distinguishes_shapes():
+    """形や重みが異なれば標準形のキーも異なる"""
+    cycle = [(0, 1), (1, 2), (2, 0)]
+    path = [(0, 1), (1, 2), (0, 2)]
+    V = [0, 1, 2]
+    assert canonical_form(V, cycle)[0] != canonical_form(V, path)[0]
+
+    lam = {e: 1 for e in cycle}
+    lam[(0, 1)] = 2
+    assert canonical_form(V, cycle)[0] != canonical_form(V, cycle, lam=lam)[0]
+
+    # 正則で色の細分化だけでは区別できない形（6頂点の閉路 と 3頂点の閉路2つ）
+    c6 = [(i, (i + 1) % 6) for i in range(6)]
+    c3 = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3)]
+    assert canonical_form(range(6), c6)[0] != canonical_form(range(6), c3)[0]
+
+
+def longest_path_layers(V, A, w, lam):
+    """DAG の最長路による階層割当（テスト用の解法）"""
+    layer = {v: 0 for v in V}
+    for _ in V:
+        for u, v in A:
+            layer[v] = max(layer[v], layer[u] + lam[(u, v)])
+    return layer
+
+
+def test_memo_reuses_solution():
+    """同じ形の成分は一度だけ解き、元のノードに付け替えた解を返す"""
+    calls = []
+
+    def solve(V, A, w, lam):
+        calls.append(len(V))
+        return longest_path_layers(V, A, w, lam)
+
+    memo = CanonicalMemo("test", solve, relabel_layering)
+
+    rng = random.Random(0)
+    motif = [(0, 1), (0, 2), (1, 3), (2, 3)]
+    for _ in range(10):
+        V, A, _ = permute(range(4), motif, rng)
+        val = memo(V, A)
+        assert all(val[v] >= val[u] + 1 for u, v in A)
+        assert sorted(val.values()) == [0, 1, 1, 2]
+
+    assert calls == [4]
+    assert memo.hits == 9
+    assert memo.misses == 1
+
+
+def test_solve_components():
+    """強連結成分ごとに解き、同じ形の成分は再利用する"""
+    A = []
+    for k in range(5):
+        base = 3 * k
+        A += [(base, base + 1), (base + 1, base + 2), (base + 2, base)]
+        if k:
+            A.append((base - 1, base))
+    V = list(range(15))
+
+    calls = []
+
+    def solve(V, A, w, lam):
+        calls.append(1)
+        return {v: i for i, v in enumerate(V)}
+
+    memo = CanonicalMemo("test", solve, relabel_layering)
+    results = solve_components(memo, V, A)
+    assert len(results) == 5
+    assert sorted(v for r in results for v in r) == V
+    assert len(calls) == 1
+
+
+def test_memo_across_runs(tmp_path):
+    """SolutionCache を渡すと、別の実行でも解を再利用する"""
+    from solution_cache import SolutionCache
+
+    calls = []
+
+    def solve(V, A, w, lam):
+        calls.append(1)
+        return longest_path_layers(V, A, w, lam)
+
+    path = str(tmp_path / "cache.sqlite")
+    for labels in (["a", "b", "c"], ["x", "y", "z"]):
+        with SolutionCache(path) as cache:
+            memo = CanonicalMemo("test", solve, relabel_layering, cache)
+            a, b, c = labels
+            val = memo(labels, [(a, b), (b, c)])
+            assert val == {a: 0, b: 1, c: 2}
+
+    assert len(calls) == 1
@@ -0,0 +1,60 @@
+"""
+Coffman–Graham 法による階層割当のテスト
+"""
+
+import io
+import random
+from collections import Counter
+
+from formulas.coffman_graham import cg
+from generate_torus_graph import generate_dag
+from pipeline import read_edge_list, run_pipeline
+from solve_stats import SolveStats
+
+
+def _cg(V, A, lam=None, **kwargs):
+    lam = {e: 1 for e in A} if lam is None else lam
+    return cg("CG", V, A, {e: 1 for e in A}, lam, [], [], **kwargs)
+
+
+def test_layering_respects_lam_and_width():
+    """すべてのエッジで最小階層差を満たし、各階層のノード数が幅以下になる"""
+    for seed in range(5):
+        V, A = generate_dag(40, edge_prob=0.1, seed=seed)
+        rng = random.Random(seed)
+        lam = {e: rng.randint(1, 3) for e in A}
+        for width in (1, 3, None):
+            val = _cg(V, A, lam, width=width)
+            assert set(val) == set(V)
+            assert all(val[v] - val[u] >= lam[(u, v)] for u, v in A)
+            assert max(Counter(val.values()).values()) <= (width or 7)
+            assert min(val.values()) == 0
+
+
+def test_width_one_is_a_total_order():
+    """幅 1 ならすべてのノードが別の階層に置かれる"""
+    V, A = generate_dag(20, edge_prob=0.2, seed=1)
+    val = _cg(V, A, width=1)
+    assert sorted(val.values()) == list(range(len(V)))
+
+
+def test_cycle_fails():
+    """閉路があるときは空の dict を返す"""
+    assert _cg([1, 2, 3], [(1, 2), (2, 3), (3, 1)], verbose=False) == {}
+
+
+def test_stats():
+    stats = SolveStats()
+    V, A = generate_dag(10, edge_prob=0.3, seed=0)
+    _cg(V, A, width=2, stats=stats)
+    record = stats.records[-1]
+    assert record["width"] == 2
+    assert record["layers"] == max(_cg(V, A, width=2).values()) + 1
+
+
+def test_pipeline():
+    graph = read_edge_list(io.StringIO("a b\nb c\na c\na d\nd c\ne c\n"))
+    layout = run_pipeline(graph, layering="cg", width=2, crossing="none")
+    layer = layout["layer"]
+    assert all(layer[v] - layer[u] == 1 for u, v in layout["A"])
+    assert max(Counter(layer[v] for v in graph["V"]).values()) <= 2
@@ -0,0 +1,51 @@
+"""
+Brandes–Köpf法による座標割当のテスト
+"""
+
+import random
+
+from coordinates import assign_coordinates
+
+
+def test_assign_coordinates_keeps_order():
+    """層内の順序と最小間隔が保たれる"""
+    for seed in range(50):
+        rng = random.Random(seed)
+        L = {k: list(range(k * 10, k * 10 + rng.randint(1, 6))) for k in range(5)}
+        A = [
+            (u, v)
+            for k in range(4)
+            for u in L[k]
+            for v in L[k + 1]
+            if rng.random() < 0.3
+        ]
+
+        pos = assign_coordinates(L, A)
+
+        for k, nodes in L.items():
+            for u, v in zip(nodes, nodes[1:]):
+                assert pos[u][0] == pos[v][0] == k
+                assert pos[v][1] - pos[u][1] >= 1 - 1e-9
+
+
+def test_assign_coordinates_straight_dummy_chain():
+    """ダミーノードの列がまっすぐに揃う"""
+    L = {0: [0, 1], 1: [2, 10], 2: [3, 11], 3: [4, 5]}
+    A = [(0, 2), (2, 3), (3, 4), (1, 10), (10, 11), (11, 5), (0, 10)]
+    dummy = {2, 3, 10, 11}
+
+    pos = assign_coordinates(L, A, dummy=dummy)
+
+    assert pos[10][1] == pos[11][1]
+    assert pos[2][1] == pos[3][1]
+
+
+def test_assign_coordinates_torus_seam():
+    """トーラス辺は整列の対象にならない"""
+    L = {0: [0], 1: [1, 2], 2: [3]}
+    A = [(0, 1), (1, 3), (3, 0), (2, 0)]
+
+    pos = assign_coordinates(L, A, torus=True)
+
+    assert set(pos) == {0, 1, 2, 3}
+    assert pos[2][1] - pos[1][1] >= 1
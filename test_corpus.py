@@ -0,0 +1,32 @@
+"""
+グラフのコーパスのテスト
+"""
+
+import corpus
+from corpus import build_corpus, corpus_key, get_graph, load_edges
+from generate_torus_graph import generate_dag
+
+
+def test_build_get_load_round_trip(tmp_path):
+    root = str(tmp_path)
+    entries = build_corpus(
+        root, families=("dag",), sizes=(20,), densities=(0.2,), seeds=(0,)
+    )
+    assert entries == [("dag", 0, {"n": 20, "edge_prob": 0.2})]
+
+    V, A = get_graph(root, "dag", seed=0, n=20, edge_prob=0.2)
+    assert (V, A) == generate_dag(20, edge_prob=0.2, seed=0)
+
+    with load_edges(root, "dag", seed=0, n=20, edge_prob=0.2) as (meta, edges):
+        assert meta["n"] == 20
+        assert meta["m"] == len(A)
+        assert len(edges) == 2 * len(A)
+
+    with load_edges(root, "dag", seed=1, n=20, edge_prob=0.2) as (meta, edges):
+        assert meta is None and edges is None
+
+
+def test_version_changes_key(monkeypatch):
+    key = corpus_key("dag", 0, n=20, edge_prob=0.2)
+    monkeypatch.setattr(corpus, "CORPUS_VERSION", corpus.CORPUS_VERSION + 1)
+    assert corpus_key("dag", 0, n=20, edge_prob=0.2) != key
@@ -0,0 +1,54 @@
+"""
+弱連結成分ごとの求解のテスト
+"""
+
+from decompose import pack_layouts, solve_by_components, split_components
+
+
+def _two_components():
+    V = [0, 1, 2, 3, 4, 5, 6]
+    A = [(0, 1), (1, 2), (3, 4), (4, 5), (5, 6)]
+    return V, A
+
+
+def test_split_components():
+    """成分ごとに分けられ、ノード数の多い成分から並ぶ"""
+    V, A = _two_components()
+    V.append(7)
+    components = split_components(V, A, lam={e: 2 for e in A})
+
+    assert [c[0] for c in components] == [[3, 4, 5, 6], [0, 1, 2], [7]]
+    assert components[0][1] == [(3, 4), (4, 5), (5, 6)]
+    assert components[1][2] == {(0, 1): 1, (1, 2): 1}
+    assert components[1][3] == {(0, 1): 2, (1, 2): 2}
+    assert components[2][1] == []
+
+
+def test_pack_layouts_side_and_stack():
+    """side は階層を共有し、stack は階層をずらす"""
+    a = ({0: 0, 1: 1}, {(0, 1): False}, {0: [0], 1: [1]})
+    b = ({2: 0, 3: 1, 4: 2}, {(2, 3): False}, {0: [2], 1: [3], 2: [4]})
+
+    y_val, t_val, L = pack_layouts([a, b], mode="side")
+    assert y_val == {0: 0, 1: 1, 2: 0, 3: 1, 4: 2}
+    assert dict(L) == {0: [0, 2], 1: [1, 3], 2: [4]}
+    assert t_val == {(0, 1): False, (2, 3): False}
+
+    y_val, _, L = pack_layouts([a, b], mode="stack")
+    assert y_val == {0: 0, 1: 1, 2: 2, 3: 3, 4: 4}
+    assert dict(L) == {0: [0], 1: [1], 2: [2], 3: [3], 4: [4]}
+
+
+def test_solve_by_components_parallel():
+    """プロセスを分けて解いても逐次に解いた結果と一致する"""
+    V, A = _two_components()
+    V.append(7)
+
+    sequential = solve_by_components(V, A, solver="longest", processes=1)
+    parallel = solve_by_components(V, A, solver="longest", processes=2)
+
+    assert parallel[0] == sequential[0]
+    assert dict(parallel[2]) == dict(sequential[2])
+    y_val = parallel[0]
+    assert all(y_val[v] - y_val[u] >= 1 for u, v in A)
+    assert y_val[7] == 0
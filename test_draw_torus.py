@@ -1,4 +1,4 @@
-from draw_torus import draw_torus
+from draw_torus import draw_torus, render_torus
 
 
 def test_draw_torus():
@@ -106,6 +106,24 @@ def test_draw_torus_original():
     draw_torus(V, A, L)
 
 
+def test_render_torus(tmp_path):
+    """
+    render_torus で PNG に書き出し、Figure を使い回しても描画できる
+    """
+    V = [0, 1, 2]
+    A = [(0, 1), (1, 2), (2, 0)]
+    L = {0: [0], 1: [1], 2: [2]}
+
+    path = tmp_path / "torus.png"
+    fig = render_torus(V, A, L, str(path), with_labels=True, dpi=50)
+    with open(path, "rb") as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+
+    again = tmp_path / "again.png"
+    assert render_torus(V, A, L, str(again), fig=fig) is fig
+    assert again.stat().st_size > 0
+
+
 if __name__ == "__main__":
     # print("テスト1: 通常エッジと逆方向エッジを含むグラフ")
     # test_draw_torus()
@@ -0,0 +1,35 @@
+"""
+ダミーノード挿入のテスト
+"""
+
+from dummy_nodes import insert_dummy_nodes, layered_edges
+
+
+def test_long_edges_split():
+    """長いエッジは隣接する層の間のエッジの列に分割される"""
+    V = [0, 1, 2]
+    A = [(0, 1), (0, 2)]
+    layer = {0: 0, 1: 1, 2: 3}
+    V2, A2, layer2, dummy, chains = insert_dummy_nodes(V, A, layer)
+
+    assert len(dummy) == 2
+    assert chains[(0, 1)] == [0, 1]
+    path = chains[(0, 2)]
+    assert [layer2[v] for v in path] == [0, 1, 2, 3]
+    assert all(abs(layer2[u] - layer2[v]) == 1 for u, v in A2)
+    assert set(V2) == set(V) | dummy
+
+
+def test_torus_edges_wrap():
+    """トーラス辺は最大層から最小層へ継ぎ目を通って分割される"""
+    V = [0, 1, 2]
+    A = [(0, 1), (1, 2), (2, 0)]
+    layer = {0: 1, 1: 2, 2: 3}
+    V2, A2, layer2, dummy, chains = insert_dummy_nodes(
+        V, A, layer, torus=True, num_layers=5
+    )
+    assert [layer2[v] for v in chains[(2, 0)]] == [3, 4, 0, 1]
+
+    V_layers, E_layers = layered_edges(V2, A2, layer2)
+    assert sum(len(es) for es in E_layers.values()) == len(A2) - 1
+    assert sorted(v for vs in V_layers.values() for v in vs) == sorted(V2)
@@ -0,0 +1,33 @@
+"""
+レイアウトの一括書き出しのテスト
+"""
+
+import os
+from array import array
+
+import pytest
+
+from export import _as_layers, export_layouts
+
+LAYOUTS = [
+    ([0, 1], [(0, 1)], {0: [0], 1: [1]}),
+    ([0, 1, 2], [(0, 1), (1, 2), (2, 0)], {0: 0, 1: 1, 2: 2}),
+]
+
+
+def test_export_layouts(tmp_path):
+    paths = export_layouts(LAYOUTS, str(tmp_path), names=["a", "b"], processes=1)
+    assert paths == [str(tmp_path / "a.png"), str(tmp_path / "b.png")]
+    assert all(os.path.getsize(path) > 0 for path in paths)
+
+
+def test_export_layouts_rejects_mismatched_names(tmp_path):
+    with pytest.raises(ValueError):
+        export_layouts(LAYOUTS, str(tmp_path), names=["a"], processes=1)
+
+
+def test_as_layers_keeps_array_layers():
+    """値が array('i') のレイヤー集合は、階層割当と取り違えずにそのまま使う"""
+    L = {0: array("i", [0, 2]), 1: array("i", [1])}
+    assert _as_layers(L) == (L, None)
+    assert _as_layers({0: 0, 1: 1, 2: 0})[0] == {0: [0, 2], 1: [1]}
@@ -0,0 +1,86 @@
+"""
+トーラステスト用のグラフ生成関数のテスト
+"""
+
+import random
+
+from generate_torus_graph import (
+    component_labels,
+    is_connected,
+    generate_random_connected_graph,
+    generate_dag,
+    generate_cyclic_graph,
+    generate_mixed_graph,
+)
+from union_find import UnionFind
+
+
+GENERATORS = [
+    (generate_random_connected_graph, {"n": 30, "edge_prob": 0.1}),
+    (generate_dag, {"n": 30, "edge_prob": 0.1}),
+    (generate_cyclic_graph, {"n": 30, "num_cycles": 3, "edge_prob": 0.05}),
+    (generate_mixed_graph, {"n": 30, "edge_prob": 0.1, "cycle_prob": 0.4}),
+]
+
+
+def test_generators_connected():
+    """生成されたグラフが弱連結で、自己ループを含まない"""
+    for generate, kwargs in GENERATORS:
+        for seed in range(10):
+            V, A = generate(seed=seed, **kwargs)
+            assert is_connected(V, A)
+            assert all(u != v for u, v in A)
+
+
+def test_generators_reproducible():
+    """同じシードで同じグラフが生成され、グローバルな乱数状態を変えない"""
+    for generate, kwargs in GENERATORS:
+        random.seed(0)
+        state = random.getstate()
+        assert generate(seed=1, **kwargs) == generate(seed=1, **kwargs)
+        assert random.getstate() == state
+
+
+def test_generate_dag_acyclic():
+    """DAGのエッジは小さい番号から大きい番号へ向かう"""
+    V, A = generate_dag(200, edge_prob=0.05, seed=0)
+    assert all(u < v for u, v in A)
+    assert len(A) == len(set(A))
+
+
+def test_generate_large_sparse_graph():
+    """大規模で疎なグラフも生成できる"""
+    V, A = generate_random_connected_graph(20000, edge_prob=1e-4, seed=0)
+    assert len(V) == 20000
+    assert len(A) == len(set(A))
+    assert is_connected(V, A)
+
+
+def test_is_connected_with_union_find():
+    """UnionFind による判定が BFS による判定と一致する"""
+    for seed in range(50):
+        rng = random.Random(seed)
+        V = list(range(12))
+        A = [(rng.randrange(12), rng.randrange(12)) for _ in range(rng.randrange(15))]
+        assert is_connected(V, A, UnionFind(V, A)) == is_connected(V, A)
+
+
+def test_connectivity_repair_adds_only_bridges():
+    """連結化で追加されるエッジは成分をまたぐものだけ"""
+    V, A = generate_dag(5000, edge_prob=1e-4, seed=0)
+    assert is_connected(V, A)
+    assert all(u < v for u, v in A)
+
+    V, A = generate_mixed_graph(5000, edge_prob=1e-4, cycle_prob=0.3, seed=0)
+    assert is_connected(V, A)
+    assert len(A) == len(set(A))
+
+
+def test_component_labels():
+    """弱連結成分の番号が V に現れる順に付く"""
+    V = [0, 1, 2, 3, 4, 5]
+    A = [(1, 0), (3, 4), (4, 2)]
+    label, count = component_labels(V, A)
+    assert count == 3
+    assert label == {0: 0, 1: 0, 2: 1, 3: 1, 4: 1, 5: 2}
+    assert not is_connected(V, A)
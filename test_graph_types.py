@@ -0,0 +1,63 @@
+"""
+配列で保持するグラフと階層割当の結果の型のテスト
+"""
+
+import sys
+
+from graph_types import Graph, LayoutResult
+
+
+def test_graph_round_trip():
+    V = [0, 1, 2, 3]
+    A = [(0, 1), (1, 2), (2, 3), (3, 0)]
+    w = {e: i + 1 for i, e in enumerate(A)}
+    lam = {e: 1 for e in A}
+    g = Graph.from_lists(V, A, w, lam)
+
+    assert g.labels is None
+    assert (g.n, g.m) == (4, 4)
+    assert g.to_lists() == (V, A, w, lam)
+
+    offsets, targets, edge_ids = g.out_csr()
+    assert list(targets[offsets[3] : offsets[4]]) == [0]
+    assert list(edge_ids) == [0, 1, 2, 3]
+
+
+def test_graph_with_labels():
+    """0..n-1 以外のラベルは番号を付け直し、変換時に元に戻す"""
+    V = ["a", "b", "c"]
+    A = [("a", "b"), ("b", "c")]
+    g = Graph.from_lists(V, A)
+    assert list(g.src) == [0, 1]
+    V2, A2, w2, lam2 = g.to_lists()
+    assert (V2, A2) == (V, A)
+    assert w2 == {("a", "b"): 1.0, ("b", "c"): 1.0}
+
+
+def test_layout_result_round_trip():
+    V = ["a", "b", "c", "d"]
+    A = [("a", "b"), ("b", "c"), ("c", "a"), ("a", "d")]
+    g = Graph.from_lists(V, A)
+    y_val = {"a": 0, "b": 1, "c": 2, "d": 1}
+    t_val = {("a", "b"): False, ("b", "c"): False, ("c", "a"): True, ("a", "d"): False}
+    L = {0: ["a"], 1: ["d", "b"], 2: ["c"]}
+
+    result = LayoutResult.from_dicts(g, y_val, t_val, L)
+    assert result.num_layers == 3
+    assert list(result.layer_nodes(1)) == [3, 1]
+    assert list(result.positions()) == [0, 1, 0, 0]
+    assert result.to_dicts(g) == (y_val, t_val, L)
+
+    # L を省略すると番号順
+    assert LayoutResult.from_dicts(g, y_val).to_dicts(g)[2][1] == ["b", "d"]
+
+
+def test_graph_is_compact():
+    """エッジのタプルをキーとする dict よりメモリが小さい"""
+    n = 10000
+    A = [(i, (i * 7 + 1) % n) for i in range(n)]
+    w = {e: 1.0 for e in A}
+    g = Graph.from_lists(range(n), A, w, {e: 1 for e in A})
+
+    dict_bytes = sys.getsizeof(A) + sys.getsizeof(w) + sum(sys.getsizeof(e) for e in A)
+    assert g.nbytes() * 4 < dict_bytes
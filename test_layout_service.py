@@ -0,0 +1,159 @@
+"""
+レイアウトを計算する常駐サービスのテスト（localhost のみ）
+"""
+
+import asyncio
+import threading
+import time
+
+from layout_service import LayoutClient, LayoutService
+
+GRAPH = {"V": [0, 1, 2], "A": [[0, 1], [1, 2], [0, 2]]}
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=60))
+
+
+class ToySolver:
+    """呼ばれた順を記録し、gate が開くまで待つ解法"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.lock = threading.Lock()
+
+    def __call__(self, graph, params):
+        self.gate.wait()
+        with self.lock:
+            self.calls.append(params.get("tag"))
+        time.sleep(self.delay)
+        return {"n": len(graph["V"]), "tag": params.get("tag")}
+
+
+def test_duplicate_requests_are_coalesced():
+    """計算中のジョブと同じ内容のリクエストは結果を共有する"""
+    solver = ToySolver(delay=0.2)
+
+    async def main():
+        service = LayoutService(workers=2, solvers={"toy": solver}, processes=False)
+        async with service:
+            _, port = await service.start()
+            client = await LayoutClient.connect(port=port)
+            job = {"kind": "toy", "graph": GRAPH}
+            responses = await asyncio.gather(*(client.request(job) for _ in range(5)))
+            await client.close()
+            return responses, service.stats
+
+    responses, stats = run(main())
+    assert all(r["status"] == "done" and r["result"]["n"] == 3 for r in responses)
+    assert sum(r["shared"] for r in responses) == 4
+    assert len(solver.calls) == 1
+    assert stats["solved"] == 1
+
+
+def test_priority_order():
+    """優先度の小さいジョブから計算する"""
+    solver = ToySolver()
+    solver.gate.clear()
+
+    async def main():
+        service = LayoutService(workers=1, solvers={"toy": solver}, processes=False)
+        async with service:
+            _, port = await service.start()
+            client = await LayoutClient.connect(port=port)
+
+            def job(tag, priority):
+                params = {"tag": tag}
+                return client.request(
+                    {"kind": "toy", "graph": GRAPH, "params": params, "priority": priority}
+                )
+
+            # 1つ目が計算中の間に、残りがキューにたまる
+            first = asyncio.create_task(job("first", 0))
+            await asyncio.sleep(0.1)
+            rest = [asyncio.create_task(job(f"p{p}", p)) for p in (5, 1, 3)]
+            await asyncio.sleep(0.1)
+            solver.gate.set()
+            await asyncio.gather(first, *rest)
+            await client.close()
+
+    run(main())
+    assert solver.calls == ["first", "p1", "p3", "p5"]
+
+
+def test_deadline_and_errors():
+    """期限切れ・未知の種類・解法の例外はレスポンスで知らせる"""
+
+    def failing(graph, params):
+        raise RuntimeError("失敗")
+
+    solver = ToySolver(delay=0.5)
+
+    async def main():
+        solvers = {"toy": solver, "fail": failing}
+        service = LayoutService(workers=1, solvers=solvers, processes=False)
+        async with service:
+            _, port = await service.start()
+            client = await LayoutClient.connect(port=port)
+            expired = await client.request(
+                {"kind": "toy", "graph": GRAPH, "deadline": 0.05}
+            )
+            unknown = await client.request({"kind": "nope", "graph": GRAPH})
+            failed = await client.request({"kind": "fail", "graph": GRAPH})
+            await client.close()
+            return expired, unknown, failed
+
+    expired, unknown, failed = run(main())
+    assert expired["status"] == "expired"
+    assert unknown["status"] == "error"
+    assert failed["status"] == "error" and "失敗" in failed["error"]
+
+
+def test_warm_process_pool_over_unix_socket(tmp_path):
+    """常駐するプロセスプールで、小さなレイアウトをすぐに返す"""
+
+    async def main():
+        path = str(tmp_path / "layout.sock")
+        async with LayoutService(workers=2) as service:
+            await service.start(path=path)
+            client = await LayoutClient.connect(path=path)
+            await client.request({"kind": "longest", "graph": GRAPH})
+
+            start = time.perf_counter()
+            response = await client.request(
+                {"kind": "longest", "graph": {"V": ["a", "b"], "A": [["a", "b"]]}}
+            )
+            latency = time.perf_counter() - start
+            await client.close()
+            return response, latency
+
+    response, latency = run(main())
+    assert response["status"] == "done"
+    assert sorted(response["result"]["layer"]) == [["a", 0], ["b", 1]]
+    assert latency < 0.5
+
+
+def test_init_worker_caches_gurobi_env(monkeypatch):
+    """ワーカーの初期化で Gurobi の環境を作り、以降のジョブで使い回す"""
+    import gurobipy
+
+    import create_gurobi_env
+    from layout_service import _init_worker
+
+    created = []
+
+    def fake_env(params):
+        created.append(params)
+        return object()
+
+    monkeypatch.setattr(gurobipy, "Env", fake_env)
+    monkeypatch.setattr(create_gurobi_env, "_shared_envs", None)
+    monkeypatch.setenv("GRB_LICENSEID", "0")
+    _init_worker()
+
+    env = create_gurobi_env.create_gurobi_env(False)
+    assert len(created) == 1 and created[0]["OutputFlag"] == 0
+    assert create_gurobi_env._shared_envs == {False: env}
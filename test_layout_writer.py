@@ -0,0 +1,61 @@
+"""
+レイアウト結果の書き出しのテスト
+"""
+
+import io
+import json
+
+import pytest
+
+from layout_writer import NDJSONWriter, layout_record, open_layout_writer
+
+
+LAYOUT = {
+    "V": [0, 1, 2, 3],
+    "A": [(0, 1), (1, 3), (3, 2), (2, 0)],
+    "layer": {0: 0, 1: 1, 2: 0, 3: 2},
+    "L": {0: [2, 0], 1: [1], 2: [3]},
+    "dummy": {3},
+    "torus": True,
+    "stages": {"layering": 0.5},
+}
+
+
+def test_layout_record():
+    record = layout_record("g", LAYOUT, labels=["a", "b", "c"])
+    assert record["labels"] == ["a", "b", "c", None]
+    assert record["dummy"] == [False, False, False, True]
+    assert record["order"] == [1, 0, 0, 0]
+    assert record["x"] == [0.0, 1.0, 0.0, 2.0]
+    assert record["torus"] == [False, False, True, True]
+    assert json.loads(record["stats"]) == {"stages": {"layering": 0.5}}
+
+
+def test_ndjson_appends(tmp_path):
+    """グラフごとに1行ずつ書き足し、既存のファイルにも追記する"""
+    path = tmp_path / "layouts.ndjson"
+    for name in ("g1", "g2"):
+        with open_layout_writer(str(path)) as writer:
+            writer.write(layout_record(name, LAYOUT))
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["g1", "g2"]
+
+    buf = io.StringIO()
+    NDJSONWriter(buf).write(layout_record("g", LAYOUT))
+    assert buf.getvalue().count("\n") == 1
+
+
+def test_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    path = tmp_path / "layouts.parquet"
+    with open_layout_writer(str(path), batch_size=2) as writer:
+        for i in range(5):
+            writer.write(layout_record(f"g{i}", LAYOUT))
+
+    table = pq.read_table(str(path))
+    assert table.num_rows == 5
+    assert pq.ParquetFile(str(path)).num_row_groups == 3
+    assert table.column("name").to_pylist() == [f"g{i}" for i in range(5)]
+    assert table.column("layer").to_pylist()[0] == [0, 1, 0, 2]
@@ -0,0 +1,107 @@
+"""
+階層割当の局所探索のテスト
+"""
+
+import random
+
+from generate_torus_graph import generate_cyclic_graph
+from local_search import LocalSearch, local_search, repair
+from solve_stats import SolveStats
+from torus import torus_objective
+
+
+def _edges(A):
+    return {e: (1, 1, 1) for e in A}
+
+
+def test_repair_keeps_order():
+    """上下関係を保ったまま、最小階層差を満たすように押し上げる"""
+    edges = {(0, 1): (1, 2, 1), (1, 2): (1, 1, 1), (2, 0): (1, 1, 1)}
+    y = [0, 0, 1]
+    repair(3, edges, y)
+    assert y == [0, 2, 3]
+
+
+def test_incremental_objective_matches_full():
+    """増分で更新した目的関数の値が、最初から計算した値と一致する"""
+    for seed in range(5):
+        V, A = generate_cyclic_graph(40, num_cycles=4, edge_prob=0.05, seed=seed)
+        rng = random.Random(seed)
+        y = [rng.randrange(10) for _ in V]
+        edges = _edges(A)
+        repair(len(V), edges, y)
+
+        search = LocalSearch(len(V), edges, y)
+        start = search.objective()
+        search.improve(max_passes=3, seed=seed)
+
+        y_val = dict(zip(V, y))
+        t_val = {(u, v): y_val[u] > y_val[v] for u, v in A}
+        assert search.objective() == torus_objective(V, A, y_val, t_val)
+        assert search.objective() <= start
+        assert all(abs(y_val[u] - y_val[v]) >= 1 for u, v in A)
+
+
+def test_moves_across_neighbours_flip_torus_edges():
+    """閉路を縦に伸ばした階層割当から、トーラス辺を付け替えて階層を詰める"""
+    V, A = [0, 1, 2], [(0, 1), (1, 2), (2, 0)]
+    stats = SolveStats()
+    start = {0: 0, 1: 2, 2: 4}
+    y_val, t_val, L = local_search(V, A, start, M=5, time_limit=None, stats=stats)
+
+    assert max(y_val.values()) == 2
+    assert sum(t_val.values()) == 1
+    assert stats.records[-1]["objective"] == torus_objective(
+        V, A, y_val, t_val, M=5
+    )
+    assert stats.records[-1]["objective"] < stats.records[-1]["start"]
+
+
+def test_layers_stay_within_torus_range():
+    """範囲の外から始めても、結果の階層は torus() と同じ 0..n-1 に収まる"""
+    for seed in range(20):
+        V, A = generate_cyclic_graph(30, num_cycles=3, edge_prob=0.1, seed=seed)
+        rng = random.Random(seed)
+        start = {v: rng.randrange(100) for v in V}
+        y_val, t_val, _ = local_search(V, A, start, time_limit=None, seed=seed)
+        assert max(y_val.values()) <= len(V) - 1
+        assert all(
+            (y_val[v] - y_val[u] if not t_val[(u, v)] else y_val[u] - y_val[v]) >= 1
+            for u, v in A
+            if u != v
+        )
+
+
+def test_block_move():
+    """1つずつでは動かせないノードのまとまりを一緒に動かす"""
+    edges = _edges([(3, 0), (0, 1), (3, 4)])
+    y = [2, 3, 0, 0, 1]
+    search = LocalSearch(5, edges, y)
+    search.improve(max_block=1)
+    assert y == [2, 3, 0, 0, 1]
+
+    search.improve()
+    assert y[:2] == [1, 2]
+    assert search.block_moves >= 1
+    assert search.top == 2
+
+
+def test_zero_lam_edge_within_a_layer():
+    """lam が 0 のエッジは同じ階層に置いてよい（スパン 0 の通常辺）"""
+    V, A = [0, 1, 2], [(0, 1), (1, 2), (2, 0)]
+    lam = {(0, 1): 0, (1, 2): 1, (2, 0): 1}
+    start = {0: 0, 1: 0, 2: 1}
+    y_val, t_val, _ = local_search(V, A, start, lam=lam, time_limit=None)
+
+    assert y_val[1] - y_val[0] >= 0 and not t_val[(0, 1)]
+    assert sum(t_val.values()) == 1
+    w = {e: 1 for e in A}
+    assert torus_objective(V, A, y_val, t_val, w) <= torus_objective(
+        V, A, start, {(0, 1): False, (1, 2): False, (2, 0): True}, w
+    )
+
+    edges = {(0, 1): (1, 0, 1), (1, 2): (1, 1, 1)}
+    y = [0, 0, 1]
+    search = LocalSearch(3, edges, y)
+    assert search.span == 1 and search.torus == 0
+    assert search.block(1, 1, 8) == {1, 2}
@@ -0,0 +1,68 @@
+"""
+ツインノード併合のテスト
+
+併合後の最適順序を展開したものが、元の問題の最適交差重みを達成するかを全探索で確認する
+"""
+
+import itertools
+import random
+
+from merge_twins import merge_twins, expand_twins
+
+
+def crossing_weight(order, E_layers, w):
+    """各層の順序に対する重み付き交差数"""
+    pos = {v: i for nodes in order.values() for i, v in enumerate(nodes)}
+    total = 0
+    for edges in E_layers.values():
+        for (u1, v1), (u2, v2) in itertools.combinations(edges, 2):
+            if (pos[u1] - pos[u2]) * (pos[v1] - pos[v2]) < 0:
+                total += w.get((u1, v1), 1) * w.get((u2, v2), 1)
+    return total
+
+
+def best_order(V_layers, E_layers, w):
+    """全探索で交差重み最小の順序を求める"""
+    layers = sorted(V_layers)
+    best = None
+    for perms in itertools.product(*(itertools.permutations(V_layers[k]) for k in layers)):
+        order = dict(zip(layers, perms))
+        cost = crossing_weight(order, E_layers, w)
+        if best is None or cost < best[0]:
+            best = (cost, order)
+    return best
+
+
+def test_merge_twins_simple():
+    """隣接関係が等しいノードだけが併合される"""
+    V_layers = {0: [0, 1, 2], 1: [3, 4]}
+    E_layers = {0: [(0, 3), (0, 4), (1, 3), (1, 4), (2, 4)]}
+
+    V_m, E_m, w_m, members, stats = merge_twins(V_layers, E_layers, {})
+
+    assert V_m == {0: [0, 2], 1: [3, 4]}
+    assert members[0] == [0, 1]
+    assert w_m[(0, 3)] == 2.0
+    assert stats["before"]["pairs"] == 8
+    assert stats["after"]["pairs"] == 4
+
+
+def test_merge_twins_keeps_optimum():
+    """併合しても最適な交差重みが変わらない"""
+    for seed in range(30):
+        rng = random.Random(seed)
+        V_layers = {0: [0, 1, 2, 3], 1: [4, 5, 6, 7], 2: [8, 9, 10]}
+        E_layers = {
+            k: [(u, v) for u in V_layers[k] for v in V_layers[k + 1] if rng.random() < 0.5]
+            for k in (0, 1)
+        }
+        w = {e: rng.choice([1, 1, 2]) for edges in E_layers.values() for e in edges}
+
+        optimum, _ = best_order(V_layers, E_layers, w)
+
+        V_m, E_m, w_m, members, _ = merge_twins(V_layers, E_layers, w)
+        _, merged_order = best_order(V_m, E_m, w_m)
+        order = expand_twins(merged_order, members)
+
+        assert sorted(order[0]) == V_layers[0]
+        assert crossing_weight(order, E_layers, w) == optimum
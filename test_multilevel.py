@@ -0,0 +1,79 @@
+"""
+多段階の粗視化・詳細化による階層割当のテスト
+"""
+
+import random
+
+import pytest
+
+from generate_torus_graph import generate_cyclic_graph, generate_dag
+from multilevel import coarsen, multilevel, refine
+from solve_stats import SolveStats
+
+
+def test_coarsen_keeps_edges():
+    """粗いエッジが元のエッジの本数と重みをまとめ、ノード数が減る"""
+    V, A = generate_dag(200, edge_prob=0.02, seed=0)
+    edges = {e: (2, 1, 1) for e in A}
+    n_c, edges_c, parent, offset = coarsen(len(V), edges, random.Random(0))
+
+    assert n_c < len(V)
+    assert max(parent) == n_c - 1
+    internal = sum(1 for a, b in A if parent[a] == parent[b])
+    assert sum(k for _, _, k in edges_c.values()) + internal == len(A)
+    assert sum(w for w, _, _ in edges_c.values()) == 2 * (len(A) - internal)
+
+
+def test_multilevel_projection_feasible():
+    """粗いグラフの解を戻した階層割当が、最小階層差を満たす"""
+    V, A = generate_dag(500, edge_prob=0.01, seed=1)
+    rng = random.Random(0)
+    lam = {e: rng.randint(1, 3) for e in A}
+    y_val, t_val, L = multilevel(V, A, lam=lam, solver="longest", coarsest=20)
+
+    assert all(y_val[v] - y_val[u] >= lam[(u, v)] for u, v in A)
+    assert not any(t_val.values())
+    assert sum(len(nodes) for nodes in L.values()) == len(V)
+
+
+def test_refine_shortens_spans():
+    """最大の階層とエッジの向きを変えずに、スパンの2乗和を小さくする"""
+    edges = {(0, 1): (1, 1, 1), (1, 2): (1, 1, 1), (0, 3): (1, 1, 1)}
+    y = [0, 1, 5, 4]
+    assert refine(4, edges, y) > 0
+    assert y[3] == 1
+    assert all(y[b] - y[a] >= 1 for a, b in edges)
+    assert sum((y[b] - y[a]) ** 2 for a, b in edges) < 1 + 16 + 16
+
+
+def test_multilevel_longest_rejects_cycles():
+    """最長路では閉路を含むグラフを扱えない"""
+    V, A = [0, 1, 2], [(0, 1), (1, 2), (2, 0)]
+    with pytest.raises(ValueError):
+        multilevel(V, A, solver="longest", coarsest=1)
+
+
+def test_stalled_coarsening_uses_local_search():
+    """粗視化が coarsest まで進まなければ、torus() を使わずに最長路から改善する"""
+    V, A = generate_cyclic_graph(80, num_cycles=4, edge_prob=0.05, seed=2)
+    stats = SolveStats()
+    y_val, t_val, _ = multilevel(V, A, coarsest=1, stats=stats, verbose=False)
+
+    record = stats.records[-1]
+    assert record["coarsest_solve"] == "longest"
+    assert record["levels"][-1] > 1
+    for u, v in A:
+        if u != v:
+            d = y_val[u] - y_val[v] if t_val[(u, v)] else y_val[v] - y_val[u]
+            assert d >= 1
+
+
+def test_torus_layers_out_of_range_raise():
+    """torus() の階層の範囲に収まらなければ、local_search() と同じく ValueError"""
+    V, A = [0, 1, 2], [(0, 1), (1, 2)]
+    lam = {e: 5 for e in A}
+    with pytest.raises(ValueError):
+        multilevel(V, A, lam=lam, coarsest=1, verbose=False)
+
+    y_val, _, _ = multilevel(V, A, lam=lam, coarsest=1, verbose=False, M=11)
+    assert y_val == {0: 0, 1: 5, 2: 10}
@@ -0,0 +1,114 @@
+"""
+パイプラインのテスト（Gurobi を使わない段階の組み合わせ）
+"""
+
+import io
+import json
+
+from pipeline import (
+    iter_graphs,
+    longest_path_layers,
+    main,
+    read_edge_list,
+    read_graphml,
+    run_pipeline,
+)
+
+EDGE_LIST = """\
+# コメント
+a b
+b c
+c a
+c d 2
+a d 1 2
+e
+"""
+
+GRAPHML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+  <key id="d0" for="edge" attr.name="weight" attr.type="double"/>
+  <graph id="G" edgedefault="directed">
+    <node id="n0"/><node id="n1"/><node id="n2"/>
+    <edge source="n0" target="n1"><data key="d0">2.5</data></edge>
+    <edge source="n1" target="n2"/>
+  </graph>
+</graphml>
+"""
+
+
+def test_read_edge_list():
+    graph = read_edge_list(io.StringIO(EDGE_LIST))
+    assert graph["labels"] == ["a", "b", "c", "d", "e"]
+    assert graph["V"] == [0, 1, 2, 3, 4]
+    assert graph["A"] == [(0, 1), (1, 2), (2, 0), (2, 3), (0, 3)]
+    assert graph["w"][(2, 3)] == 2
+    assert graph["lam"][(0, 3)] == 2
+
+
+def test_read_graphml():
+    graph = read_graphml(io.BytesIO(GRAPHML))
+    assert graph["labels"] == ["n0", "n1", "n2"]
+    assert graph["A"] == [(0, 1), (1, 2)]
+    assert graph["w"] == {(0, 1): 2.5, (1, 2): 1.0}
+
+
+def test_run_pipeline():
+    """閉路除去から座標割当まで実行し、各段階の時間を記録する"""
+    graph = read_edge_list(io.StringIO(EDGE_LIST))
+    layout = run_pipeline(graph, layering="longest", crossing="none")
+
+    layer = layout["layer"]
+    assert all(abs(layer[u] - layer[v]) == 1 for u, v in layout["A"])
+    assert set(layout["pos"]) == set(layout["V"])
+    assert {"cycles", "layering", "dummy", "crossing", "coordinates"} <= set(
+        layout["stages"]
+    )
+
+
+def test_longest_path_layers_respects_lam():
+    """最長路の階層割当が各エッジの最小階層差を満たす"""
+    graph = read_edge_list(io.StringIO(EDGE_LIST))
+    A = [(0, 1), (1, 2), (2, 3), (0, 3)]
+    layer = longest_path_layers(graph["V"], A, graph["lam"])
+    assert layer == {0: 0, 1: 1, 2: 2, 3: 3, 4: 0}
+    assert all(layer[v] - layer[u] >= graph["lam"][(u, v)] for u, v in A)
+
+    layer = longest_path_layers([0, 1, 2], [(0, 1), (1, 2)], {(0, 1): 3, (1, 2): 0})
+    assert layer == {0: 0, 1: 3, 2: 3}
+
+
+def test_directory_stream(tmp_path):
+    """ディレクトリ内のグラフを1つずつ処理して書き出す"""
+    src = tmp_path / "graphs"
+    src.mkdir()
+    (src / "g1.txt").write_text(EDGE_LIST, encoding="utf-8")
+    (src / "g2.graphml").write_bytes(GRAPHML)
+    (src / "notes.md").write_text("無視される", encoding="utf-8")
+
+    assert [name for name, _ in iter_graphs(str(src))] == ["g1", "g2"]
+
+    out = tmp_path / "out"
+    stats = tmp_path / "stats.jsonl"
+    main(
+        [
+            str(src),
+            "-o",
+            str(out),
+            "--format",
+            "json",
+            "--layering",
+            "longest",
+            "--crossing",
+            "none",
+            "--stats",
+            str(stats),
+            "--quiet",
+        ]
+    )
+    assert sorted(p.name for p in out.iterdir()) == ["g1.json", "g2.json"]
+    data = json.loads((out / "g2.json").read_text(encoding="utf-8"))
+    assert len(data["nodes"]) == 3
+
+    records = [json.loads(line) for line in stats.read_text().splitlines()]
+    assert [r["label"] for r in records] == ["g1", "g2"]
+    assert "render" in records[0]["memory"]
@@ -0,0 +1,75 @@
+"""
+閉路除去（フィードバック辺集合の削除）のテスト
+"""
+
+import itertools
+import random
+
+from remove_cycles import remove_cycles, strongly_connected_components
+
+
+def is_acyclic(V, A):
+    return all(len(c) == 1 for c in strongly_connected_components(V, A)) and all(
+        u != v for u, v in A
+    )
+
+
+def random_graph(rng, n, m):
+    V = list(range(n))
+    A = [(rng.randrange(n), rng.randrange(n)) for _ in range(m)]
+    return V, A
+
+
+def test_result_is_acyclic_subset():
+    """残ったエッジは元のエッジの部分集合で、閉路を含まない"""
+    for seed in range(100):
+        rng = random.Random(seed)
+        V, A = random_graph(rng, 15, rng.randrange(40))
+        kept = remove_cycles(V, A)
+        assert set(kept) <= set(A)
+        assert is_acyclic(V, kept)
+
+
+def test_dag_is_unchanged():
+    """閉路のないグラフからはエッジを取り除かない"""
+    rng = random.Random(0)
+    V = list(range(30))
+    A = [(u, v) for u, v in itertools.combinations(V, 2) if rng.random() < 0.2]
+    assert remove_cycles(V, A) == A
+
+
+def test_long_cycle_without_recursion():
+    """再帰を使わないので長い閉路でも動く"""
+    n = 100000
+    V = list(range(n))
+    A = [(i, (i + 1) % n) for i in range(n)]
+    kept = remove_cycles(V, A)
+    assert len(kept) == n - 1
+    assert is_acyclic(V, kept)
+
+
+def test_arbitrary_labels():
+    """ノードのラベルは整数でなくてもよい"""
+    V = ["a", "b", "c", "d"]
+    A = [("a", "b"), ("b", "c"), ("c", "a"), ("c", "d"), ("d", "d")]
+    kept = remove_cycles(V, A)
+    assert len(kept) == 3
+    assert ("c", "d") in kept
+    assert is_acyclic(V, kept)
+
+
+def test_exact_is_minimum():
+    """exact_limit 以下の成分では取り除くエッジ数が最小になる"""
+    for seed in range(30):
+        rng = random.Random(seed)
+        V, A = random_graph(rng, 6, 14)
+        A = [(u, v) for u, v in A if u != v]
+        kept = remove_cycles(V, A, exact_limit=6)
+        assert is_acyclic(V, kept)
+
+        best = min(
+            sum(1 for u, v in A if order.index(u) > order.index(v))
+            for order in map(list, itertools.permutations(V))
+        )
+        assert len(A) - len(kept) == best
+        assert len(kept) >= len(remove_cycles(V, A))
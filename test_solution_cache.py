@@ -0,0 +1,127 @@
+"""
+最適化結果の永続キャッシュのテスト
+"""
+
+import multiprocessing
+import random
+
+from solution_cache import SolutionCache, cached, fingerprint, layers_fingerprint
+from solve_stats import SolveStats
+
+
+def test_fingerprint_ignores_order_and_defaults():
+    """並び順・重複・省略された w / lam はフィンガープリントに影響しない"""
+    V = [0, 1, 2, 3]
+    A = [(0, 1), (1, 2), (2, 3), (3, 0)]
+    key = fingerprint("torus", V, A, alpha=100)
+
+    shuffled = A[:] + [(1, 2)]
+    random.Random(0).shuffle(shuffled)
+    ones = {e: 1 for e in A}
+    assert fingerprint("torus", V[::-1], shuffled, ones, ones, alpha=100) == key
+    assert fingerprint("torus", V, list(set(A)), alpha=100) == key
+
+    assert fingerprint("torus", V, A, alpha=10) != key
+    assert fingerprint("pg", V, A, alpha=100) != key
+    assert fingerprint("torus", V, A, {**ones, (0, 1): 2}, alpha=100) != key
+    assert fingerprint("torus", V, A[:-1], alpha=100) != key
+
+
+def test_layers_fingerprint():
+    """交差削減のフィンガープリントも層内の並び順に依存しない"""
+    V_layers = {0: [0, 1], 1: [2, 3]}
+    E_layers = {0: [(0, 2), (1, 3), (0, 3)]}
+    w = {e: 1 for e in E_layers[0]}
+    key = layers_fingerprint("ir", V_layers, E_layers, w)
+    assert layers_fingerprint("ir", {1: [3, 2], 0: [1, 0]}, {0: E_layers[0][::-1]}, w) == key
+    assert layers_fingerprint("ir", V_layers, E_layers, {**w, (0, 2): 3}) != key
+
+
+def test_cached_solves_once(tmp_path):
+    """2回目以降は solve を呼ばずに保存された結果を返す"""
+    calls = []
+
+    def solve():
+        calls.append(1)
+        return {0: 0, 1: 1}, {(0, 1): False}
+
+    with SolutionCache(str(tmp_path / "cache.sqlite")) as cache:
+        first = cached(cache, "k", solve)
+        second = cached(cache, "k", solve)
+
+    assert first == second
+    assert len(calls) == 1
+
+    # 別の接続からも読める
+    with SolutionCache(str(tmp_path / "cache.sqlite")) as cache:
+        assert cached(cache, "k", solve) == first
+        assert cache.hits == 1
+    assert len(calls) == 1
+
+
+def test_failed_result_not_cached(tmp_path):
+    """最適化に失敗した結果は保存しない"""
+    with SolutionCache(str(tmp_path / "cache.sqlite")) as cache:
+        cached(cache, "k", lambda: ({}, {}, {}))
+        assert "k" not in cache
+
+
+def test_edgeless_result_cached(tmp_path):
+    """エッジのないグラフの結果（t_val が空）も保存する"""
+    with SolutionCache(str(tmp_path / "cache.sqlite")) as cache:
+        cached(cache, "k", lambda: ({0: 0}, {}, {0: [0]}))
+        assert "k" in cache
+
+
+def test_non_optimal_result_not_cached(tmp_path):
+    """最適性が示されなかった結果（時間切れの暫定解など）は保存しない"""
+    from gurobipy import GRB
+
+    def solve(status):
+        stats.add({"label": "torus", "result": {"Status": status, "SolCount": 1}})
+        return {0: 0, 1: 1}, {(0, 1): False}, {0: [0], 1: [1]}
+
+    stats = SolveStats()
+    with SolutionCache(str(tmp_path / "cache.sqlite")) as cache:
+        cached(cache, "a", lambda: solve(GRB.TIME_LIMIT), stats)
+        cached(cache, "b", lambda: solve(GRB.OPTIMAL), stats)
+        cached(cache, "c", lambda: solve(GRB.USER_OBJ_LIMIT), stats)
+        assert "a" not in cache
+        assert "b" in cache and "c" in cache
+
+
+def test_lru_eviction(tmp_path):
+    """上限を超えると最後に使われたのが古いものから削除する"""
+    value = list(range(100))
+    with SolutionCache(str(tmp_path / "cache.sqlite"), max_bytes=10**9) as cache:
+        cache.put("a", value)
+        size = cache.total_bytes()
+        cache.max_bytes = 2 * size
+        cache.put("b", value)
+        cache.get("a")
+        cache.put("c", value)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.total_bytes() <= cache.max_bytes
+
+
+def _writer(args):
+    path, i = args
+    with SolutionCache(path) as cache:
+        for j in range(20):
+            cache.put(f"{i}-{j}", {"i": i, "j": j})
+    return i
+
+
+def test_concurrent_writes(tmp_path):
+    """複数プロセスから同時に書き込んでも失われない"""
+    path = str(tmp_path / "cache.sqlite")
+    SolutionCache(path).close()
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.map(_writer, [(path, i) for i in range(4)])
+
+    with SolutionCache(path) as cache:
+        assert len(cache) == 80
+        assert cache.get("3-19") == {"i": 3, "j": 19}
@@ -0,0 +1,62 @@
+"""
+最適化の計測のテスト
+"""
+
+import json
+import time
+
+from solve_stats import SolveStats, start_record
+
+
+class FakeModel:
+    """属性だけを持つモデル（Gurobi を使わずに記録の形式を確かめる）"""
+
+    NumVars = 3
+    NumConstrs = 2
+    Status = 2
+    ObjVal = 1.5
+
+    def update(self):
+        pass
+
+
+def test_record_stages_and_model(tmp_path):
+    """段階ごとの時間とモデルの統計量を記録し、JSONL に書き出す"""
+    path = tmp_path / "stats.jsonl"
+    stats = SolveStats(path=str(path))
+
+    for label in ("a", "b"):
+        record = start_record(stats, label)
+        time.sleep(0.01)
+        record.lap("build")
+        record.model(FakeModel())
+        with record.stage("solve"):
+            time.sleep(0.01)
+        record.result(FakeModel())
+        record.note(nodes=3)
+        record.finish()
+
+    assert [r["label"] for r in stats.records] == ["a", "b"]
+    data = stats.records[0]
+    assert data["stages"]["build"] >= 0.01
+    assert data["stages"]["solve"] >= 0.01
+    assert data["model"]["NumVars"] == 3
+    assert data["model"]["NumQNZs"] is None
+    assert data["result"]["ObjVal"] == 1.5
+    assert data["nodes"] == 3
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["label"] for line in lines] == ["a", "b"]
+    assert stats.totals()["build"] >= 0.02
+
+
+def test_no_stats_records_nothing():
+    """stats が None のときは何も記録せず、コールバックも渡さない"""
+    record = start_record(None, "a")
+    record.lap("build")
+    with record.stage("solve"):
+        pass
+    record.model(FakeModel())
+    record.finish()
+    assert record.callback is None
+    assert record.data["stages"] == {}
@@ -0,0 +1,37 @@
+"""
+SVG / JSON 書き出しのテスト
+"""
+
+import io
+import json
+import xml.etree.ElementTree as ET
+
+from svg_writer import write_json, write_svg
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+# 0 → 1 → 2 の通常エッジと、2 → 0 の継ぎ目をまたぐエッジ
+V = ["a<b", "c&d", 2]
+A = [("a<b", "c&d"), ("c&d", 2), (2, "a<b")]
+L = {0: ["a<b"], 1: ["c&d"], 2: [2]}
+
+
+def test_write_svg_escapes_labels():
+    f = io.StringIO()
+    write_svg(f, V, A, L, with_labels=True)
+    root = ET.fromstring(f.getvalue())
+
+    assert len(root.findall(f".//{SVG}circle")) == len(V)
+    # 通常エッジ 2 本と、継ぎ目をまたぐエッジの 2 本の線分
+    assert len(root.findall(f".//{SVG}line")) == 4
+    labels = [text.text for text in root.findall(f".//{SVG}text")]
+    assert labels == ["a<b", "c&d", "2"]
+
+
+def test_write_json(tmp_path):
+    path = tmp_path / "layout.json"
+    write_json(str(path), V, A, L)
+    data = json.loads(path.read_text(encoding="utf-8"))
+
+    assert [node[0] for node in data["nodes"]] == V
+    assert sorted(len(edge) for edge in data["edges"]) == [4, 4, 8]
@@ -28,20 +28,35 @@
         2. トーラス辺の定義: t[u,v]=1 ⇔ y[u]>y[v] (Big-M法)
         3. 通常辺の階層制約: t[u,v]=0 ⇒ y[v]≥y[u]+lam[(u,v)]
         4. トーラス辺が少なくとも1本存在
+        5. （bounds=True のとき）bounds.torus_bounds() による下界
+            辺素な閉路ごとに Σ t ≥ 1、L_max ≥ max lam
 
     - 目的関数:
         minimize: α*L_max + β*Σ w(u,v)*(y[v]-y[u]+M*t[u,v])
         階層数を最小化しつつ、エッジスパンも考慮
 """
 
-import gurobipy as gp
-from gurobipy import GRB
+from bounds import TOL, reached_bound, torus_bounds
 from create_gurobi_env import create_gurobi_env
+from solve_stats import start_record
 
 from collections import defaultdict
 
 
-def torus(V, A, w=None, lam=None, alpha=100, beta=1, gamma=1000):
+def torus(
+    V,
+    A,
+    w=None,
+    lam=None,
+    alpha=100,
+    beta=1,
+    gamma=1000,
+    M=None,
+    t_weight=None,
+    bounds=True,
+    stats=None,
+    verbose=True,
+):
     """
     トーラスを含む階層グラフの階層割当を最適化
 
@@ -53,12 +68,20 @@ def torus(V, A, w=None, lam=None, alpha=100, beta=1, gamma=1000):
         alpha: 階層数の重み (デフォルト: 100)
         beta: エッジスパンの重み (デフォルト: 1)
         gamma: トーラス辺数の重み (デフォルト: 1000)
+        M: Big-M定数。階層の上限は M-1 になる (デフォルト: ノード数)
+        t_weight: トーラス辺数の項でのエッジごとの重み dict (デフォルト: すべて1)
+        bounds: 組合せ的な下界を妥当な不等式としてモデルに加え、暫定解が
+            目的関数の下界に達したら探索を打ち切る (デフォルト: True)
+        stats: 計測結果を記録する SolveStats (デフォルト: 記録しない)
+        verbose: False のとき Gurobi のログと失敗時の出力を抑える (デフォルト: True)
 
     Returns:
         y_val: 各ノードの階層 dict[int: int]
         t_val: 各エッジがトーラス辺か dict[(int,int): bool]
         L: レイヤー集合 dict[int: list[int]]
     """
+    import gurobipy as gp
+    from gurobipy import GRB
 
     # エッジの重複を除去
     A = list(set(A))
@@ -70,22 +93,30 @@ def torus(V, A, w=None, lam=None, alpha=100, beta=1, gamma=1000):
         lam = {(u, v): 1 for (u, v) in A}
 
     n = len(V)
-    M = n  # Big-M定数（十分大きな値）
+    if M is None:
+        M = n  # Big-M定数（十分大きな値）
 
-    env = create_gurobi_env()
+    record = start_record(stats, "torus")
+    env = create_gurobi_env(verbose)
+    record.lap("env")
+
+    bound = None
+    if bounds:
+        bound = torus_bounds(V, A, w, lam, alpha, beta, gamma, M, t_weight)
+        record.lap("bounds")
 
     with gp.Model(name="Torus_Layout", env=env) as m:
 
         # ========== 変数定義 ==========
 
-        # y[v]: ノードvの階層（0からn-1の整数）
-        y = m.addVars(V, vtype=GRB.INTEGER, lb=0, ub=n - 1, name="y")
+        # y[v]: ノードvの階層（0からM-1の整数）
+        y = m.addVars(V, vtype=GRB.INTEGER, lb=0, ub=M - 1, name="y")
 
         # t[u,v]: エッジ(u,v)がトーラス辺なら1、通常辺なら0
         t = m.addVars(A, vtype=GRB.BINARY, name="t")
 
         # L_max: 使用される最大階層数
-        L_max = m.addVar(vtype=GRB.INTEGER, lb=0, ub=n - 1, name="L_max")
+        L_max = m.addVar(vtype=GRB.INTEGER, lb=0, ub=M - 1, name="L_max")
 
         # ========== 制約 ==========
 
@@ -113,6 +144,15 @@ def torus(V, A, w=None, lam=None, alpha=100, beta=1, gamma=1000):
             name="normal_edge_constraint",
         )
 
+        # 5. 下界
+        # 辺素な閉路にはそれぞれトーラス辺が少なくとも1本ある
+        if bound is not None:
+            L_max.LB = bound["L_max"]
+            for i, cycle in enumerate(bound["cycles"]):
+                m.addConstr(
+                    gp.quicksum(t[e] for e in cycle) >= 1, name=f"cycle_torus[{i}]"
+                )
+
         # ========== 目的関数 ==========
 
         # 階層数を最小化しつつ、エッジスパンの分散とトーラス辺数も考慮
@@ -128,21 +168,40 @@ def torus(V, A, w=None, lam=None, alpha=100, beta=1, gamma=1000):
                 for (u, v) in A
             )  # エッジスパンの2乗（分散）
             + gamma
-            * gp.quicksum(t[u, v] for (u, v) in A)  # トーラス辺の数を直接ペナルティ
+            * gp.quicksum(
+                (1 if t_weight is None else t_weight[(u, v)]) * t[u, v] for (u, v) in A
+            )  # トーラス辺の数を直接ペナルティ
         )
 
         m.setObjective(obj, GRB.MINIMIZE)
 
+        # 暫定解が下界に達していれば最適なので、探索を打ち切る
+        if bound is not None:
+            m.Params.BestObjStop = bound["objective"] + TOL * max(
+                1, abs(bound["objective"])
+            )
+            record.note(
+                lower_bound=bound["objective"],
+                torus_lower_bound=bound["torus"],
+                L_max_lower_bound=bound["L_max"],
+            )
+
         # ========== 最適化実行 ==========
 
-        m.optimize()
+        record.lap("build")
+        record.model(m)
+
+        m.optimize(record.callback)
+        record.lap("solve")
+        record.result(m)
 
         # ========== 結果の取得 ==========
 
         y_val = {}
         t_val = {}
+        layer_dict = defaultdict(list)
 
-        if m.status == GRB.OPTIMAL:
+        if reached_bound(m):
             # 各ノードの階層を取得
             for v in V:
                 y_val[v] = int(y[v].X)
@@ -152,11 +211,10 @@ def torus(V, A, w=None, lam=None, alpha=100, beta=1, gamma=1000):
                 t_val[(u, v)] = t[u, v].X > 0.5
 
             # レイヤー集合を構築
-            layer_dict = defaultdict(list)
             for v in V:
                 layer_dict[y_val[v]].append(v)
 
-        else:
+        elif verbose:
             print(f"最適化失敗: ステータス = {m.status}")
             # デバッグ用に実行不可能な制約を計算
             m.computeIIS()
@@ -165,4 +223,39 @@ def torus(V, A, w=None, lam=None, alpha=100, beta=1, gamma=1000):
                 if c.IISConstr:
                     print(f"  {c.constrName}")
 
+        record.lap("extract")
+        record.finish()
+
         return y_val, t_val, layer_dict
+
+
+def torus_objective(V, A, y_val, t_val, w=None, alpha=100, beta=1, gamma=1000, M=None):
+    """
+    階層割当に対する torus() の目的関数の値
+
+    Args:
+        V: ノード集合 list[int]
+        A: エッジ集合 list[tuple(int, int)]
+        y_val: 各ノードの階層 dict[int: int]
+        t_val: 各エッジがトーラス辺か dict[(int,int): bool]
+        w: エッジ重み dict[(int,int): float] (デフォルト: すべて1)
+        alpha, beta, gamma: torus() と同じ重み
+        M: Big-M定数 (デフォルト: ノード数)
+
+    Returns:
+        value: α*L_max + β*Σ w(u,v)*(y[v]-y[u]+M*t[u,v])^2 + γ*Σ t[u,v]
+    """
+    A = list(set(A))
+    if M is None:
+        M = len(V)
+
+    L_max = max((y_val[v] for v in V), default=0)
+    span = 0
+    num_torus = 0
+    for u, v in A:
+        t = 1 if t_val[(u, v)] else 0
+        d = y_val[v] - y_val[u] + M * t
+        span += (1 if w is None else w[(u, v)]) * d * d
+        num_torus += t
+
+    return alpha * L_max + beta * span + gamma * num_torus
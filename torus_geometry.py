@@ -0,0 +1,69 @@
+"""
+トーラスの継ぎ目を通るエッジの幾何計算
+
+逆方向エッジ（大きいレイヤー → 小さいレイヤー）は、右端の境界へ出て左端の境界から入る。
+x 方向の総距離に対して傾きを一定に保ち、右端と左端の境界で同じ高さを通るようにする。
+描画ライブラリに依存しないので、draw_torus と svg_writer の両方から使う。
+"""
+
+
+def index_positions(L):
+    """(レイヤー, 添字) によるノードの座標 dict(node: (x, y))"""
+    pos = {}
+    for layer_num, nodes in L.items():
+        for idx, node in enumerate(nodes):
+            pos[node] = (layer_num, idx)
+    return pos
+
+
+def seam_boundary_y(u_pos, v_pos, min_layer, max_layer):
+    """
+    逆方向エッジがトーラスの境界を通る高さ
+
+    Args:
+        u_pos: 始点の座標 (x, y)
+        v_pos: 終点の座標 (x, y)
+        min_layer: 最小のレイヤー
+        max_layer: 最大のレイヤー
+
+    Returns:
+        boundary_y: 右端と左端の境界での高さ float
+    """
+    # トーラス経由の x 方向の総距離
+    dist_to_right = max_layer + 0.5 - u_pos[0]
+    dist_from_left = v_pos[0] - (min_layer - 0.5)
+    total_x_dist = dist_to_right + dist_from_left
+
+    # 傾きを一定に保つ（y の変化 / x の変化）
+    slope = (v_pos[1] - u_pos[1]) / total_x_dist
+
+    return u_pos[1] + slope * dist_to_right
+
+
+def split_seam_edge(u_pos, v_pos, min_layer, max_layer):
+    """
+    逆方向エッジを継ぎ目で2本の線分に分割
+
+    Returns:
+        out_segment: u から右端の境界点への線分 ((x, y), (x, y))
+        in_segment: 左端の境界点から v への線分 ((x, y), (x, y))
+    """
+    boundary_y = seam_boundary_y(u_pos, v_pos, min_layer, max_layer)
+    return (
+        (tuple(u_pos), (max_layer + 0.5, boundary_y)),
+        ((min_layer - 0.5, boundary_y), tuple(v_pos)),
+    )
+
+
+def shrink_segment(p, q, start, end):
+    """線分 p→q の始点を start、終点を end だけ縮める"""
+    dx = q[0] - p[0]
+    dy = q[1] - p[1]
+    length = (dx * dx + dy * dy) ** 0.5
+    if length == 0:
+        return p, q
+    ux, uy = dx / length, dy / length
+    return (
+        (p[0] + ux * start, p[1] + uy * start),
+        (q[0] - ux * end, q[1] - uy * end),
+    )
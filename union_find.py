@@ -0,0 +1,77 @@
+"""
+素集合データ構造（Union-Find）
+
+エッジを追加しながら弱連結成分を管理する。
+経路圧縮とサイズによる併合により、各操作はほぼ定数時間で行える。
+
+使用例:
+    from union_find import UnionFind
+
+    uf = UnionFind(V)
+    for u, v in A:
+        uf.union(u, v)
+
+    if uf.count == 1:
+        print("連結")
+"""
+
+
+class UnionFind:
+    """
+    素集合データ構造
+
+    Attributes:
+        count: 連結成分の数 int
+    """
+
+    __slots__ = ("parent", "size", "count")
+
+    def __init__(self, V=(), A=()):
+        self.parent = {}
+        self.size = {}
+        self.count = 0
+
+        for v in V:
+            self.add(v)
+        for u, v in A:
+            self.union(u, v)
+
+    def add(self, v):
+        """ノードを1つの成分として追加（既にあれば何もしない）"""
+        if v not in self.parent:
+            self.parent[v] = v
+            self.size[v] = 1
+            self.count += 1
+
+    def find(self, v):
+        """ノードが属する成分の代表ノード"""
+        parent = self.parent
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def union(self, u, v):
+        """
+        2つのノードの成分を併合
+
+        Returns:
+            merged: 異なる成分を併合した場合 True
+        """
+        self.add(u)
+        self.add(v)
+        ru = self.find(u)
+        rv = self.find(v)
+        if ru == rv:
+            return False
+
+        if self.size[ru] < self.size[rv]:
+            ru, rv = rv, ru
+        self.parent[rv] = ru
+        self.size[ru] += self.size[rv]
+        self.count -= 1
+        return True
+
+    def connected(self, u, v):
+        """2つのノードが同じ成分に属するか"""
+        return self.find(u) == self.find(v)